@@ -0,0 +1,303 @@
+"""
+Vectorized backtest engine for parameter sweeps.
+
+The legacy ``database.run_backtest`` walks games one by one for a single
+configuration. Here every combination of parameters is a grid point and
+the whole grid is evaluated at once: per-game returns form a
+(grid points x games) matrix and bankrolls are a cumulative product along
+the games axis.
+
+Grid parameters:
+
+- ``bet_fractions``: fraction of the current bankroll bet on each game
+- ``entry_windows``: hours before game start over which the entry price is averaged
+- ``win_thresholds``: a last price above this settles the game as a win (100)
+- ``loss_thresholds``: a last price at or below this settles the game as a loss (0)
+- ``min_prices`` / ``max_prices``: only bet when the entry price is within range
+
+The defaults (0.02, 48h, 95, 1, 0, 100) reproduce ``run_backtest``.
+"""
+import itertools
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from config import (
+    BACKTEST_BET_PERCENTAGE,
+    BACKTEST_INITIAL_CAPITAL,
+    BACKTEST_MAX_GRID_POINTS,
+    BACKTEST_SWEEP_CHUNK,
+    BACKTEST_SWEEP_MAX_CURVES,
+    DEFAULT_TEAM,
+)
+import database
+
+logger = logging.getLogger(__name__)
+
+GRID_PARAMETERS = (
+    "bet_fractions",
+    "entry_windows",
+    "win_thresholds",
+    "loss_thresholds",
+    "min_prices",
+    "max_prices",
+)
+
+DEFAULT_GRID = {
+    "bet_fractions": (BACKTEST_BET_PERCENTAGE,),
+    "entry_windows": (48.0,),
+    "win_thresholds": (95.0,),
+    "loss_thresholds": (1.0,),
+    "min_prices": (0.0,),
+    "max_prices": (100.0,),
+}
+
+
+def parse_grid_values(text: str) -> List[float]:
+    """Parse a grid parameter from a query string.
+
+    Accepts comma-separated values and ``start:stop:step`` ranges (stop
+    inclusive), e.g. ``0.01,0.02`` or ``0.005:0.1:0.005``.
+
+    Args:
+        text: Parameter text
+
+    Returns:
+        List of values in the order given
+    """
+    values: List[float] = []
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if ":" in part:
+            fields = part.split(":")
+            if len(fields) != 3:
+                raise ValueError(f"Ranges must look like start:stop:step, got {part!r}")
+            start, stop, step = (float(f) for f in fields)
+            if step <= 0:
+                raise ValueError(f"Range step must be positive, got {part!r}")
+            count = int(np.floor((stop - start) / step + 1e-9)) + 1
+            values.extend(round(start + i * step, 10) for i in range(max(count, 0)))
+        else:
+            values.append(float(part))
+    if not values:
+        raise ValueError(f"No values in {text!r}")
+    return values
+
+
+def build_grid(**params: Optional[Sequence[float]]) -> Dict[str, np.ndarray]:
+    """Expand parameter lists into the cartesian product of grid points.
+
+    Args:
+        **params: Any of GRID_PARAMETERS; missing ones use DEFAULT_GRID
+
+    Returns:
+        Mapping of parameter name to a 1-D array with one entry per grid point
+    """
+    unknown = set(params) - set(GRID_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown grid parameters: {sorted(unknown)}")
+    axes = [list(params.get(name) or DEFAULT_GRID[name]) for name in GRID_PARAMETERS]
+
+    size = int(np.prod([len(axis) for axis in axes]))
+    if size > BACKTEST_MAX_GRID_POINTS:
+        raise ValueError(f"Grid has {size} points; the limit is {BACKTEST_MAX_GRID_POINTS}")
+
+    points = np.array(list(itertools.product(*axes)), dtype=np.float64).reshape(size, len(axes))
+    return {name: points[:, i] for i, name in enumerate(GRID_PARAMETERS)}
+
+
+def load_games(team: str, entry_windows: Iterable[float]) -> Dict[str, Any]:
+    """Load per-game inputs as arrays.
+
+    Args:
+        team: Team abbreviation whose games are bet on
+        entry_windows: Distinct window lengths in hours
+
+    Returns:
+        Dictionary with 'games' (metadata list), 'windows' (hours),
+        'entry' (games x windows, NaN without data) and 'last' (games, NaN
+        without data)
+    """
+    windows = sorted(set(float(w) for w in entry_windows))
+    rows = database.get_backtest_inputs(team, windows)
+    entry = np.array(
+        [[np.nan if p is None else p for p in row['entry_prices']] for row in rows],
+        dtype=np.float64
+    ).reshape(len(rows), len(windows))
+    last = np.array(
+        [np.nan if row['last_price'] is None else row['last_price'] for row in rows],
+        dtype=np.float64
+    )
+    games = [{k: row[k] for k in ('game_id', 'game_date', 'slug')} for row in rows]
+    return {"games": games, "windows": np.array(windows), "entry": entry, "last": last}
+
+
+def simulate(
+    entry: np.ndarray,
+    last: np.ndarray,
+    grid: Dict[str, np.ndarray],
+    window_index: np.ndarray,
+    initial_capital: float = BACKTEST_INITIAL_CAPITAL
+) -> Dict[str, np.ndarray]:
+    """Evaluate every grid point over every game.
+
+    Args:
+        entry: Entry prices, games x windows
+        last: Raw last prices, one per game
+        grid: Grid point parameters (see build_grid)
+        window_index: Column of ``entry`` used by each grid point
+        initial_capital: Starting bankroll
+
+    Returns:
+        Mapping with 'equity' (points x games bankroll after each game),
+        'returns' (points x games fractional bankroll change), 'bets' and
+        'wins' (points)
+    """
+    entry_p = entry[:, window_index].T  # points x games
+    last_p = last[np.newaxis, :]
+
+    win = last_p > grid["win_thresholds"][:, np.newaxis]
+    loss = ~win & (last_p <= grid["loss_thresholds"][:, np.newaxis])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi = np.where(win, (100.0 - entry_p) / entry_p, (last_p - entry_p) / entry_p)
+    roi = np.where(loss, -1.0, roi)
+
+    bet = (
+        np.isfinite(entry_p) & (entry_p > 0) & np.isfinite(last_p)
+        & (entry_p >= grid["min_prices"][:, np.newaxis])
+        & (entry_p <= grid["max_prices"][:, np.newaxis])
+    )
+    returns = np.where(bet, grid["bet_fractions"][:, np.newaxis] * roi, 0.0)
+    equity = initial_capital * np.cumprod(1.0 + returns, axis=1)
+
+    return {
+        "equity": equity,
+        "returns": returns,
+        "bets": bet.sum(axis=1),
+        "wins": (bet & (roi > 0)).sum(axis=1),
+    }
+
+
+def summarize(
+    equity: np.ndarray,
+    bets: np.ndarray,
+    wins: np.ndarray,
+    initial_capital: float
+) -> Dict[str, np.ndarray]:
+    """Compute summary statistics per grid point.
+
+    Returns:
+        Mapping of statistic name to a 1-D array
+    """
+    if equity.shape[1]:
+        final = equity[:, -1]
+        peaks = np.maximum.accumulate(np.maximum(equity, initial_capital), axis=1)
+        max_drawdown = np.max(1.0 - equity / peaks, axis=1) * 100
+    else:
+        final = np.full(equity.shape[0], initial_capital)
+        max_drawdown = np.zeros(equity.shape[0])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        win_rate = np.where(bets > 0, wins / bets * 100, np.nan)
+    return {
+        "final_bankroll": final,
+        "total_return_percent": (final / initial_capital - 1.0) * 100,
+        "max_drawdown_percent": max_drawdown,
+        "bets": bets,
+        "wins": wins,
+        "win_rate_percent": win_rate,
+    }
+
+
+def _to_list(values: np.ndarray, digits: int = 4) -> List[Optional[float]]:
+    """Round an array and convert it to a JSON-safe list (NaN becomes None)."""
+    rounded = np.round(values.astype(np.float64), digits)
+    return [None if v != v else v for v in rounded.tolist()]
+
+
+def run_sweep(
+    team: str = DEFAULT_TEAM,
+    initial_capital: float = BACKTEST_INITIAL_CAPITAL,
+    curves: int = 0,
+    chunk_size: int = BACKTEST_SWEEP_CHUNK,
+    **params: Optional[Sequence[float]]
+) -> Dict[str, Any]:
+    """Run a parameter sweep and return JSON-ready results.
+
+    Grid points are evaluated in chunks of ``chunk_size`` so intermediate
+    matrices stay bounded for large sweeps. Results are columnar: each
+    entry of 'params' and 'stats' is a list with one value per grid point.
+    Equity curves (one bankroll per game) are only kept for the best
+    ``curves`` grid points by final bankroll: 'equity_points' holds their
+    grid indices, best first, and 'equity' their curves.
+
+    Args:
+        team: Team abbreviation whose games are bet on
+        initial_capital: Starting bankroll for every grid point
+        curves: Equity curves to return (at most BACKTEST_SWEEP_MAX_CURVES)
+        chunk_size: Grid points per vectorized batch
+        **params: Grid parameter lists (see GRID_PARAMETERS)
+
+    Returns:
+        Dictionary with 'team', 'initial_capital', 'games', 'grid_points',
+        'elapsed_ms', 'params', 'stats' and, when curves are requested,
+        'equity_points' and 'equity'
+    """
+    if not 0 <= curves <= BACKTEST_SWEEP_MAX_CURVES:
+        raise ValueError(f"curves must be between 0 and {BACKTEST_SWEEP_MAX_CURVES}")
+    started = time.perf_counter()
+    grid = build_grid(**params)
+    data = load_games(team, grid["entry_windows"])
+    window_index = np.searchsorted(data["windows"], grid["entry_windows"])
+    size = len(grid["bet_fractions"])
+
+    stats_chunks: List[Dict[str, np.ndarray]] = []
+    # Best curves seen so far: grid indices and their equity rows
+    best_points = np.array([], dtype=np.int64)
+    best_curves = np.empty((0, len(data["games"])))
+    for lo in range(0, size, chunk_size):
+        hi = min(lo + chunk_size, size)
+        chunk = {name: values[lo:hi] for name, values in grid.items()}
+        sim = simulate(data["entry"], data["last"], chunk, window_index[lo:hi], initial_capital)
+        summary = summarize(sim["equity"], sim["bets"], sim["wins"], initial_capital)
+        stats_chunks.append(summary)
+        if curves:
+            top = np.argsort(-summary["final_bankroll"], kind="stable")[:curves]
+            best_points = np.concatenate([best_points, lo + top])
+            best_curves = np.concatenate([best_curves, sim["equity"][top]])
+
+    stats = {
+        name: np.concatenate([chunk[name] for chunk in stats_chunks])
+        for name in stats_chunks[0]
+    }
+    result = {
+        "team": team,
+        "initial_capital": initial_capital,
+        "games": data["games"],
+        "grid_points": size,
+        "params": {name: grid[name].tolist() for name in GRID_PARAMETERS},
+        "stats": {
+            "final_bankroll": _to_list(stats["final_bankroll"], 2),
+            "total_return_percent": _to_list(stats["total_return_percent"]),
+            "max_drawdown_percent": _to_list(stats["max_drawdown_percent"]),
+            "bets": stats["bets"].tolist(),
+            "wins": stats["wins"].tolist(),
+            "win_rate_percent": _to_list(stats["win_rate_percent"]),
+        },
+    }
+    if curves:
+        order = np.argsort(-stats["final_bankroll"][best_points], kind="stable")[:curves]
+        result["equity_points"] = best_points[order].tolist()
+        result["equity"] = np.round(best_curves[order], 2).tolist()
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    result["elapsed_ms"] = round(elapsed_ms, 1)
+    logger.info(
+        "Backtest sweep finished",
+        extra={"team": team, "grid_points": size, "games": len(data["games"]), "elapsed_ms": result["elapsed_ms"]}
+    )
+    return result
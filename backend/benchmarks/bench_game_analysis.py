@@ -0,0 +1,149 @@
+"""
+Benchmark game analysis: per-game loop, set-based query, materialized rows.
+
+Builds a synthetic league database (every team, a full season of games)
+and times the original per-game loop (2N+1 queries, ``per_game_analysis``
+below), compute_game_analysis_dataset (one query over price history) and
+generate_game_analysis_dataset (precomputed game_analysis rows), checking
+that all three return identical rows.
+
+Usage:
+    python benchmarks/bench_game_analysis.py
+    python benchmarks/bench_game_analysis.py --games 1230 --fidelity-minutes 1
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+from config import NBA_TEAMS, PRICE_WINDOW_HOURS_AFTER, PRICE_WINDOW_HOURS_BEFORE  # noqa: E402
+
+SEASON_START = datetime(2025, 10, 21, 23, 0, tzinfo=timezone.utc)
+
+
+def build_league_database(db_path: str, games: int, fidelity_minutes: int, seed: int) -> int:
+    """Populate a database with a synthetic league season.
+
+    Args:
+        db_path: SQLite database path
+        games: Number of games to generate
+        fidelity_minutes: Spacing between price points
+        seed: Random seed
+
+    Returns:
+        Number of price points written
+    """
+    rng = random.Random(seed)
+    writer = database.DatabaseWriter(db_path)
+    step = fidelity_minutes * 60
+    points = 0
+
+    for i in range(games):
+        away, home = rng.sample(NBA_TEAMS, 2)
+        start = SEASON_START + timedelta(days=i * 170 // games, minutes=30 * (i % 4))
+        start_ts = int(start.timestamp())
+        first = start_ts - PRICE_WINDOW_HOURS_BEFORE * 3600
+        last = start_ts + PRICE_WINDOW_HOURS_AFTER * 3600
+
+        price = rng.uniform(0.2, 0.8)
+        history = []
+        for t in range(first, last + 1, step):
+            price = min(0.99, max(0.01, price + rng.gauss(0, 0.01)))
+            history.append({'t': t, 'p': price})
+        # Settle the market at the end of the window
+        history[-1]['p'] = rng.choice((0.0005, 0.9995))
+
+        writer.write_game(
+            slug=f"nba-{away}-{home}-{start:%Y-%m-%d}-{i}",
+            game_date=f"{start:%Y-%m-%d}",
+            game_start_iso=start.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            token_id=f"bench-{i}",
+            history=history,
+            complete=True
+        )
+        points += len(history)
+
+    writer.close()
+    return points
+
+
+def per_game_analysis(team: str) -> List[Dict[str, Any]]:
+    """The analysis dataset computed one game at a time (2N+1 queries)."""
+    analysis_data = []
+    for game in database.get_all_games(team):
+        avg_48h = database.calculate_48h_average_price(game['id'], team)
+        final_price = database.get_final_price(game['id'], team)
+        analysis_data.append({
+            'game_id': game['id'],
+            'game_date': game['game_date'],
+            'slug': game['slug'],
+            'game_start_utc': game['game_start_utc'],
+            'avg_48h_price': avg_48h,
+            'final_price': final_price,
+            'roi_percent': database.calculate_roi(avg_48h, final_price)
+        })
+    return analysis_data
+
+
+def time_call(func, *args, repeat: int = 3):
+    """Return (best seconds, result) over several runs."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark game analysis implementations")
+    parser.add_argument("--games", type=int, default=1230, help="Games in the synthetic season")
+    parser.add_argument("--fidelity-minutes", type=int, default=60, help="Spacing between price points")
+    parser.add_argument("--teams", type=int, default=5, help="Teams to analyze")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is kept)")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, "bench.db")
+        started = time.perf_counter()
+        points = build_league_database(database.DB_PATH, args.games, args.fidelity_minutes, args.seed)
+        print(f"built {args.games} games / {points} points in {time.perf_counter() - started:.2f}s")
+
+        implementations = {
+            "legacy": per_game_analysis,
+            "set-based": database.compute_game_analysis_dataset,
+            "materialized": database.generate_game_analysis_dataset,
+        }
+        totals = dict.fromkeys(implementations, 0.0)
+        for team in NBA_TEAMS[:args.teams]:
+            results = {}
+            timings = []
+            for name, func in implementations.items():
+                elapsed, results[name] = time_call(func, team, repeat=args.repeat)
+                totals[name] += elapsed
+                timings.append(f"{name} {elapsed * 1000:8.2f} ms")
+            for name, result in results.items():
+                if result != results["legacy"]:
+                    raise SystemExit(f"Mismatch for {team}: {name} output differs from legacy")
+            print(f"{team}: {len(results['legacy']):4d} games  " + "  ".join(timings))
+
+        legacy_total = totals["legacy"]
+        print("total: " + ", ".join(
+            f"{name} {elapsed * 1000:.2f} ms ({legacy_total / elapsed:.1f}x)"
+            for name, elapsed in totals.items()
+        ))
+        database.close_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark the oracle publisher against the stand-in chain.
+
+Feeds random-walk prices for many slugs through three setups and reports
+updates/sec, transactions per update, suppressed prices and RPC requests:
+
+- naive: one transaction per price, nonce read and receipt awaited each time
+- batched: OraclePublisher without suppression (every price is published)
+- batched+filtered: OraclePublisher with the deviation/heartbeat filter
+
+Usage:
+    python benchmarks/bench_oracle.py
+    python benchmarks/bench_oracle.py --slugs 500 --cycles 20 --block-time 0.05
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_chain import start_stub_chain  # noqa: E402
+from oracle_publisher import (  # noqa: E402
+    DeviationFilter,
+    JsonRpcClient,
+    OraclePublisher,
+    encode_update_call,
+)
+
+CONTRACT = "0x" + "0a" * 20
+SENDER = "0x" + "5e" * 20
+
+
+def random_walk(slugs: int, cycles: int, step: float, seed: int) -> List[Dict[str, float]]:
+    """Price snapshots (0-100) per cycle for synthetic slugs."""
+    rng = random.Random(seed)
+    prices = {f"nba-bench-{i:04d}-2026-01-01": rng.uniform(20, 80) for i in range(slugs)}
+    snapshots = []
+    for _ in range(cycles):
+        for slug, price in prices.items():
+            prices[slug] = round(min(99.0, max(1.0, price + rng.gauss(0, step))), 2)
+        snapshots.append(dict(prices))
+    return snapshots
+
+
+def run_naive(url: str, snapshots: List[Dict[str, float]]) -> Dict[str, float]:
+    """Publish every price in its own transaction and wait for each receipt."""
+    rpc = JsonRpcClient(url)
+    started = time.perf_counter()
+    updates = 0
+    for snapshot in snapshots:
+        for slug, price in snapshot.items():
+            nonce = rpc.call("eth_getTransactionCount", [SENDER, "pending"])
+            tx_hash = rpc.call("eth_sendTransaction", [{
+                "from": SENDER, "to": CONTRACT, "nonce": nonce,
+                "data": encode_update_call([slug], [round(price * 100)]),
+            }])
+            while rpc.call("eth_getTransactionReceipt", [tx_hash]) is None:
+                time.sleep(0.001)
+            updates += 1
+    elapsed = time.perf_counter() - started
+    rpc.close()
+    return {"elapsed": elapsed, "updates": updates, "transactions": updates,
+            "suppressed": 0, "http_requests": rpc.http_requests}
+
+
+def run_publisher(url: str, snapshots: List[Dict[str, float]], update_filter: DeviationFilter,
+                  batch_size: int) -> Dict[str, float]:
+    """Publish snapshots with OraclePublisher, one cycle per snapshot."""
+    rpc = JsonRpcClient(url)
+    feed = iter(snapshots)
+    publisher = OraclePublisher(
+        rpc, lambda games, now: next(feed), contract=CONTRACT, sender=SENDER,
+        update_filter=update_filter, batch_size=batch_size
+    )
+    started = time.perf_counter()
+    for i in range(len(snapshots)):
+        publisher.run_cycle([], now=float(i * 60))
+    publisher.drain()
+    elapsed = time.perf_counter() - started
+    rpc.close()
+    stats = publisher.summary()
+    return {"elapsed": elapsed, "updates": stats["updates_submitted"], "transactions": stats["submissions"],
+            "suppressed": stats["suppressed"], "http_requests": stats["rpc_http_requests"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the oracle publisher")
+    parser.add_argument("--slugs", type=int, default=100, help="Games watched")
+    parser.add_argument("--cycles", type=int, default=10, help="Price snapshots published")
+    parser.add_argument("--step", type=float, default=0.4, help="Random-walk step (price points)")
+    parser.add_argument("--block-time", type=float, default=0.01, help="Seconds until receipts appear")
+    parser.add_argument("--batch-size", type=int, default=50, help="Updates per transaction")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed")
+    args = parser.parse_args()
+
+    snapshots = random_walk(args.slugs, args.cycles, args.step, args.seed)
+    prices = args.slugs * args.cycles
+    print(f"{args.slugs} slugs x {args.cycles} cycles = {prices} prices, block time {args.block_time}s")
+
+    runs = {
+        "naive": lambda url: run_naive(url, snapshots),
+        "batched": lambda url: run_publisher(url, snapshots, DeviationFilter(0.0, 0.0), args.batch_size),
+        "batched+filtered": lambda url: run_publisher(url, snapshots, DeviationFilter(), args.batch_size),
+    }
+    for name, run in runs.items():
+        chain = start_stub_chain(block_time=args.block_time)
+        result = run(chain.base_url)
+        chain.shutdown()
+        if chain.updates != result["updates"]:
+            raise SystemExit(f"{name}: chain applied {chain.updates} updates, publisher sent {result['updates']}")
+        updates = result["updates"]
+        print(
+            f"{name:17s} {updates:6d} updates in {result['elapsed']:7.2f}s "
+            f"({updates / result['elapsed']:9.1f}/s, {prices / result['elapsed']:9.1f} prices/s)  "
+            f"tx/update {result['transactions'] / max(updates, 1):.3f}  "
+            f"suppressed {result['suppressed'] / prices:6.1%}  rpc requests {result['http_requests']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
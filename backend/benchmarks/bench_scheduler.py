@@ -0,0 +1,117 @@
+"""
+Benchmark request volume of the poll scheduler on a simulated clock.
+
+Runs poll_scheduler.PollScheduler over a synthetic stretch of the season
+against an in-memory market (no network, real SQLite writes). The clock
+jumps straight to the next heap entry, so days of polling take seconds.
+The result is compared with a fixed cadence that polls every unsettled
+game at the hot-game interval.
+
+Usage:
+    python benchmarks/bench_scheduler.py
+    python benchmarks/bench_scheduler.py --games 120 --days 14
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+from benchmarks.stub_polymarket import stub_price  # noqa: E402
+from config import NBA_TEAMS  # noqa: E402
+from poll_scheduler import PollPlan, PollScheduler  # noqa: E402
+from polymarket_client import price_window  # noqa: E402
+
+SIMULATION_START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+class SimulatedMarkets:
+    """Duck-typed PolymarketClient serving points up to a simulated time."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.requests = 0
+
+    def resolve_markets(self, slugs: List[str]) -> Dict[str, Any]:
+        return {}
+
+    def get_token_id_from_slug(self, slug: str) -> str:
+        return f"sim-{slug}"
+
+    def get_price_history(self, token_id: str, game_time_iso: str, since_ts=None, fidelity: int = 1):
+        self.requests += 1
+        start, end = price_window(game_time_iso)
+        if since_ts is not None:
+            start = max(start, int(since_ts))
+        step = fidelity * 60
+        first = -(-start // step) * step
+        last = min(end, int(self.now))
+        return [{"t": t, "p": stub_price(token_id, t)} for t in range(first, last + 1, step)]
+
+
+def season(games: int, days: int) -> List[Dict[str, str]]:
+    """Games spread evenly over ``days`` starting two days into the simulation."""
+    schedule = []
+    for i in range(games):
+        start = SIMULATION_START + timedelta(days=2) + timedelta(seconds=i * days * 86400 // games)
+        away, home = NBA_TEAMS[i % len(NBA_TEAMS)], NBA_TEAMS[(i * 7 + 1) % len(NBA_TEAMS)]
+        schedule.append({"slug": f"nba-{away}-{home}-{start:%Y-%m-%d}-{i}", "start_iso": start.strftime("%Y-%m-%dT%H:%M:%SZ")})
+    return schedule
+
+
+def fixed_cadence_requests(games: List[Dict[str, str]], plan: PollPlan, begin: float, end: float) -> int:
+    """Requests made by polling every unsettled in-window game at the hot interval."""
+    requests = 0
+    now = begin
+    while now <= end:
+        for game in games:
+            window_start, window_end = price_window(game['start_iso'])
+            if window_start <= now <= window_end + plan.fidelity * 60:
+                requests += 1
+        now += plan.hot_interval
+    return requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark poll scheduler request volume")
+    parser.add_argument("--games", type=int, default=60, help="Games in the simulated stretch")
+    parser.add_argument("--days", type=int, default=7, help="Days the games are spread over")
+    args = parser.parse_args()
+
+    games = season(args.games, args.days)
+    markets = SimulatedMarkets()
+    plan = PollPlan()
+    begin = SIMULATION_START.timestamp()
+    markets.now = begin
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, "scheduler.db")
+        database.init_database()
+        scheduler = PollScheduler(games, client=markets, plan=plan, workers=1, clock=lambda: markets.now)
+        started = time.perf_counter()
+        rounds = 0
+        while scheduler.next_due() is not None or rounds == 0:
+            if rounds:
+                markets.now = scheduler.next_due()
+            scheduler.run_due(markets.now)
+            rounds += 1
+        elapsed = time.perf_counter() - started
+        scheduler.close()
+        stored = sum(state['complete'] for state in database.get_sync_state().values())
+        database.close_connections()
+
+    simulated_days = (markets.now - begin) / 86400
+    baseline = fixed_cadence_requests(games, plan, begin, markets.now)
+    print(f"{args.games} games over {simulated_days:.1f} simulated days ({rounds} rounds in {elapsed:.1f}s)")
+    print(f"polls by phase: {scheduler.polls}; points written {scheduler.points_written}; complete {stored}")
+    print(f"CLOB requests: scheduled {markets.requests}, fixed {plan.hot_interval:.0f}s cadence {baseline} "
+          f"({baseline / max(markets.requests, 1):.1f}x more)")
+
+
+if __name__ == "__main__":
+    main()
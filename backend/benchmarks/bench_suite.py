@@ -0,0 +1,279 @@
+"""
+Reproducible benchmark suite for every pipeline stage.
+
+Generates a synthetic season (see synthetic_season.py) and times:
+
+- generate:            building the season in memory
+- write_sqlite:        streaming it through DatabaseWriter
+- load_csv:            database.load_csv_to_database of the consolidated CSV
+- game_analysis:       database.generate_game_analysis_dataset for every team
+- backtest:            database.run_backtest
+- api:<route>:         each Flask endpoint, cold (response cache cleared) and warm
+- extract_stub:        main.run_concurrent_extraction against the stub server
+- extract_replay:      the same extraction replayed from recorded responses
+
+Every run appends one JSON line (stage timings, parameters, commit) to
+``benchmarks/results/bench_suite.jsonl``. It is then compared with the
+previous run that used the same parameters, and any stage slower by more
+than ``--threshold`` is reported (``--fail-on-regression`` exits 1).
+
+Usage:
+    python benchmarks/bench_suite.py
+    python benchmarks/bench_suite.py --teams 30 --fidelity-minutes 1 --only load_csv,game_analysis
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+from benchmarks.stub_polymarket import start_stub_server  # noqa: E402
+from benchmarks.synthetic_season import generate_season, record_responses, write_csv, write_sqlite  # noqa: E402
+from config import DEFAULT_TEAM, NBA_TEAMS  # noqa: E402
+from http_cache import MODE_REPLAY, ResponseCache  # noqa: E402
+from schedule import parse_slug  # noqa: E402
+
+RESULTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", "bench_suite.jsonl")
+
+
+def measure(func: Callable[[], Any], repeat: int, setup: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+    """Time ``func`` ``repeat`` times (``setup`` runs untimed before each)."""
+    runs = []
+    result = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        result = func()
+        runs.append(time.perf_counter() - started)
+    return {"best": min(runs), "median": statistics.median(runs), "runs": len(runs), "result": result}
+
+
+def api_urls(games: List[Dict[str, Any]], team: str) -> Dict[str, str]:
+    """One representative request per Flask route."""
+    ids = ",".join(str(i) for i in range(1, min(len(games), 50) + 1))
+    return {
+        "/": "/",
+        "/backtest": "/backtest",
+        "/api/games": f"/api/games?team={team}",
+        "/api/price-history/<int:game_id>": f"/api/price-history/1?team={team}",
+        "/api/price-history/<int:game_id>?max_points": f"/api/price-history/1?team={team}&max_points=200",
+        "/api/price-history": f"/api/price-history?ids={ids}&team={team}",
+        "/api/game-analysis": f"/api/game-analysis?team={team}",
+        "/api/backtest": f"/api/backtest?team={team}",
+        "/api/strategies": "/api/strategies",
+        "/api/backtest/sweep": f"/api/backtest/sweep?team={team}&bet_fractions=0.01:0.1:0.01&curves=0",
+        "/api/monte-carlo": f"/api/monte-carlo?team={team}&paths=20000&workers=1",
+        "/metrics": "/metrics",
+    }
+
+
+def git_commit() -> Optional[str]:
+    """Current commit of the working tree, if git is available."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def previous_run(path: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Latest stored run with the same parameters."""
+    if not os.path.exists(path):
+        return None
+    match = None
+    with open(path) as f:
+        for line in f:
+            try:
+                run = json.loads(line)
+            except ValueError:
+                continue
+            if run.get("params") == params:
+                match = run
+    return match
+
+
+def run_suite(args: argparse.Namespace, tmp: str) -> Dict[str, Dict[str, Any]]:
+    """Run the selected stages and return their timings."""
+    only = set(args.only.split(",")) if args.only else None
+    stages: Dict[str, Dict[str, Any]] = {}
+
+    def wanted(name: str) -> bool:
+        return only is None or any(name == item or name.startswith(item + ":") for item in only)
+
+    def record(name: str, timing: Dict[str, Any], items: Optional[int] = None, unit: str = "items"):
+        timing.pop("result", None)
+        entry = {"best_s": round(timing["best"], 6), "median_s": round(timing["median"], 6), "runs": timing["runs"]}
+        if items:
+            entry[f"{unit}_per_s"] = round(items / timing["best"], 1)
+        stages[name] = entry
+        rate = f"  {entry[f'{unit}_per_s']:>12,.0f} {unit}/s" if items else ""
+        print(f"{name:52s} best {timing['best'] * 1000:10.2f} ms  median {timing['median'] * 1000:10.2f} ms{rate}")
+
+    timing = measure(lambda: generate_season(args.teams, args.games_per_team, args.fidelity_minutes, args.seed), 1)
+    games = timing["result"]
+    points = sum(len(game['history']) for game in games)
+    print(f"season: {len(games)} games, {points} points at {args.fidelity_minutes}-minute fidelity")
+    if wanted("generate"):
+        record("generate", timing, points, "points")
+
+    csv_path = write_csv(games, tmp)
+    db_path = os.path.join(tmp, "suite.db")
+    database.DB_PATH = db_path
+
+    if wanted("write_sqlite"):
+        scratch = os.path.join(tmp, "write.db")
+        record("write_sqlite", measure(
+            lambda: write_sqlite(games, scratch), args.repeat,
+            setup=lambda: os.path.exists(scratch) and os.remove(scratch)
+        ), points, "points")
+
+    def fresh_load():
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+        database.close_connections()
+
+    timing = measure(lambda: database.load_csv_to_database(csv_path, db_path), args.repeat, setup=fresh_load)
+    if wanted("load_csv"):
+        record("load_csv", timing, points, "rows")
+
+    teams = NBA_TEAMS[:args.teams]
+    team = DEFAULT_TEAM if DEFAULT_TEAM in teams else teams[0]
+    if wanted("game_analysis"):
+        record("game_analysis", measure(
+            lambda: [database.generate_game_analysis_dataset(t) for t in teams], args.repeat
+        ), len(games) * 2, "rows")
+    if wanted("backtest"):
+        team_games = sum(team in (parse_slug(g['slug'])['first_team'], parse_slug(g['slug'])['second_team'])
+                         for g in games)
+        record("backtest", measure(lambda: database.run_backtest(team=team), args.repeat), team_games, "games")
+
+    if any(wanted(f"api:{route}") for route in api_urls(games, team)):
+        import web_server
+        client = web_server.app.test_client()
+        for route, url in api_urls(games, team).items():
+            if not wanted(f"api:{route}"):
+                continue
+
+            def get(url=url):
+                response = client.get(url, headers={"Accept-Encoding": "gzip"})
+                if response.status_code != 200:
+                    raise SystemExit(f"{url} returned {response.status_code}: {response.data[:200]!r}")
+                return response
+
+            record(f"api:{route}:cold", measure(get, args.repeat, setup=web_server.response_cache.clear))
+            record(f"api:{route}:warm", measure(get, args.repeat * 5))
+
+    if wanted("extract_stub") or wanted("extract_replay"):
+        import main
+        subset = games[:args.extract_games]
+        responses = os.path.join(tmp, "responses")
+        record_responses(subset, responses)
+        server = start_stub_server()
+        options = {"requests_per_second": 10000.0, "burst": 1000, "workers": 16}
+
+        def extract(**kwargs):
+            writer = database.DatabaseWriter(os.path.join(tmp, "extract.db"))
+            main.run_concurrent_extraction(subset, writers=[writer], **options, **kwargs)
+            return writer.points_inserted
+
+        def fresh_extract():
+            for suffix in ("", "-wal", "-shm"):
+                path = os.path.join(tmp, "extract.db" + suffix)
+                if os.path.exists(path):
+                    os.remove(path)
+
+        if wanted("extract_stub"):
+            record("extract_stub", measure(
+                lambda: extract(gamma_base=server.base_url, clob_base=server.base_url), args.repeat,
+                setup=fresh_extract
+            ), len(subset), "games")
+        if wanted("extract_replay"):
+            record("extract_replay", measure(
+                lambda: extract(response_cache=ResponseCache(responses, mode=MODE_REPLAY)), args.repeat,
+                setup=fresh_extract
+            ), len(subset), "games")
+        server.shutdown()
+
+    database.close_connections()
+    return stages
+
+
+def compare(stages: Dict[str, Dict[str, Any]], previous: Dict[str, Any], threshold: float) -> List[str]:
+    """Stages whose best time grew by more than ``threshold`` since ``previous``."""
+    regressions = []
+    for name, entry in stages.items():
+        before = previous["stages"].get(name)
+        if not before:
+            continue
+        change = entry["best_s"] / before["best_s"] - 1 if before["best_s"] else 0.0
+        marker = ""
+        if change > threshold:
+            marker = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:52s} {before['best_s'] * 1000:10.2f} ms -> {entry['best_s'] * 1000:10.2f} ms "
+              f"({change:+.1%}){marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage on a synthetic season")
+    parser.add_argument("--teams", type=int, default=len(NBA_TEAMS), help="Teams in the league")
+    parser.add_argument("--games-per-team", type=int, default=82, help="Games each team plays")
+    parser.add_argument("--fidelity-minutes", type=int, default=60, help="Minutes between price points")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage (best is compared)")
+    parser.add_argument("--extract-games", type=int, default=200, help="Games extracted from the stub server")
+    parser.add_argument("--only", help="Comma-separated stages (or 'api') to run")
+    parser.add_argument("--results", default=RESULTS_PATH, help="JSON-lines file of stored runs")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Slowdown reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit 1 if any stage regressed")
+    parser.add_argument("--no-store", action="store_true", help="Do not append this run to the results file")
+    args = parser.parse_args()
+
+    params = {
+        "teams": args.teams,
+        "games_per_team": args.games_per_team,
+        "fidelity_minutes": args.fidelity_minutes,
+        "seed": args.seed,
+        "extract_games": args.extract_games,
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        stages = run_suite(args, tmp)
+
+    run = {
+        "timestamp": datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.node(),
+        "params": params,
+        "stages": stages,
+    }
+    regressions = []
+    previous = previous_run(args.results, params)
+    if previous is not None:
+        print(f"\ncompared with {previous['timestamp']} ({previous.get('commit')}):")
+        regressions = compare(stages, previous, args.threshold)
+    if not args.no_store:
+        os.makedirs(os.path.dirname(os.path.abspath(args.results)), exist_ok=True)
+        with open(args.results, "a") as f:
+            f.write(json.dumps(run) + "\n")
+        print(f"\nstored results in {args.results}")
+    if regressions and args.fail_on_regression:
+        raise SystemExit(f"{len(regressions)} stage(s) regressed by more than {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Local JSON-RPC stand-in chain for the oracle publisher.
+
+Implements just enough of the Ethereum JSON-RPC API for
+``oracle_publisher.py``: ``eth_chainId``, ``eth_blockNumber``,
+``eth_getTransactionCount``, ``eth_sendTransaction`` and
+``eth_getTransactionReceipt``, including batch requests. Transactions
+must use the sender's next nonce, as a real node's pool would require
+(nonces that are too low are rejected, gaps are queued until filled).
+Calldata is decoded, so the stand-in can report how many price updates
+reached the chain. A transaction's receipt becomes available
+``block_time`` seconds after it is sent.
+
+Usage:
+    python benchmarks/stub_chain.py --port 8545 --block-time 1
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from oracle_publisher import decode_update_call  # noqa: E402
+
+CHAIN_ID = 31337
+
+
+class RpcError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+class StubChainHandler(BaseHTTPRequestHandler):
+    """Request handler for single and batched JSON-RPC calls."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        self.server.http_requests += 1
+        if isinstance(payload, list):
+            result = [self.server.handle(call) for call in payload]
+        else:
+            result = self.server.handle(payload)
+        body = json.dumps(result).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubChain(ThreadingHTTPServer):
+    """Threaded stand-in chain with update and request counters."""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], block_time: float = 0.0):
+        super().__init__(address, StubChainHandler)
+        self.block_time = block_time
+        self.http_requests = 0
+        self.transactions = 0
+        self.updates = 0
+        self.prices: Dict[str, int] = {}
+        self._nonces: Dict[str, int] = {}
+        self._queued: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        self._receipts: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def handle(self, call: Dict[str, Any]) -> Dict[str, Any]:
+        """Answer one JSON-RPC call."""
+        method = getattr(self, "rpc_" + call.get("method", ""), None)
+        try:
+            if method is None:
+                raise RpcError(-32601, "method not found")
+            with self._lock:
+                result = method(*call.get("params", []))
+            return {"jsonrpc": "2.0", "id": call.get("id"), "result": result}
+        except RpcError as e:
+            return {"jsonrpc": "2.0", "id": call.get("id"), "error": {"code": e.code, "message": str(e)}}
+
+    def rpc_eth_chainId(self) -> str:
+        return hex(CHAIN_ID)
+
+    def rpc_eth_blockNumber(self) -> str:
+        return hex(self.transactions)
+
+    def rpc_eth_getTransactionCount(self, address: str, block: str = "latest") -> str:
+        return hex(self._nonces.get(address.lower(), 0))
+
+    def rpc_eth_sendTransaction(self, tx: Dict[str, Any]) -> str:
+        sender = tx["from"].lower()
+        expected = self._nonces.get(sender, 0)
+        nonce = int(tx.get("nonce", hex(expected)), 16)
+        if nonce < expected:
+            raise RpcError(-32000, "nonce too low")
+        tx_hash = "0x" + hashlib.sha256(f"{sender}:{nonce}:{tx['data']}".encode("utf-8")).hexdigest()
+        self._queued[(sender, nonce)] = dict(tx, hash=tx_hash)
+        # Execute every transaction whose nonce is now next in line
+        while (sender, self._nonces.get(sender, 0)) in self._queued:
+            self._execute(self._queued.pop((sender, self._nonces.get(sender, 0))))
+            self._nonces[sender] = self._nonces.get(sender, 0) + 1
+        return tx_hash
+
+    def _execute(self, tx: Dict[str, Any]):
+        _, slugs, prices = decode_update_call(tx["data"])
+        self.prices.update(zip(slugs, prices))
+        self.transactions += 1
+        self.updates += len(slugs)
+        receipt = {
+            "transactionHash": tx["hash"],
+            "blockNumber": hex(self.transactions),
+            "status": "0x1",
+        }
+        self._receipts[tx["hash"]] = (time.monotonic() + self.block_time, receipt)
+
+    def rpc_eth_getTransactionReceipt(self, tx_hash: str):
+        mined_at, receipt = self._receipts.get(tx_hash, (None, None))
+        if mined_at is None or time.monotonic() < mined_at:
+            return None
+        return receipt
+
+
+def start_stub_chain(port: int = 0, block_time: float = 0.0, host: str = "127.0.0.1") -> StubChain:
+    """Start a stand-in chain on a background thread (port 0 picks a free port)."""
+    server = StubChain((host, port), block_time)
+    threading.Thread(target=server.serve_forever, name="stub-chain", daemon=True).start()
+    return server
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Serve a local JSON-RPC stand-in chain")
+    parser.add_argument("--port", type=int, default=8545)
+    parser.add_argument("--block-time", type=float, default=1.0, help="Seconds until receipts appear")
+    args = parser.parse_args(argv)
+
+    server = StubChain(("127.0.0.1", args.port), args.block_time)
+    print(f"serving stand-in chain {CHAIN_ID} on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Local stand-in for the Gamma and CLOB APIs.
+
+Serves ``/markets``, ``/markets/slug/<slug>`` and ``/prices-history``
+for any ``nba-xxx-yyy-date`` slug. Prices are a deterministic function of
+token and time, and only points up to the current time are returned.
+Repeated polls therefore see a live market that keeps growing, so the
+live poller and the extractor can run end to end without the network.
+
+Usage:
+    python benchmarks/stub_polymarket.py --port 8001 --games 4 --write-schedule live.json
+    python live_poller.py --schedule live.json --interval 5 \\
+        --gamma-base http://127.0.0.1:8001 --clob-base http://127.0.0.1:8001
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import NBA_TEAMS  # noqa: E402
+from schedule import save_league_schedule  # noqa: E402
+
+
+def stub_price(token_id: str, timestamp: int) -> float:
+    """Deterministic price (0-1) of a token at a time."""
+    phase = zlib.crc32(token_id.encode("utf-8")) % 6283 / 1000.0
+    price = 0.5 + 0.35 * math.sin(timestamp / 21600 + phase) + 0.03 * math.sin(timestamp / 1300 + 2 * phase)
+    return round(min(0.99, max(0.01, price)), 4)
+
+
+def stub_market(slug: str) -> Dict[str, Any]:
+    """Gamma market payload for a slug."""
+    return {
+        "id": str(zlib.crc32(slug.encode("utf-8"))),
+        "slug": slug,
+        "question": f"Who wins {slug}?",
+        "conditionId": f"0x{zlib.crc32(slug.encode('utf-8')):08x}",
+        # Gamma returns these as JSON-encoded strings
+        "clobTokenIds": json.dumps([f"stub-{slug}-yes", f"stub-{slug}-no"]),
+        "outcomes": json.dumps(["Yes", "No"]),
+        "closed": False,
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Request handler; counts requests per path on the server."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, payload: Any):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        self.server.count(url.path.split("/")[1] if "/" in url.path else url.path)
+
+        if url.path.startswith("/markets/slug/"):
+            self._send(200, stub_market(url.path[len("/markets/slug/"):]))
+        elif url.path == "/markets":
+            self._send(200, [stub_market(slug) for slug in query.get("slug", [])])
+        elif url.path == "/prices-history":
+            token_id = query["market"][0]
+            start = int(query["startTs"][0])
+            end = min(int(query["endTs"][0]), int(time.time()))
+            step = int(query.get("fidelity", ["60"])[0]) * 60
+            first = -(-start // step) * step
+            history = [{"t": t, "p": stub_price(token_id, t)} for t in range(first, end + 1, step)]
+            self._send(200, {"history": history})
+        else:
+            self._send(404, {"error": "not found"})
+
+
+class StubServer(ThreadingHTTPServer):
+    """Threaded stub server with per-path request counters."""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int]):
+        super().__init__(address, StubHandler)
+        self.requests: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def count(self, path: str):
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_stub_server(port: int = 0, host: str = "127.0.0.1") -> StubServer:
+    """Start a stub server on a background thread (port 0 picks a free port)."""
+    server = StubServer((host, port))
+    threading.Thread(target=server.serve_forever, name="stub-polymarket", daemon=True).start()
+    return server
+
+
+def live_schedule(games: int, now: Optional[float] = None, spacing_hours: float = 3.0) -> List[Dict[str, str]]:
+    """Games starting around now, so their price windows are open.
+
+    Args:
+        games: Number of games
+        now: Reference Unix time (defaults to the clock)
+        spacing_hours: Hours between consecutive tip-offs
+
+    Returns:
+        Schedule entries with 'slug' and 'start_iso'
+    """
+    now = time.time() if now is None else now
+    base = datetime.fromtimestamp(now, tz=timezone.utc).replace(minute=0, second=0, microsecond=0)
+    schedule = []
+    for i in range(games):
+        away, home = NBA_TEAMS[(2 * i) % len(NBA_TEAMS)], NBA_TEAMS[(2 * i + 1) % len(NBA_TEAMS)]
+        start = base + timedelta(hours=spacing_hours * (i - games // 2))
+        schedule.append({
+            "slug": f"nba-{away}-{home}-{start:%Y-%m-%d}",
+            "start_iso": start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        })
+    return schedule
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the Gamma and CLOB APIs")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--games", type=int, default=4, help="Games in the written live schedule")
+    parser.add_argument("--write-schedule", metavar="PATH", help="Write a schedule of games live now")
+    args = parser.parse_args()
+
+    if args.write_schedule:
+        save_league_schedule(live_schedule(args.games), args.write_schedule)
+        print(f"wrote {args.games} live games to {args.write_schedule}")
+    server = StubServer(("127.0.0.1", args.port))
+    print(f"serving stub Gamma/CLOB on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
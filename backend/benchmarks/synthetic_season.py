@@ -0,0 +1,329 @@
+"""
+Synthetic league seasons for benchmarks.
+
+Builds a season of ``teams x games_per_team`` games with a round-robin
+schedule and Polymarket-style ``nba-{away}-{home}-{date}`` slugs (visitor
+first). Each game gets a minute-to-hourly price series over its price
+window, quoted like real markets for the first team in the slug:
+
+- Team strengths and home advantage set the pre-game win probability.
+- Before tip-off, the price drifts around that probability.
+- During the game, it moves toward the drawn result with increasing
+  volatility.
+- Afterwards, it settles at 0.0005 or 0.9995, like real markets.
+
+The season can be written as:
+
+- the consolidated CSV (``price_history_all.csv``, the format
+  ``load_csv_to_database`` reads)
+- a SQLite database (through ``DatabaseWriter``)
+- recorded Gamma/CLOB responses for ``main.py --http-cache replay``
+
+Token IDs match ``stub_polymarket.stub_market``, so the same schedule also
+extracts against the stub server.
+
+Usage:
+    python benchmarks/synthetic_season.py --out /tmp/season --teams 30 --fidelity-minutes 1
+    python main.py --concurrent --http-cache replay --http-cache-dir /tmp/season/responses ...
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+from benchmarks.stub_polymarket import stub_market  # noqa: E402
+from config import (  # noqa: E402
+    CLOB_API_BASE,
+    CONSOLIDATED_FILENAME,
+    GAMMA_API_BASE,
+    GAMMA_BULK_BATCH_SIZE,
+    NBA_TEAMS,
+    PRICE_FIDELITY,
+)
+from http_cache import MODE_RECORD, ResponseCache  # noqa: E402
+from polymarket_client import price_window  # noqa: E402
+from schedule import save_league_schedule  # noqa: E402
+
+SEASON_START = datetime(2025, 10, 21, 23, 0, tzinfo=timezone.utc)
+SEASON_DAYS = 170
+GAME_HOURS = 2.5
+HOME_ADVANTAGE = 0.25  # Logit points
+SETTLED_PRICES = (0.0005, 0.9995)
+
+FORMATS = ("csv", "sqlite", "responses")
+
+
+def round_robin(teams: List[str], games_per_team: int) -> List[List[tuple]]:
+    """Rounds of (home, away) pairings until every team has its games.
+
+    Uses the circle method, so pairings repeat only after every team has
+    met every other; home and away swap on each pass.
+    """
+    players = list(teams) + ([None] if len(teams) % 2 else [])
+    played = dict.fromkeys(teams, 0)
+    rounds = []
+    n = len(players)
+    for r in range(games_per_team * n):
+        if all(count >= games_per_team for count in played.values()):
+            break
+        # Keep the first seat fixed and rotate the rest by one per round
+        rest = players[1:]
+        shift = len(rest) - r % len(rest)
+        order = [players[0]] + rest[shift:] + rest[:shift]
+        pairs = []
+        for i in range(n // 2):
+            a, b = order[i], order[n - 1 - i]
+            if a is None or b is None or played[a] >= games_per_team or played[b] >= games_per_team:
+                continue
+            # Alternate home court by pass and by seat
+            home, away = (a, b) if (r // (n - 1) + i) % 2 == 0 else (b, a)
+            pairs.append((home, away))
+            played[a] += 1
+            played[b] += 1
+        if pairs:
+            rounds.append(pairs)
+    return rounds
+
+
+def price_path(
+    rng: np.random.Generator,
+    timestamps: np.ndarray,
+    tip_off: int,
+    p_win: float,
+    wins: bool
+) -> np.ndarray:
+    """Price (0-1) of a team with pre-game win probability ``p_win`` at each timestamp."""
+    logit0 = np.log(p_win / (1 - p_win))
+    target = 6.0 if wins else -6.0
+    game_end = tip_off + GAME_HOURS * 3600
+    dt_hours = np.diff(timestamps, prepend=timestamps[0]) / 3600.0
+
+    pre = timestamps < tip_off
+    live = (timestamps >= tip_off) & (timestamps < game_end)
+    # Pre-game: mean-reverting walk around the opening line
+    shocks = rng.normal(0.0, 1.0, len(timestamps)) * np.sqrt(dt_hours)
+    logits = np.empty(len(timestamps))
+    value = logit0
+    for i in np.flatnonzero(pre):
+        value += 0.05 * (logit0 - value) * dt_hours[i] + 0.04 * shocks[i]
+        logits[i] = value
+    # In-game: Brownian bridge to the result, volatility rising toward the end
+    live_idx = np.flatnonzero(live)
+    if len(live_idx):
+        progress = (timestamps[live_idx] - tip_off) / (game_end - tip_off)
+        noise = np.cumsum(shocks[live_idx] * (0.6 + 1.2 * progress))
+        noise -= progress * noise[-1]
+        logits[live_idx] = value + (target - value) * progress ** 1.5 + noise
+    prices = 1.0 / (1.0 + np.exp(-logits))
+    prices[timestamps >= game_end] = SETTLED_PRICES[1] if wins else SETTLED_PRICES[0]
+    return np.clip(np.round(prices, 4), 0.0005, 0.9995)
+
+
+def generate_season(
+    teams: int = len(NBA_TEAMS),
+    games_per_team: int = 82,
+    fidelity_minutes: int = PRICE_FIDELITY,
+    seed: int = 7,
+    start: datetime = SEASON_START
+) -> List[Dict[str, Any]]:
+    """Generate a synthetic season.
+
+    Args:
+        teams: Number of teams (first ``teams`` of NBA_TEAMS)
+        games_per_team: Games each team plays
+        fidelity_minutes: Minutes between price points
+        seed: Random seed
+        start: First tip-off
+
+    Returns:
+        Games with 'slug', 'start_iso', 'token_id', 'home_wins' and
+        'history' (list of {'t', 'p'} with prices 0-1)
+    """
+    if not 2 <= teams <= len(NBA_TEAMS):
+        raise ValueError(f"teams must be between 2 and {len(NBA_TEAMS)}")
+    rng = np.random.default_rng(seed)
+    names = NBA_TEAMS[:teams]
+    strength = dict(zip(names, rng.normal(0.0, 0.8, teams)))
+    rounds = round_robin(names, games_per_team)
+    step = fidelity_minutes * 60
+    days = max(SEASON_DAYS, len(rounds))
+
+    games = []
+    for r, pairs in enumerate(rounds):
+        day = start + timedelta(days=r * days // len(rounds))
+        for i, (home, away) in enumerate(pairs):
+            tip = day + timedelta(minutes=30 * (i % 4))
+            start_iso = tip.strftime('%Y-%m-%dT%H:%M:%SZ')
+            slug = f"nba-{away}-{home}-{tip:%Y-%m-%d}"
+            p_home = 1.0 / (1.0 + np.exp(-(strength[home] - strength[away] + HOME_ADVANTAGE)))
+            home_wins = bool(rng.random() < p_home)
+
+            window_start, window_end = price_window(start_iso)
+            first = -(-window_start // step) * step
+            timestamps = np.arange(first, window_end + 1, step, dtype=np.int64)
+            # Markets quote the visitor, the first team in the slug
+            prices = price_path(rng, timestamps, int(tip.timestamp()), float(1.0 - p_home), not home_wins)
+            games.append({
+                "slug": slug,
+                "start_iso": start_iso,
+                "token_id": json.loads(stub_market(slug)["clobTokenIds"])[0],
+                "home_wins": home_wins,
+                "fidelity_minutes": fidelity_minutes,
+                "history": [{"t": int(t), "p": float(p)} for t, p in zip(timestamps, prices)],
+            })
+    return games
+
+
+def write_csv(games: List[Dict[str, Any]], output_dir: str) -> str:
+    """Write the season as the consolidated price history CSV."""
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, CONSOLIDATED_FILENAME)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['game_date', 'slug', 'game_start_utc', 'token_id', 'timestamp_utc', 'price',
+                         'fidelity_minutes'])
+        for game in games:
+            prefix = [game['start_iso'][:10], game['slug'], game['start_iso'], game['token_id']]
+            for entry in game['history']:
+                writer.writerow(prefix + [
+                    datetime.fromtimestamp(entry['t'], tz=timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),
+                    round(entry['p'] * 100, 2),
+                    game['fidelity_minutes'],
+                ])
+    return path
+
+
+def write_sqlite(games: List[Dict[str, Any]], db_path: str) -> int:
+    """Write the season into a SQLite database; returns points written."""
+    writer = database.DatabaseWriter(db_path, fidelity_minutes=games[0]['fidelity_minutes'] if games else PRICE_FIDELITY)
+    for game in games:
+        writer.write_game(
+            slug=game['slug'],
+            game_date=game['start_iso'][:10],
+            game_start_iso=game['start_iso'],
+            token_id=game['token_id'],
+            history=game['history'],
+            complete=True
+        )
+    writer.close()
+    return writer.points_inserted
+
+
+def _json_response(url: str, payload: Any) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps(payload).encode("utf-8")
+    response.encoding = "utf-8"
+    response.url = url
+    response.headers["Content-Type"] = "application/json"
+    return response
+
+
+def record_responses(
+    games: List[Dict[str, Any]],
+    cache_dir: str,
+    gamma_base: str = GAMMA_API_BASE,
+    clob_base: str = CLOB_API_BASE,
+    bulk_batch_size: int = GAMMA_BULK_BATCH_SIZE
+) -> int:
+    """Record the Gamma and CLOB responses an extraction of the season makes.
+
+    Covers single-slug and bulk (schedule order) Gamma lookups and full
+    price-window CLOB requests. History is recorded at the season
+    fidelity and, when that is finer, subsampled at PRICE_FIDELITY (the
+    fidelity ``main.py`` requests).
+
+    Returns:
+        Number of responses recorded
+    """
+    cache = ResponseCache(cache_dir, mode=MODE_RECORD)
+    recorded = 0
+    for game in games:
+        url = f"{gamma_base}/markets/slug/{game['slug']}"
+        cache.put(url, None, _json_response(url, stub_market(game['slug'])), None)
+        recorded += 1
+
+        window_start, window_end = price_window(game['start_iso'])
+        fidelity = game['fidelity_minutes']
+        url = f"{clob_base}/prices-history"
+        for requested in sorted({fidelity, PRICE_FIDELITY}):
+            if requested < fidelity or requested % fidelity:
+                continue
+            history = game['history'][::requested // fidelity]
+            params = {"market": game['token_id'], "startTs": window_start, "endTs": window_end,
+                      "fidelity": requested}
+            cache.put(url, params, _json_response(url, {"history": history}), None)
+            recorded += 1
+
+    url = f"{gamma_base}/markets"
+    for i in range(0, len(games), bulk_batch_size):
+        batch = [game['slug'] for game in games[i:i + bulk_batch_size]]
+        params = [("slug", slug) for slug in batch] + [("limit", len(batch))]
+        cache.put(url, params, _json_response(url, [stub_market(slug) for slug in batch]), None)
+        recorded += 1
+    return recorded
+
+
+def write_season(
+    games: List[Dict[str, Any]],
+    output_dir: str,
+    formats=FORMATS
+) -> Dict[str, Any]:
+    """Write a generated season in the requested formats.
+
+    Args:
+        games: Output of generate_season
+        output_dir: Directory receiving schedule.json, the CSV, season.db
+            and responses/
+        formats: Any of 'csv', 'sqlite', 'responses'
+
+    Returns:
+        Paths and counts of what was written
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    written: Dict[str, Any] = {
+        "schedule": save_league_schedule(games, os.path.join(output_dir, "schedule.json")),
+        "games": len(games),
+        "points": sum(len(game['history']) for game in games),
+    }
+    if "csv" in formats:
+        written["csv"] = write_csv(games, output_dir)
+    if "sqlite" in formats:
+        written["sqlite"] = os.path.join(output_dir, "season.db")
+        write_sqlite(games, written["sqlite"])
+    if "responses" in formats:
+        written["responses"] = os.path.join(output_dir, "responses")
+        written["responses_recorded"] = record_responses(games, written["responses"])
+    return written
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic league season")
+    parser.add_argument("--out", required=True, help="Output directory")
+    parser.add_argument("--teams", type=int, default=len(NBA_TEAMS), help="Teams in the league")
+    parser.add_argument("--games-per-team", type=int, default=82, help="Games each team plays")
+    parser.add_argument("--fidelity-minutes", type=int, default=PRICE_FIDELITY, help="Minutes between points")
+    parser.add_argument("--format", action="append", choices=FORMATS,
+                        help="Output to write (repeatable, default: all)")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    games = generate_season(args.teams, args.games_per_team, args.fidelity_minutes, args.seed)
+    written = write_season(games, args.out, args.format or FORMATS)
+    print(json.dumps(written, indent=2))
+    print(f"generated in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
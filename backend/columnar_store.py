@@ -0,0 +1,255 @@
+"""
+Columnar storage for consolidated price history.
+
+Each partition (one game date, or one team) is a compressed NumPy ``.npz``
+file. Per-game values (slug, game start, token ID, fidelity) are stored
+once in a small dictionary; per-point values are stored as columns:
+
+- ``game_index``: int32 index into the game dictionary
+- ``timestamp``: int64 Unix epoch seconds
+- ``price``: float32 price as a percentage (0-100)
+
+Writes are upserts keyed by (slug, timestamp), so re-running an extraction
+never duplicates rows. Reads prune partitions by name and check the game
+dictionary before loading any point columns.
+"""
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from config import COLUMNAR_DIR
+from schedule import parse_slug
+
+logger = logging.getLogger(__name__)
+
+PARTITION_BY_DATE = "date"
+PARTITION_BY_TEAM = "team"
+
+COLUMNS = ("slug", "game_start_ts", "token_id", "fidelity_minutes", "timestamp", "price")
+
+
+def _empty_result() -> Dict[str, np.ndarray]:
+    return {
+        "slug": np.array([], dtype=str),
+        "game_start_ts": np.array([], dtype=np.int64),
+        "token_id": np.array([], dtype=str),
+        "fidelity_minutes": np.array([], dtype=np.int32),
+        "timestamp": np.array([], dtype=np.int64),
+        "price": np.array([], dtype=np.float32),
+    }
+
+
+class ColumnarHistoryStore:
+    """Partitioned, compressed columnar store for consolidated price history."""
+
+    def __init__(self, root_dir: str = COLUMNAR_DIR, partition_by: str = PARTITION_BY_DATE):
+        """Initialize the columnar store.
+
+        Args:
+            root_dir: Directory holding partition files
+            partition_by: 'date' (game date) or 'team' (first team in the slug)
+        """
+        if partition_by not in (PARTITION_BY_DATE, PARTITION_BY_TEAM):
+            raise ValueError(f"Unsupported partitioning: {partition_by}")
+        self.root_dir = root_dir
+        self.partition_by = partition_by
+        self._lock = threading.Lock()
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def _partition_name(self, slug: str, game_date: str) -> str:
+        if self.partition_by == PARTITION_BY_DATE:
+            return f"game_date={game_date}"
+        return f"team={parse_slug(slug)['first_team']}"
+
+    def _partition_path(self, name: str) -> str:
+        return os.path.join(self.root_dir, f"{name}.npz")
+
+    def partitions(self) -> List[str]:
+        """List partition names in sorted order."""
+        return sorted(
+            name[:-4] for name in os.listdir(self.root_dir)
+            if name.endswith(".npz") and "=" in name
+        )
+
+    @staticmethod
+    def _load(path: str) -> Optional[Dict[str, np.ndarray]]:
+        if not os.path.exists(path):
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            return {key: data[key] for key in data.files}
+
+    def _save(self, path: str, columns: Dict[str, np.ndarray]):
+        fd, tmp_path = tempfile.mkstemp(dir=self.root_dir, suffix=".npz.tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.savez_compressed(f, **columns)
+        os.replace(tmp_path, path)
+
+    def upsert(
+        self,
+        slug: str,
+        game_date: str,
+        game_start_iso: str,
+        token_id: str,
+        history: List[Dict[str, Any]],
+        fidelity_minutes: int
+    ) -> str:
+        """Insert or update one game's price points.
+
+        Args:
+            slug: Market slug identifier
+            game_date: Game date string (YYYY-MM-DD)
+            game_start_iso: Game start time in ISO format (UTC)
+            token_id: Market token ID
+            history: List of price history entries with 't' and 'p' keys
+            fidelity_minutes: Price fidelity the history was fetched at
+
+        Returns:
+            Path to the partition file
+        """
+        path = self._partition_path(self._partition_name(slug, game_date))
+        game_start_ts = int(datetime.fromisoformat(game_start_iso.replace('Z', '+00:00')).timestamp())
+        new_ts = np.fromiter((int(e['t']) for e in history), dtype=np.int64, count=len(history))
+        new_price = np.fromiter(
+            (round(float(e['p']) * 100, 2) for e in history), dtype=np.float32, count=len(history)
+        )
+
+        with self._lock:
+            existing = self._load(path)
+            if existing is None:
+                slugs = np.array([slug])
+                game_starts = np.array([game_start_ts], dtype=np.int64)
+                token_ids = np.array([token_id])
+                fidelities = np.array([fidelity_minutes], dtype=np.int32)
+                game_index = np.empty(0, dtype=np.int32)
+                timestamps = np.empty(0, dtype=np.int64)
+                prices = np.empty(0, dtype=np.float32)
+            else:
+                slugs = existing["slugs"]
+                game_starts = existing["game_starts"]
+                token_ids = existing["token_ids"]
+                fidelities = existing["fidelities"]
+                game_index = existing["game_index"]
+                timestamps = existing["timestamp"]
+                prices = existing["price"]
+
+            matches = np.flatnonzero(slugs == slug)
+            if matches.size:
+                idx = int(matches[0])
+                game_starts[idx] = game_start_ts
+                token_ids = token_ids.astype(np.result_type(token_ids, np.array([token_id])))
+                token_ids[idx] = token_id
+                fidelities[idx] = fidelity_minutes
+            else:
+                idx = len(slugs)
+                slugs = np.append(slugs, slug)
+                game_starts = np.append(game_starts, game_start_ts)
+                token_ids = np.append(token_ids, token_id)
+                fidelities = np.append(fidelities, np.int32(fidelity_minutes))
+
+            # New points win over stored points with the same timestamp
+            all_index = np.concatenate([game_index, np.full(new_ts.size, idx, dtype=np.int32)])
+            all_ts = np.concatenate([timestamps, new_ts])
+            all_price = np.concatenate([prices, new_price])
+            order = np.lexsort((np.arange(all_ts.size)[::-1], all_ts, all_index))
+            all_index, all_ts, all_price = all_index[order], all_ts[order], all_price[order]
+            keep = np.ones(all_ts.size, dtype=bool)
+            keep[1:] = (all_index[1:] != all_index[:-1]) | (all_ts[1:] != all_ts[:-1])
+
+            self._save(path, {
+                "slugs": slugs,
+                "game_starts": game_starts,
+                "token_ids": token_ids,
+                "fidelities": fidelities,
+                "game_index": all_index[keep],
+                "timestamp": all_ts[keep],
+                "price": all_price[keep],
+            })
+
+        logger.info("Upserted columnar history", extra={"file": path, "points": len(history)})
+        return path
+
+    def read(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        team: Optional[str] = None,
+        slugs: Optional[Iterable[str]] = None,
+        start_ts: Optional[int] = None,
+        end_ts: Optional[int] = None
+    ) -> Dict[str, np.ndarray]:
+        """Read price points matching the given predicates.
+
+        Date predicates prune date partitions by file name. Slug, team and
+        (for team partitions) date predicates are then checked against each
+        partition's small game dictionary, and point columns are only
+        loaded for partitions with matching games.
+
+        Args:
+            start_date: Earliest game date (YYYY-MM-DD), inclusive
+            end_date: Latest game date (YYYY-MM-DD), inclusive
+            team: Only games this team plays in
+            slugs: Only these market slugs
+            start_ts: Earliest point timestamp (Unix seconds), inclusive
+            end_ts: Latest point timestamp (Unix seconds), inclusive
+
+        Returns:
+            Mapping of column name to array, one element per point, sorted
+            by partition, game and timestamp
+        """
+        wanted_slugs = set(slugs) if slugs is not None else None
+        team = team.lower() if team else None
+        parts = []
+
+        for name in self.partitions():
+            key, _, value = name.partition("=")
+            if key == "game_date":
+                if (start_date and value < start_date) or (end_date and value > end_date):
+                    continue
+
+            with np.load(self._partition_path(name), allow_pickle=False) as data:
+                dict_slugs = data["slugs"]
+                selected = np.ones(dict_slugs.size, dtype=bool)
+                if wanted_slugs is not None:
+                    selected &= np.isin(dict_slugs, list(wanted_slugs))
+                if team:
+                    selected &= np.array([
+                        team in (parse_slug(s)["first_team"], parse_slug(s)["second_team"])
+                        for s in dict_slugs
+                    ], dtype=bool)
+                if key == "team" and (start_date or end_date):
+                    dates = np.array([parse_slug(s)["date"] or "" for s in dict_slugs])
+                    if start_date:
+                        selected &= dates >= start_date
+                    if end_date:
+                        selected &= dates <= end_date
+                if not selected.any():
+                    continue
+
+                game_index = data["game_index"]
+                timestamps = data["timestamp"]
+                mask = selected[game_index]
+                if start_ts is not None:
+                    mask &= timestamps >= start_ts
+                if end_ts is not None:
+                    mask &= timestamps <= end_ts
+                if not mask.any():
+                    continue
+
+                rows = game_index[mask]
+                parts.append({
+                    "slug": dict_slugs[rows],
+                    "game_start_ts": data["game_starts"][rows],
+                    "token_id": data["token_ids"][rows],
+                    "fidelity_minutes": data["fidelities"][rows],
+                    "timestamp": timestamps[mask],
+                    "price": data["price"][mask],
+                })
+
+        if not parts:
+            return _empty_result()
+        return {column: np.concatenate([p[column] for p in parts]) for column in COLUMNS}
@@ -16,6 +16,97 @@ PRICE_FIDELITY = 60  # Hourly resolution
 # File Settings
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "price_history")
 CONSOLIDATED_FILENAME = "price_history_all.csv"
+CONSOLIDATED_FORMAT = "csv"  # "csv" or "columnar"
+COLUMNAR_SUBDIR = "columnar"  # Inside the output directory
+COLUMNAR_DIR = os.path.join(OUTPUT_DIR, COLUMNAR_SUBDIR)
+COLUMNAR_PARTITION_BY = "date"  # "date" or "team"
+CACHE_DIR = os.path.join(os.path.dirname(__file__), "cache")
+MARKET_CACHE_PATH = os.path.join(CACHE_DIR, "markets.db")
+HTTP_CACHE_DIR = os.path.join(CACHE_DIR, "http")
+
+# Database
+DB_PATH = os.environ.get(
+    "TEAM_TOKENS_DB_PATH", os.path.join(os.path.dirname(__file__), "price_history.db")
+)
+DB_STATEMENT_CACHE_SIZE = 256  # Compiled statements kept per reused connection
+DB_WRITER_BATCH_POINTS = 5000  # Pending points that trigger a commit
+DB_WRITER_FLUSH_SECONDS = 2.0  # Max delay before fetched data is queryable
+BULK_LOAD_BATCH_ROWS = 10000  # CSV rows buffered per executemany during bulk loads
+BULK_LOAD_CACHE_KIB = 65536  # SQLite page cache size during bulk loads
+
+# Backtesting
+BACKTEST_INITIAL_CAPITAL = 10000.0
+BACKTEST_BET_PERCENTAGE = 0.02  # Fraction of bankroll bet on each game
+BACKTEST_MAX_GRID_POINTS = 100000  # Largest parameter sweep accepted by the API
+BACKTEST_SWEEP_CHUNK = 8192  # Grid points evaluated per vectorized batch
+BACKTEST_SWEEP_MAX_CURVES = 20  # Most equity curves (best grid points) a sweep returns
+
+# Monte Carlo Risk Analysis
+MONTE_CARLO_PATHS = 100000  # Default number of simulated seasons
+MONTE_CARLO_MAX_PATHS = 2000000  # Largest simulation run_simulation accepts
+MONTE_CARLO_API_MAX_PATHS = 200000  # Largest simulation one /api/monte-carlo request may run
+MONTE_CARLO_BATCH_PATHS = 10000  # Paths simulated per worker task
+MONTE_CARLO_WORKERS = os.cpu_count() or 1
+MONTE_CARLO_RUIN_FRACTION = 0.5  # NAV at or below this share of capital counts as ruin
+MONTE_CARLO_NAV_RANGE = (0.01, 100.0)  # Histogram range for NAV, as multiples of capital
+MONTE_CARLO_HISTOGRAM_BINS = 2000  # Bins per histogram used for streaming percentiles
+
+# Web Server
+API_PRICE_HISTORY_MAX_GAMES = 2000  # Most games per batch price-history request
+API_MAX_CHART_POINTS = 10000  # Largest max_points accepted for chart downsampling
+
+# Chart Downsampling (LTTB)
+DOWNSAMPLE_LEVEL_FACTOR = 4  # Each precomputed level keeps 1/4 of the previous one
+DOWNSAMPLE_MIN_LEVEL_POINTS = 250  # Coarsest precomputed level
+DOWNSAMPLE_CACHE_GAMES = 128  # Games whose levels are kept in memory
+
+# Live Updates (poller + Server-Sent Events)
+LIVE_POLL_INTERVAL_SECONDS = 15.0  # Delay between polls of the games in their window
+LIVE_POLL_FIDELITY = 1  # Minutes between points fetched while polling
+LIVE_EVENT_BUFFER = 1000  # Recent events kept for reconnecting clients (Last-Event-ID)
+LIVE_SSE_HEARTBEAT_SECONDS = 15.0  # Keep-alive comment interval on idle streams
+
+# Poll Scheduler (game-window-aware polling, see poll_scheduler.py)
+SCHEDULER_HOT_HOURS_BEFORE = 3  # A game turns hot this long before tip-off...
+SCHEDULER_HOT_HOURS_AFTER = 4  # ...and stays hot this long after it
+SCHEDULER_HOT_INTERVAL_SECONDS = 60.0  # Polls of hot (near tip-off or live) games
+SCHEDULER_WINDOW_INTERVAL_SECONDS = 900.0  # Polls of other games inside their price window
+SCHEDULER_PREWINDOW_INTERVAL_SECONDS = 6 * 3600.0  # Market checks before the window opens
+SCHEDULER_FIDELITY = 1  # Minutes between fetched points
+SCHEDULER_WORKERS = 4  # Concurrent fetches of due games
+SCHEDULER_RETRY_BASE_SECONDS = 60.0  # Delay before re-polling after a failed fetch...
+SCHEDULER_RETRY_MAX_SECONDS = 3600.0  # ...doubling per consecutive failure up to this
+
+# Oracle Publisher (Sports Oracle contract, see contracts/SPEC.md)
+ORACLE_RPC_URL = os.environ.get("TEAM_TOKENS_ORACLE_RPC_URL", "http://127.0.0.1:8545")
+ORACLE_CONTRACT_ADDRESS = os.environ.get("TEAM_TOKENS_ORACLE_CONTRACT", "")
+ORACLE_SENDER_ADDRESS = os.environ.get("TEAM_TOKENS_ORACLE_SENDER", "")
+ORACLE_UPDATE_SIGNATURE = "updatePrices(string[],uint256[])"
+ORACLE_PRICE_SCALE = 10000  # On-chain units per 100% (basis points)
+ORACLE_DEVIATION_THRESHOLD = 0.5  # Smallest price move (percentage points) worth publishing
+ORACLE_HEARTBEAT_SECONDS = 3600  # Republish unchanged prices this often
+ORACLE_BATCH_SIZE = 50  # Slug -> price updates per transaction
+ORACLE_MAX_IN_FLIGHT = 8  # Unconfirmed transactions before submissions wait
+ORACLE_TX_TIMEOUT_SECONDS = 600.0  # Give up on a transaction without a receipt (dropped or replaced)
+ORACLE_POLL_INTERVAL_SECONDS = 30.0
+ORACLE_PRICE_WORKERS = 8  # Concurrent CLOB price requests
+
+# Web Server Response Cache (keyed on the database data version)
+RESPONSE_CACHE_MAX_ENTRIES = 512
+RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Total cached body size, compressed variants included
+RESPONSE_COMPRESS_MIN_BYTES = 1024  # Smaller responses are sent uncompressed
+RESPONSE_GZIP_LEVEL = 6
+RESPONSE_BROTLI_QUALITY = 5  # Used when the optional brotli package is installed
+
+# Metrics (Prometheus text format on /metrics, dumped after main.py runs)
+METRICS_ENABLED = os.environ.get("TEAM_TOKENS_METRICS", "1") != "0"
+METRICS_DUMP_PATH = os.path.join(OUTPUT_DIR, "metrics.prom")
+
+# Request Profiling (opt-in per request, see profiling.py)
+PROFILE_TOKEN = os.environ.get("TEAM_TOKENS_PROFILE_TOKEN", "")  # Empty disables profiling entirely
+PROFILE_DIR = os.path.join(CACHE_DIR, "profiles")
+PROFILE_SAMPLE_INTERVAL_SECONDS = 0.001  # Stack sampling period in sample mode
+PROFILE_TOP_FUNCTIONS = 40  # Functions listed in inline cProfile output
 
 # Logging
 LOG_LEVEL = logging.DEBUG
@@ -24,6 +115,41 @@ LOG_FORMAT = "%(asctime)s | %(levelname)s | %(message)s"
 # Rate Limiting
 REQUEST_DELAY_SECONDS = 1
 
+# Concurrent Extraction
+EXTRACTION_WORKERS = 8  # Worker threads fetching games in parallel
+EXTRACTION_MAX_IN_FLIGHT = 16  # Games submitted but not yet written
+RATE_LIMIT_REQUESTS_PER_SECOND = 5.0  # Shared across all workers
+RATE_LIMIT_BURST = 5  # Token-bucket capacity
+
+# HTTP Client
+HTTP_POOL_SIZE = 32  # Keep-alive connections per host
+HTTP_MAX_RETRIES = 4  # Retries for transient failures (429, 5xx, timeouts)
+HTTP_BACKOFF_BASE_SECONDS = 0.5
+HTTP_BACKOFF_MAX_SECONDS = 30.0  # Also caps honored Retry-After values
+HTTP_RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = 5  # Consecutive failures before opening
+CIRCUIT_BREAKER_RESET_SECONDS = 30.0
+GAMMA_BULK_BATCH_SIZE = 50  # Slugs per bulk /markets request
+
+# HTTP Response Cache ("off", "record" or "replay")
+HTTP_CACHE_MODE = os.environ.get("TEAM_TOKENS_HTTP_CACHE", "off")
+GAMMA_CACHE_TTL_SECONDS = 7 * 24 * 3600  # Market metadata rarely changes
+CLOB_OPEN_WINDOW_CACHE_TTL_SECONDS = 300  # Closed windows never expire
+
+# League Schedule
+# Team abbreviations as they appear in Polymarket game slugs
+NBA_TEAMS = [
+    "atl", "bos", "bkn", "cha", "chi", "cle", "dal", "den", "det", "gsw",
+    "hou", "ind", "lac", "lal", "mem", "mia", "mil", "min", "nop", "nyk",
+    "okc", "orl", "phi", "phx", "por", "sac", "sas", "tor", "uta", "was",
+]
+DEFAULT_TEAM = "phi"  # Perspective used when none is requested
+LEAGUE_SCHEDULE_PATH = os.path.join(os.path.dirname(__file__), "schedules", "nba_2025_26.json")
+# NBA's public league schedule feed; `python schedule.py` turns it into LEAGUE_SCHEDULE_PATH
+NBA_SCHEDULE_URL = "https://cdn.nba.com/static/json/staticData/scheduleLeagueV2.json"
+NBA_SEASON = "2025-26"
+NBA_REGULAR_SEASON_GAMES = 82  # Games per team, checked when building the schedule
+
 # Verified 2025-26 Philadelphia 76ers Regular Season Schedule
 # Sources: NBA.com, Basketball-Reference, CBS Sports
 SIXERS_GAMES = [
@@ -110,3 +236,8 @@ SIXERS_GAMES = [
     {"slug": "nba-phi-ind-2026-04-10", "start_iso": "2026-04-10T23:30:00Z"},
     {"slug": "nba-mil-phi-2026-04-12", "start_iso": "2026-04-12T22:00:00Z"},
 ]
+
+# Per-team schedules merged by schedule.build_league_schedule() when called without arguments
+TEAM_SCHEDULES = {
+    "phi": SIXERS_GAMES,
+}
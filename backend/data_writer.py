@@ -4,10 +4,19 @@ Data writing utilities for price history extraction.
 import csv
 import os
 import logging
+import time
 from datetime import datetime
 from typing import List, Dict, Any
 
-from config import OUTPUT_DIR, CONSOLIDATED_FILENAME, PRICE_FIDELITY
+from config import (
+    OUTPUT_DIR,
+    CONSOLIDATED_FILENAME,
+    CONSOLIDATED_FORMAT,
+    COLUMNAR_SUBDIR,
+    COLUMNAR_PARTITION_BY,
+    PRICE_FIDELITY,
+)
+import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -15,14 +24,33 @@ logger = logging.getLogger(__name__)
 class PriceHistoryWriter:
     """Handles writing price history data to CSV files."""
 
-    def __init__(self, output_dir: str = OUTPUT_DIR):
+    def __init__(
+        self,
+        output_dir: str = OUTPUT_DIR,
+        consolidated_format: str = CONSOLIDATED_FORMAT,
+        partition_by: str = COLUMNAR_PARTITION_BY
+    ):
         """Initialize the price history writer.
         
         Args:
             output_dir: Directory to write CSV files to
+            consolidated_format: 'csv' to append to the consolidated CSV, or
+                'columnar' to upsert into the partitioned columnar store
+            partition_by: Columnar partitioning, 'date' or 'team'
         """
+        if consolidated_format not in ("csv", "columnar"):
+            raise ValueError(f"Unsupported consolidated format: {consolidated_format}")
         self.output_dir = output_dir
+        self.consolidated_format = consolidated_format
         os.makedirs(self.output_dir, exist_ok=True)
+        
+        self.columnar_store = None
+        if consolidated_format == "columnar":
+            # Imported lazily so CSV-only runs do not need NumPy
+            from columnar_store import ColumnarHistoryStore
+            self.columnar_store = ColumnarHistoryStore(
+                os.path.join(output_dir, COLUMNAR_SUBDIR), partition_by=partition_by
+            )
 
     def build_filename(self, slug: str, game_date: str) -> str:
         """Build a filename from slug and game date.
@@ -78,6 +106,95 @@ class PriceHistoryWriter:
         logger.info("Saved history CSV", extra={"file": filepath, "points": len(history)})
         return filepath
 
+    def merge_price_history(
+        self,
+        slug: str,
+        game_date: str,
+        history: List[Dict[str, Any]]
+    ) -> str:
+        """Merge new price points into an existing per-game CSV file.
+        
+        Rows are keyed by time, so merging the same points again leaves the
+        file unchanged. The file is created if it does not exist yet.
+        
+        Args:
+            slug: Market slug identifier
+            game_date: Game date string (YYYY-MM-DD)
+            history: List of price history entries with 't' and 'p' keys
+            
+        Returns:
+            Path to written file
+        """
+        filename = self.build_filename(slug, game_date)
+        filepath = os.path.join(self.output_dir, filename)
+        
+        rows = {}
+        if os.path.exists(filepath):
+            with open(filepath, 'r', newline='') as f:
+                for row in csv.DictReader(f):
+                    rows[row['time']] = row['price']
+        existing = len(rows)
+        
+        for entry in history:
+            readable_time = datetime.fromtimestamp(entry['t']).strftime('%Y-%m-%d %H:%M:%S')
+            rows[readable_time] = round(float(entry['p']) * 100, 2)
+        
+        tmp_path = filepath + ".tmp"
+        with open(tmp_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=['time', 'price'])
+            writer.writeheader()
+            for readable_time in sorted(rows):
+                writer.writerow({'time': readable_time, 'price': rows[readable_time]})
+        os.replace(tmp_path, filepath)
+        
+        logger.info(
+            "Merged history CSV",
+            extra={"file": filepath, "points": len(rows), "new_points": len(rows) - existing}
+        )
+        return filepath
+
+    def write_game(
+        self,
+        slug: str,
+        game_date: str,
+        game_start_iso: str,
+        token_id: str,
+        history: List[Dict[str, Any]],
+        incremental: bool = False,
+        complete: bool = False
+    ):
+        """Write one game's price history to the per-game and consolidated outputs.
+        
+        Args:
+            slug: Market slug identifier
+            game_date: Game date string (YYYY-MM-DD)
+            game_start_iso: Game start time in ISO format (UTC)
+            token_id: Market token ID
+            history: List of price history entries with 't' and 'p' keys
+            incremental: Merge into the existing per-game CSV instead of
+                overwriting it
+            complete: Unused; completion is tracked by the database
+        """
+        if not history:
+            return
+        started = time.perf_counter()
+        if incremental:
+            self.merge_price_history(slug, game_date, history)
+        else:
+            self.write_price_history(slug, game_date, history)
+        self.write_consolidated_history(
+            slug=slug,
+            game_date=game_date,
+            game_start_iso=game_start_iso,
+            token_id=token_id,
+            history=history
+        )
+        metrics.SINK_WRITE_SECONDS.labels("csv").observe(time.perf_counter() - started)
+        metrics.SINK_POINTS.labels("csv").inc(len(history))
+
+    def close(self):
+        """Nothing to flush; files are written synchronously."""
+
     def write_consolidated_history(
         self,
         slug: str,
@@ -88,6 +205,9 @@ class PriceHistoryWriter:
     ) -> str:
         """Append price history to a consolidated CSV file.
         
+        In columnar mode the points are upserted into the columnar store
+        instead, so re-runs never duplicate rows.
+        
         Args:
             slug: Market slug identifier
             game_date: Game date string (YYYY-MM-DD)
@@ -98,6 +218,16 @@ class PriceHistoryWriter:
         Returns:
             Path to consolidated file
         """
+        if self.columnar_store is not None:
+            return self.columnar_store.upsert(
+                slug=slug,
+                game_date=game_date,
+                game_start_iso=game_start_iso,
+                token_id=token_id,
+                history=history,
+                fidelity_minutes=PRICE_FIDELITY
+            )
+        
         filepath = os.path.join(self.output_dir, CONSOLIDATED_FILENAME)
         file_exists = os.path.exists(filepath)
 
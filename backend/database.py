@@ -3,18 +3,121 @@ Database module for price history storage.
 """
 import sqlite3
 import csv
+import json
 import logging
-from typing import List, Dict, Any, Optional
+import os
+import threading
+import time
+from itertools import islice
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 from datetime import datetime, timezone
+from urllib.request import pathname2url
+
+from config import (
+    BACKTEST_BET_PERCENTAGE,
+    BACKTEST_INITIAL_CAPITAL,
+    DB_PATH,
+    DB_STATEMENT_CACHE_SIZE,
+    DEFAULT_TEAM,
+    PRICE_FIDELITY,
+    DB_WRITER_BATCH_POINTS,
+    DB_WRITER_FLUSH_SECONDS,
+    BULK_LOAD_BATCH_ROWS,
+    BULK_LOAD_CACHE_KIB,
+    OUTPUT_DIR,
+    CONSOLIDATED_FILENAME,
+)
+from schedule import is_second_team, parse_slug
+import downsample
+import metrics
 
 logger = logging.getLogger(__name__)
 
-DB_PATH = "price_history.db"
+PRICE_HISTORY_UNIQUE_INDEX = "ux_price_history_game_ts"
+# Bounds for open-ended timestamp ranges
+MIN_TIMESTAMP = 0
+MAX_TIMESTAMP = 2 ** 62
+# Bumped whenever init_database gains a migration
+SCHEMA_VERSION = 3
 
 
-def init_database():
-    """Initialize the SQLite database with schema."""
-    conn = sqlite3.connect(DB_PATH)
+class ConnectionManager:
+    """Reuses one SQLite connection per thread.
+    
+    sqlite3 keeps a cache of compiled statements per connection, so reusing
+    a connection also reuses prepared statements across calls. Connections
+    are opened lazily and follow DB_PATH, so changing it takes effect on
+    the next call from each thread.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        read_only: bool = False,
+        cached_statements: int = DB_STATEMENT_CACHE_SIZE
+    ):
+        """Initialize the connection manager.
+        
+        Args:
+            db_path: SQLite database path (defaults to DB_PATH at call time)
+            read_only: Open connections with mode=ro so they can never write
+            cached_statements: Compiled statements kept per connection
+        """
+        self.db_path = db_path
+        self.read_only = read_only
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+
+    def _connect(self, path: str) -> sqlite3.Connection:
+        if self.read_only:
+            uri = f"file:{pathname2url(os.path.abspath(path))}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, cached_statements=self.cached_statements)
+        else:
+            conn = sqlite3.connect(path, cached_statements=self.cached_statements)
+            conn.execute("PRAGMA journal_mode=WAL")
+        conn.row_factory = sqlite3.Row
+        logger.debug("Opened database connection", extra={"db_path": path, "read_only": self.read_only})
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use."""
+        path = self.db_path or DB_PATH
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.path == path:
+            return conn
+        if conn is not None:
+            conn.close()
+        self._local.conn = self._connect(path)
+        self._local.path = path
+        return self._local.conn
+
+    def close(self):
+        """Close this thread's connection, if one is open."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+# Shared by the query functions below and the web API
+readers = ConnectionManager(read_only=True)
+# Downsampling levels per (game_id, game_analysis.data_version), see get_price_history
+price_levels = downsample.LevelCache()
+
+
+def close_connections():
+    """Close the calling thread's reader connection (e.g. at request teardown)."""
+    readers.close()
+
+
+def init_database(db_path: Optional[str] = None):
+    """Initialize the SQLite database with schema.
+    
+    Args:
+        db_path: SQLite database path (defaults to DB_PATH)
+    """
+    db_path = db_path or DB_PATH
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
     # Create games table
@@ -45,228 +148,944 @@ def init_database():
         CREATE INDEX IF NOT EXISTS idx_game_date ON games(game_date)
     """)
     
+    # Readers never block writers (and vice versa); persists in the file
+    cursor.execute("PRAGMA journal_mode=WAL")
+    
+    # Set once a game's price window has closed and been fully fetched
+    _ensure_column(cursor, "games", "history_complete", "INTEGER NOT NULL DEFAULT 0")
+    
+    _migrate_epoch_columns(cursor)
+    
+    # One price per game and timestamp; also serves indexed time-range scans
+    _ensure_price_history_unique(cursor)
+    
+    _migrate_game_analysis(cursor)
+    _migrate_team_columns(cursor)
+    
+    conn.commit()
+    conn.close()
+    logger.info("Database initialized", extra={"db_path": db_path})
+
+
+def _ensure_column(cursor: sqlite3.Cursor, table: str, column: str, definition: str):
+    """Add a column to an existing table if it is missing."""
+    cursor.execute(f"PRAGMA table_info({table})")
+    if column not in {row[1] for row in cursor.fetchall()}:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _migrate_epoch_columns(cursor: sqlite3.Cursor):
+    """Schema version 1: integer epoch timestamps and stored team perspective.
+    
+    Adds ``price_history.timestamp`` and ``games.game_start_ts`` (Unix
+    seconds) next to the original text columns, plus ``games.first_team``
+    (the team the market prices) and ``games.second_team`` parsed from the
+    slug, and backfills existing rows.
+    Time windows can then be evaluated as indexed integer ranges in SQL.
+    """
+    cursor.execute("PRAGMA user_version")
+    if cursor.fetchone()[0] >= 1:
+        return
+    
+    _ensure_column(cursor, "price_history", "timestamp", "INTEGER")
+    _ensure_column(cursor, "games", "game_start_ts", "INTEGER")
+    _ensure_column(cursor, "games", "first_team", "TEXT")
+    _ensure_column(cursor, "games", "second_team", "TEXT")
+    
+    # strftime accepts both stored formats ('YYYY-MM-DD HH:MM:SS' and ISO with 'Z')
+    cursor.execute("""
+        UPDATE price_history SET timestamp = CAST(strftime('%s', timestamp_utc) AS INTEGER)
+        WHERE timestamp IS NULL
+    """)
+    backfilled = cursor.rowcount
+    cursor.execute("""
+        UPDATE games SET game_start_ts = CAST(strftime('%s', game_start_utc) AS INTEGER)
+        WHERE game_start_ts IS NULL
+    """)
+    cursor.execute("SELECT id, slug FROM games WHERE first_team IS NULL")
+    teams = []
+    for game_id, slug in cursor.fetchall():
+        parsed = parse_slug(slug)
+        teams.append((parsed['first_team'], parsed['second_team'], game_id))
+    cursor.executemany("UPDATE games SET first_team = ?, second_team = ? WHERE id = ?", teams)
+    
+    cursor.execute("PRAGMA user_version = 1")
+    logger.info(
+        "Migrated database to epoch timestamps",
+        extra={"schema_version": 1, "price_points": backfilled, "games": len(teams)}
+    )
+
+
+def _migrate_game_analysis(cursor: sqlite3.Cursor):
+    """Schema version 2: materialized game_analysis table and data version.
+    
+    ``game_analysis`` holds one row per game and perspective (first and
+    second team in the slug) with the 48h average, settled final price, ROI and the data
+    version that last touched it. ``data_version`` is a single counter
+    bumped by every write that changes price history.
+    """
+    cursor.execute("PRAGMA user_version")
+    if cursor.fetchone()[0] >= 2:
+        return
+    
     cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_price_history_game_timestamp 
-        ON price_history(game_id, timestamp_utc)
+        CREATE TABLE IF NOT EXISTS game_analysis (
+            game_id INTEGER NOT NULL,
+            team TEXT NOT NULL,
+            avg_48h_price REAL,
+            final_price REAL,
+            roi_percent REAL,
+            settled INTEGER NOT NULL DEFAULT 0,
+            data_version INTEGER NOT NULL,
+            PRIMARY KEY (game_id, team),
+            FOREIGN KEY (game_id) REFERENCES games (id)
+        )
     """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS data_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 0)")
+    
+    refreshed = refresh_game_analysis(cursor)
+    cursor.execute("PRAGMA user_version = 2")
+    logger.info(
+        "Materialized game analysis",
+        extra={"schema_version": 2, "games": refreshed}
+    )
+
+
+def _migrate_team_columns(cursor: sqlite3.Cursor):
+    """Schema version 3: name the slug's teams by position, not venue.
+    
+    Versions 1 and 2 stored the slug's first and second team as
+    ``home_team``/``away_team``. Polymarket slugs list the visitor first,
+    so those names were backwards; the columns become ``first_team`` (the
+    team the market prices) and ``second_team`` (prices inverted).
+    """
+    cursor.execute("PRAGMA user_version")
+    if cursor.fetchone()[0] >= 3:
+        return
+    
+    cursor.execute("PRAGMA table_info(games)")
+    columns = {row[1] for row in cursor.fetchall()}
+    if "home_team" in columns:
+        cursor.execute("ALTER TABLE games RENAME COLUMN home_team TO first_team")
+        cursor.execute("ALTER TABLE games RENAME COLUMN away_team TO second_team")
+    cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    logger.info("Renamed game team columns", extra={"schema_version": SCHEMA_VERSION})
+
+
+def _bump_data_version(cursor: sqlite3.Cursor) -> int:
+    """Increment the data version and return the new value."""
+    cursor.execute("UPDATE data_version SET version = version + 1 WHERE id = 1")
+    cursor.execute("SELECT version FROM data_version WHERE id = 1")
+    return cursor.fetchone()[0]
+
+
+@metrics.timed(metrics.DB_QUERY_SECONDS)
+def get_data_version() -> int:
+    """Get the current data version (changes whenever price history changes)."""
+    cursor = readers.connection().cursor()
+    cursor.execute("SELECT version FROM data_version WHERE id = 1")
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+@metrics.timed(metrics.DB_QUERY_SECONDS)
+def refresh_game_analysis(cursor: sqlite3.Cursor, game_ids: Optional[Iterable[int]] = None) -> int:
+    """Recompute materialized analysis rows using an open cursor (no commit).
+    
+    Each game gets one row for each team in its slug,
+    computed with the same expressions as the per-game functions so the
+    stored values match them exactly.
+    
+    Args:
+        cursor: Cursor on a writable connection
+        game_ids: Games whose price history changed (None recomputes every game)
+        
+    Returns:
+        Number of games refreshed
+    """
+    if game_ids is None:
+        cursor.execute("SELECT id FROM games")
+        game_ids = [row[0] for row in cursor.fetchall()]
+    else:
+        game_ids = sorted(set(game_ids))
+    if not game_ids:
+        return 0
+    
+    version = _bump_data_version(cursor)
+    window = 48 * 3600
+    rows = []
+    # Stay well below SQLite's bound-parameter limit
+    for i in range(0, len(game_ids), 500):
+        chunk = game_ids[i:i + 500]
+        placeholders = ",".join("?" * len(chunk))
+        cursor.execute(f"""
+            SELECT g.id, p.team,
+                   (
+                       SELECT AVG(CASE WHEN p.inverted THEN 100.0 - ph.price ELSE ph.price END)
+                       FROM price_history ph
+                       WHERE ph.game_id = g.id
+                         AND ph.timestamp BETWEEN g.game_start_ts - ? AND g.game_start_ts
+                   ) AS avg_price,
+                   (
+                       SELECT CASE WHEN p.inverted THEN 100.0 - ph.price ELSE ph.price END
+                       FROM price_history ph
+                       WHERE ph.game_id = g.id
+                       ORDER BY ph.timestamp DESC
+                       LIMIT 1
+                   ) AS last_price
+            FROM games g
+            JOIN (
+                SELECT id, first_team AS team, 0 AS inverted FROM games
+                UNION ALL
+                SELECT id, second_team AS team, 1 AS inverted FROM games
+            ) p ON p.id = g.id
+            WHERE g.id IN ({placeholders})
+        """, (window, *chunk))
+        for game_id, team, avg_48h, last_price in cursor.fetchall():
+            final_price = settle_final_price(last_price) if last_price is not None else None
+            settled = final_price is not None and (final_price >= 99 or final_price <= 1)
+            rows.append((
+                game_id, team, avg_48h, final_price,
+                calculate_roi(avg_48h, final_price), int(settled), version
+            ))
+    
+    cursor.executemany("""
+        INSERT INTO game_analysis
+            (game_id, team, avg_48h_price, final_price, roi_percent, settled, data_version)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (game_id, team) DO UPDATE SET
+            avg_48h_price = excluded.avg_48h_price,
+            final_price = excluded.final_price,
+            roi_percent = excluded.roi_percent,
+            settled = excluded.settled,
+            data_version = excluded.data_version
+    """, rows)
+    logger.debug("Refreshed game analysis", extra={"games": len(game_ids), "data_version": version})
+    return len(game_ids)
+
+
+def _ensure_price_history_unique(cursor: sqlite3.Cursor):
+    """Create the unique (game_id, timestamp) index, dropping duplicates first.
+    
+    Databases loaded before the index existed may hold the same point more
+    than once; the most recently inserted copy is kept.
+    """
+    cursor.execute("""
+        SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?
+    """, (PRICE_HISTORY_UNIQUE_INDEX,))
+    if cursor.fetchone():
+        return
+    
+    cursor.execute("""
+        DELETE FROM price_history WHERE id NOT IN (
+            SELECT MAX(id) FROM price_history GROUP BY game_id, timestamp
+        )
+    """)
+    if cursor.rowcount:
+        logger.warning("Removed duplicate price points", extra={"removed": cursor.rowcount})
+    _create_price_history_unique_index(cursor)
+    # Superseded by the unique index on the epoch column
+    cursor.execute("DROP INDEX IF EXISTS idx_price_history_game_timestamp")
+    cursor.execute("DROP INDEX IF EXISTS ux_price_history_game_timestamp")
+
+
+def _create_price_history_unique_index(cursor: sqlite3.Cursor):
+    cursor.execute(f"""
+        CREATE UNIQUE INDEX IF NOT EXISTS {PRICE_HISTORY_UNIQUE_INDEX}
+        ON price_history(game_id, timestamp)
+    """)
+
+
+def _format_timestamp(epoch: int) -> str:
+    """Format a Unix timestamp the way price_history.timestamp_utc stores it."""
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _iso_to_epoch(value: str) -> int:
+    """Parse an ISO timestamp (naive values are UTC) into Unix seconds."""
+    timestamp_dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if timestamp_dt.tzinfo is None:
+        timestamp_dt = timestamp_dt.replace(tzinfo=timezone.utc)
+    return int(timestamp_dt.timestamp())
+
+
+@metrics.timed(metrics.DB_QUERY_SECONDS)
+def get_sync_state() -> Dict[str, Dict[str, Any]]:
+    """Get the latest stored timestamp for every token.
+    
+    Returns:
+        Mapping of token ID to a dictionary with 'slug', 'last_timestamp'
+        (Unix seconds, or None if no prices are stored) and 'complete'
+    """
+    cursor = readers.connection().cursor()
+    
+    cursor.execute("""
+        SELECT g.token_id, g.slug, g.history_complete, MAX(ph.timestamp)
+        FROM games g
+        LEFT JOIN price_history ph ON ph.game_id = g.id
+        GROUP BY g.id
+    """)
+    
+    state = {}
+    for token_id, slug, complete, last_timestamp in cursor.fetchall():
+        state[token_id] = {
+            'slug': slug,
+            'last_timestamp': last_timestamp,
+            'complete': bool(complete)
+        }
+    
+    return state
+
+
+def _merge_game(
+    cursor: sqlite3.Cursor,
+    slug: str,
+    game_date: str,
+    game_start_iso: str,
+    token_id: str,
+    history: List[Dict[str, Any]],
+    fidelity_minutes: int,
+    complete: bool = False
+) -> Tuple[Optional[int], int]:
+    """Merge one game's price history using an open cursor (no commit).
+    
+    Returns:
+        Tuple of (game ID, or None if nothing was stored, number of new
+        price points inserted)
+    """
+    cursor.execute("SELECT id FROM games WHERE slug = ?", (slug,))
+    row = cursor.fetchone()
+    if row:
+        game_id = row[0]
+    elif history:
+        game_id, _ = _upsert_game(cursor, slug, game_date, game_start_iso, token_id)
+    else:
+        return None, 0
+    
+    rows = []
+    for entry in history:
+        timestamp = int(entry['t'])
+        rows.append((
+            game_id, timestamp, _format_timestamp(timestamp),
+            round(float(entry['p']) * 100, 2), fidelity_minutes
+        ))
+    
+    inserted = 0
+    if rows:
+        cursor.executemany("""
+            INSERT OR IGNORE INTO price_history
+                (game_id, timestamp, timestamp_utc, price, fidelity_minutes)
+            VALUES (?, ?, ?, ?, ?)
+        """, rows)
+        inserted = cursor.rowcount
+    
+    if complete:
+        cursor.execute("UPDATE games SET history_complete = 1 WHERE id = ?", (game_id,))
+    
+    return game_id, inserted
+
+
+@metrics.timed(metrics.DB_QUERY_SECONDS)
+def merge_price_history(
+    slug: str,
+    game_date: str,
+    game_start_iso: str,
+    token_id: str,
+    history: List[Dict[str, Any]],
+    fidelity_minutes: int,
+    complete: bool = False
+) -> int:
+    """Merge fetched price history into the database without duplicates.
+    
+    Points whose timestamp is already stored for the game are skipped, so
+    the same history can be merged any number of times.
+    
+    Args:
+        slug: Market slug identifier
+        game_date: Game date string (YYYY-MM-DD)
+        game_start_iso: Game start time in ISO format (UTC)
+        token_id: Market token ID
+        history: List of price history entries with 't' and 'p' keys
+        fidelity_minutes: Price fidelity the history was fetched at
+        complete: Mark the game's price window as closed and fully fetched
+        
+    Returns:
+        Number of new price points inserted
+    """
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    
+    game_id, inserted = _merge_game(
+        cursor, slug, game_date, game_start_iso, token_id, history, fidelity_minutes, complete
+    )
+    if inserted:
+        refresh_game_analysis(cursor, [game_id])
     
     conn.commit()
     conn.close()
-    logger.info("Database initialized", extra={"db_path": DB_PATH})
+    
+    logger.info("Merged price history", extra={"slug": slug, "inserted": inserted, "complete": complete})
+    return inserted
+
+
+class DatabaseWriter:
+    """Streams fetched price history straight into SQLite.
+    
+    Games are buffered and written in batched transactions, flushed when
+    enough points are pending or enough time has passed, so data becomes
+    queryable shortly after it is fetched without a commit per game.
+    Writes are idempotent merges keyed by (game, timestamp).
+    """
 
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        batch_points: int = DB_WRITER_BATCH_POINTS,
+        flush_interval: float = DB_WRITER_FLUSH_SECONDS,
+        fidelity_minutes: int = PRICE_FIDELITY
+    ):
+        """Initialize the database writer.
+        
+        Args:
+            db_path: SQLite database path (defaults to DB_PATH)
+            batch_points: Pending points that trigger a flush
+            flush_interval: Seconds after which pending games are flushed
+            fidelity_minutes: Price fidelity the written history was fetched at
+        """
+        self.db_path = db_path or DB_PATH
+        self.batch_points = batch_points
+        self.flush_interval = flush_interval
+        self.fidelity_minutes = fidelity_minutes
+        self._pending: List[tuple] = []
+        self._pending_points = 0
+        self._last_flush = time.monotonic()
+        self.games_written = 0
+        self.points_inserted = 0
+        
+        init_database(self.db_path)
+        self.conn = sqlite3.connect(self.db_path)
+        # WAL lets the web server keep reading while the writer commits
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+
+    def write_game(
+        self,
+        slug: str,
+        game_date: str,
+        game_start_iso: str,
+        token_id: str,
+        history: List[Dict[str, Any]],
+        complete: bool = False
+    ):
+        """Queue one game's price history for the next batched transaction.
+        
+        Args:
+            slug: Market slug identifier
+            game_date: Game date string (YYYY-MM-DD)
+            game_start_iso: Game start time in ISO format (UTC)
+            token_id: Market token ID
+            history: List of price history entries with 't' and 'p' keys
+            complete: Mark the game's price window as closed and fully fetched
+        """
+        self._pending.append((slug, game_date, game_start_iso, token_id, history, complete))
+        self._pending_points += len(history)
+        if (self._pending_points >= self.batch_points
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
 
-def load_csv_to_database(csv_path: str):
-    """Load price history from CSV into SQLite database.
+    def flush(self) -> Dict[str, int]:
+        """Write all pending games in one transaction.
+        
+        Returns:
+            IDs of the games that gained points, keyed by slug
+        """
+        if not self._pending:
+            return {}
+        started = time.perf_counter()
+        cursor = self.conn.cursor()
+        inserted = 0
+        changed: Dict[str, int] = {}
+        with self.conn:
+            for slug, game_date, game_start_iso, token_id, history, complete in self._pending:
+                game_id, game_inserted = _merge_game(
+                    cursor, slug, game_date, game_start_iso, token_id, history,
+                    self.fidelity_minutes, complete
+                )
+                if game_inserted:
+                    changed[slug] = game_id
+                inserted += game_inserted
+            # Only games that gained points need their analysis recomputed
+            refresh_game_analysis(cursor, changed.values())
+        logger.info(
+            "Flushed games to database",
+            extra={"games": len(self._pending), "inserted": inserted}
+        )
+        metrics.SINK_WRITE_SECONDS.labels("db").observe(time.perf_counter() - started)
+        metrics.SINK_POINTS.labels("db").inc(inserted)
+        self.games_written += len(self._pending)
+        self.points_inserted += inserted
+        self._pending = []
+        self._pending_points = 0
+        self._last_flush = time.monotonic()
+        return changed
+
+    def close(self):
+        """Flush pending games and close the connection."""
+        self.flush()
+        self.conn.close()
+
+
+def _apply_bulk_load_pragmas(conn: sqlite3.Connection, cache_kib: int = BULK_LOAD_CACHE_KIB):
+    """Tune a connection for large sequential writes."""
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{int(cache_kib)}")
+    conn.execute("PRAGMA temp_store=FILE")
+
+
+@metrics.timed(metrics.DB_QUERY_SECONDS)
+def load_csv_to_database(
+    csv_path: str,
+    db_path: Optional[str] = None,
+    batch_rows: int = BULK_LOAD_BATCH_ROWS
+) -> Dict[str, Any]:
+    """Bulk load price history from the consolidated CSV into SQLite.
+    
+    Rows are streamed from the CSV in batches of ``batch_rows`` into an
+    unindexed staging table, then merged into price_history in one sorted
+    INSERT that upserts on (game_id, timestamp). Existing data is kept,
+    so loads are incremental and re-loading the same file is a no-op.
+    Games whose points or metadata changed get their analysis refreshed,
+    which bumps the data version.
+    When price_history starts out empty, its unique index is dropped and
+    rebuilt after the merge instead of being maintained row by row.
     
     Args:
         csv_path: Path to the consolidated CSV file
+        db_path: SQLite database path (defaults to DB_PATH)
+        batch_rows: CSV rows buffered per executemany call
+        
+    Returns:
+        Dictionary with 'rows_read', 'games', 'points_upserted',
+        'elapsed_seconds' and 'rows_per_second'
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    db_path = db_path or DB_PATH
+    init_database(db_path)
+    started = time.monotonic()
     
-    # Clear existing data
-    cursor.execute("DELETE FROM price_history")
-    cursor.execute("DELETE FROM games")
+    conn = sqlite3.connect(db_path)
+    _apply_bulk_load_pragmas(conn)
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TEMP TABLE bulk_price_history (
+            game_id INTEGER NOT NULL,
+            timestamp INTEGER NOT NULL,
+            timestamp_utc TEXT NOT NULL,
+            price REAL NOT NULL,
+            fidelity_minutes INTEGER NOT NULL
+        )
+    """)
     
-    games_cache = {}
+    game_ids: Dict[str, int] = {}
+    # Games inserted or whose metadata (e.g. start time) changed
+    changed_games = set()
+    rows_read = 0
     
-    with open(csv_path, 'r') as f:
+    with open(csv_path, 'r', newline='') as f:
         reader = csv.DictReader(f)
-        for row in reader:
-            slug = row['slug']
+        while True:
+            batch = list(islice(reader, batch_rows))
+            if not batch:
+                break
             
-            # Insert or get game
-            if slug not in games_cache:
-                cursor.execute("""
-                    INSERT INTO games (game_date, slug, game_start_utc, token_id)
-                    VALUES (?, ?, ?, ?)
-                """, (row['game_date'], slug, row['game_start_utc'], row['token_id']))
-                game_id = cursor.lastrowid
-                games_cache[slug] = game_id
-            else:
-                game_id = games_cache[slug]
+            staged = []
+            for row in batch:
+                slug = row['slug']
+                game_id = game_ids.get(slug)
+                if game_id is None:
+                    game_id, changed = _upsert_game(
+                        cursor, slug, row['game_date'], row['game_start_utc'], row['token_id']
+                    )
+                    game_ids[slug] = game_id
+                    if changed:
+                        changed_games.add(game_id)
+                timestamp_utc = row['timestamp_utc']
+                staged.append((
+                    game_id, timestamp_utc, timestamp_utc,
+                    float(row['price']), int(row['fidelity_minutes'])
+                ))
             
-            # Insert price history
-            cursor.execute("""
-                INSERT INTO price_history (game_id, timestamp_utc, price, fidelity_minutes)
-                VALUES (?, ?, ?, ?)
-            """, (game_id, row['timestamp_utc'], float(row['price']), int(row['fidelity_minutes'])))
+            cursor.executemany("""
+                INSERT INTO bulk_price_history
+                    (game_id, timestamp, timestamp_utc, price, fidelity_minutes)
+                VALUES (?, CAST(strftime('%s', ?) AS INTEGER), ?, ?, ?)
+            """, staged)
+            rows_read += len(batch)
     
-    conn.commit()
+    cursor.execute("SELECT NOT EXISTS (SELECT 1 FROM price_history)")
+    defer_index = bool(cursor.fetchone()[0])
+    if defer_index:
+        cursor.execute(f"DROP INDEX IF EXISTS {PRICE_HISTORY_UNIQUE_INDEX}")
     
-    # Log stats
-    cursor.execute("SELECT COUNT(*) FROM games")
-    game_count = cursor.fetchone()[0]
-    cursor.execute("SELECT COUNT(*) FROM price_history")
-    price_count = cursor.fetchone()[0]
+    # Last row wins when the CSV repeats a point; sorted input keeps B-tree
+    # inserts sequential. Without the index there is nothing to conflict with.
+    upsert = "" if defer_index else """
+        ON CONFLICT (game_id, timestamp) DO UPDATE SET
+            price = excluded.price,
+            fidelity_minutes = excluded.fidelity_minutes
+        WHERE price != excluded.price OR fidelity_minutes != excluded.fidelity_minutes
+    """
+    cursor.execute("""
+        INSERT INTO price_history (game_id, timestamp, timestamp_utc, price, fidelity_minutes)
+        SELECT game_id, timestamp, timestamp_utc, price, fidelity_minutes
+        FROM bulk_price_history
+        WHERE rowid IN (
+            SELECT MAX(rowid) FROM bulk_price_history GROUP BY game_id, timestamp
+        )
+        ORDER BY game_id, timestamp
+    """ + upsert)
+    points_upserted = cursor.rowcount
+    
+    if defer_index:
+        _create_price_history_unique_index(cursor)
+    if points_upserted:
+        cursor.execute("SELECT DISTINCT game_id FROM bulk_price_history")
+        changed_games.update(row[0] for row in cursor.fetchall())
+    # Bumps the data version, so cached API responses see new game rows too
+    refresh_game_analysis(cursor, changed_games)
+    cursor.execute("DROP TABLE bulk_price_history")
     
+    conn.commit()
     conn.close()
     
+    elapsed = time.monotonic() - started
+    stats = {
+        "rows_read": rows_read,
+        "games": len(game_ids),
+        "points_upserted": points_upserted,
+        "elapsed_seconds": round(elapsed, 3),
+        "rows_per_second": round(rows_read / elapsed, 1) if elapsed > 0 else 0.0,
+    }
     logger.info(
-        "CSV data loaded into database",
-        extra={"games": game_count, "price_points": price_count}
+        "CSV data loaded into database: %d rows at %.0f rows/sec",
+        rows_read, stats["rows_per_second"],
+        extra=stats
     )
+    return stats
+
+
+def _upsert_game(
+    cursor: sqlite3.Cursor,
+    slug: str,
+    game_date: str,
+    game_start_utc: str,
+    token_id: str
+) -> Tuple[int, bool]:
+    """Insert or update a game row.
+    
+    Returns:
+        Tuple of (game ID, whether the row was inserted or changed)
+    """
+    parsed = parse_slug(slug)
+    game_start_ts = _iso_to_epoch(game_start_utc)
+    cursor.execute("""
+        INSERT INTO games
+            (game_date, slug, game_start_utc, token_id, game_start_ts, first_team, second_team)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (slug) DO UPDATE SET
+            game_date = excluded.game_date,
+            game_start_utc = excluded.game_start_utc,
+            token_id = excluded.token_id,
+            game_start_ts = excluded.game_start_ts,
+            first_team = excluded.first_team,
+            second_team = excluded.second_team
+        WHERE game_date IS NOT excluded.game_date
+           OR game_start_utc IS NOT excluded.game_start_utc
+           OR token_id IS NOT excluded.token_id
+           OR game_start_ts IS NOT excluded.game_start_ts
+    """, (game_date, slug, game_start_utc, token_id, game_start_ts,
+          parsed['first_team'], parsed['second_team']))
+    changed = cursor.rowcount > 0
+    cursor.execute("SELECT id FROM games WHERE slug = ?", (slug,))
+    return cursor.fetchone()[0], changed
 
 
-def get_all_games() -> List[Dict[str, Any]]:
+@metrics.timed(metrics.DB_QUERY_SECONDS)
+def get_all_games(team: Optional[str] = None) -> List[Dict[str, Any]]:
     """Get all games from database.
     
+    Args:
+        team: Optional team abbreviation; only that team's games are returned
+        
     Returns:
         List of game dictionaries
     """
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
+    cursor = readers.connection().cursor()
     
-    cursor.execute("""
-        SELECT id, game_date, slug, game_start_utc, token_id
-        FROM games
-        ORDER BY game_date ASC
-    """)
+    if team:
+        cursor.execute("""
+            SELECT id, game_date, slug, game_start_utc, token_id
+            FROM games
+            WHERE first_team = ? OR second_team = ?
+            ORDER BY game_date ASC, id ASC
+        """, (team.lower(), team.lower()))
+    else:
+        cursor.execute("""
+            SELECT id, game_date, slug, game_start_utc, token_id
+            FROM games
+            ORDER BY game_date ASC, id ASC
+        """)
     
     games = [dict(row) for row in cursor.fetchall()]
-    conn.close()
     
     return games
 
 
-def get_price_history(game_id: int) -> List[Dict[str, Any]]:
+@metrics.timed(metrics.DB_QUERY_SECONDS)
+def get_price_history(
+    game_id: int,
+    team: str = DEFAULT_TEAM,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    max_points: Optional[int] = None
+) -> List[Dict[str, Any]]:
     """Get price history for a specific game.
     
-    Automatically inverts prices when PHI is the away team (second team in slug)
-    so that prices always represent the probability of PHI winning.
+    Automatically inverts prices when the team is the second team in the slug
+    so that prices always represent the probability of that team winning.
+    
+    ``start``/``end`` are answered as a range on the (game_id, timestamp)
+    index. With ``max_points``, longer series are downsampled with LTTB,
+    starting from the game's cached precomputed levels when one of them
+    has enough points in range.
     
     Args:
         game_id: Game ID
+        team: Team abbreviation whose perspective prices are returned from
+        start: Earliest timestamp to return (epoch seconds, inclusive)
+        end: Latest timestamp to return (epoch seconds, inclusive)
+        max_points: Most points to return (at least 3)
         
     Returns:
         List of price history dictionaries
     """
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
+    cursor = readers.connection().cursor()
     
     # Get game slug to determine if we need to invert prices
     cursor.execute("""
-        SELECT slug FROM games WHERE id = ?
+        SELECT g.slug,
+               (SELECT MAX(ga.data_version) FROM game_analysis ga WHERE ga.game_id = g.id) AS data_version
+        FROM games g WHERE g.id = ?
     """, (game_id,))
     game_row = cursor.fetchone()
     if not game_row:
-        conn.close()
         return []
     
     slug = game_row['slug']
-    # Parse slug format: nba-team1-team2-date or nba-team1-team2
-    parts = slug.split('-')
-    # PHI is away team if it's the second team (index 2 in slug parts)
-    is_phi_away = len(parts) >= 3 and parts[2].lower() == 'phi'
+    # Slug format: nba-team1-team2-date; prices are quoted for team1
+    invert = is_second_team(slug, team)
+    
+    lo = start if start is not None else MIN_TIMESTAMP
+    hi = end if end is not None else MAX_TIMESTAMP
+    rows = None
+    if max_points:
+        # Levels are stored from the first team's perspective; LTTB's choice of
+        # points is unchanged by inverting prices. The game's own analysis
+        # version only moves when its price history does, so ingest of other
+        # games keeps these levels
+        levels = price_levels.get(
+            (game_id, game_row['data_version']),
+            lambda: _price_history_rows(cursor, game_id, MIN_TIMESTAMP, MAX_TIMESTAMP)
+        )
+        rows = downsample.select_from_levels(levels, lo, hi, max_points)
+    if rows is None:
+        rows = _price_history_rows(cursor, game_id, lo, hi)
+        if max_points:
+            rows = downsample.lttb(rows, max_points)
+    
+    history = []
+    for _, price, timestamp_utc, fidelity_minutes in rows:
+        # Invert price for the second team (so price always represents its win probability)
+        if invert:
+            price = 100.0 - price
+        history.append({
+            'timestamp_utc': timestamp_utc,
+            'price': price,
+            'fidelity_minutes': fidelity_minutes
+        })
     
+    return history
+
+
+def _price_history_rows(cursor: sqlite3.Cursor, game_id: int, start: int, end: int) -> List[tuple]:
+    """Fetch (timestamp, price, timestamp_utc, fidelity_minutes) rows in a time range."""
     cursor.execute("""
-        SELECT timestamp_utc, price, fidelity_minutes
+        SELECT timestamp, price, timestamp_utc, fidelity_minutes
         FROM price_history
-        WHERE game_id = ?
-        ORDER BY timestamp_utc ASC
-    """, (game_id,))
+        WHERE game_id = ? AND timestamp BETWEEN ? AND ?
+        ORDER BY timestamp ASC
+    """, (game_id, start, end))
+    return [tuple(row) for row in cursor.fetchall()]
+
+
+@metrics.timed(metrics.DB_QUERY_SECONDS)
+def calculate_window_average_price(
+    game_id: int,
+    team: str = DEFAULT_TEAM,
+    hours: float = 48
+) -> Optional[float]:
+    """Calculate the average price in the N hours leading up to game start.
     
-    history = []
-    for row in cursor.fetchall():
-        entry = dict(row)
-        # Invert price if PHI is away team (so price always represents PHI's win probability)
-        if is_phi_away:
-            entry['price'] = 100.0 - entry['price']
-        history.append(entry)
+    The window is evaluated inside SQLite as an integer range on the
+    (game_id, timestamp) index, with the team perspective applied per row.
     
-    conn.close()
+    Args:
+        game_id: Game ID
+        team: Team abbreviation whose perspective prices are returned from
+        hours: Window length before game start
+        
+    Returns:
+        Average price in the window, or None if insufficient data
+    """
+    cursor = readers.connection().cursor()
     
-    return history
+    cursor.execute("""
+        SELECT AVG(CASE WHEN g.second_team = ? THEN 100.0 - ph.price ELSE ph.price END)
+        FROM games g
+        JOIN price_history ph ON ph.game_id = g.id
+        WHERE g.id = ?
+          AND ph.timestamp BETWEEN g.game_start_ts - ? AND g.game_start_ts
+    """, (team.lower(), game_id, int(hours * 3600)))
+    
+    return cursor.fetchone()[0]
 
 
-def calculate_48h_average_price(game_id: int) -> float:
+@metrics.timed(metrics.DB_QUERY_SECONDS)
+def calculate_48h_average_price(game_id: int, team: str = DEFAULT_TEAM) -> Optional[float]:
     """Calculate the average price in the 48 hours leading up to game start.
     
     Args:
         game_id: Game ID
+        team: Team abbreviation whose perspective prices are returned from
         
     Returns:
         Average price in the 48 hours before game start, or None if insufficient data
     """
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
+    return calculate_window_average_price(game_id, team, 48)
+
+
+@metrics.timed(metrics.DB_QUERY_SECONDS)
+def get_price_histories(
+    game_ids: Optional[Iterable[int]] = None,
+    team: str = DEFAULT_TEAM,
+    hours: float = 48,
+    compact: bool = True,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    max_points: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Get the price history and window average of many games in one query.
     
-    # Get game info
-    cursor.execute("""
-        SELECT slug, game_start_utc FROM games WHERE id = ?
-    """, (game_id,))
-    game_row = cursor.fetchone()
-    if not game_row:
-        conn.close()
-        return None
+    Batch counterpart of get_price_history plus calculate_window_average_price.
+    The window average always covers the full window, whatever range of
+    points is returned.
     
-    slug = game_row['slug']
-    game_start_utc = game_row['game_start_utc']
-    # Parse game_start_utc which has format: 2025-10-22T23:30:00Z
-    game_start_dt = datetime.fromisoformat(game_start_utc.replace('Z', '+00:00'))
+    Args:
+        game_ids: Games to return (None returns every game of ``team``)
+        team: Team abbreviation whose perspective prices are returned from
+        hours: Window length before game start for 'avg_price'
+        compact: Return parallel 't' (epoch seconds) and 'p' (price) arrays
+            instead of a 'history' list of get_price_history dictionaries
+        start: Earliest timestamp to return (epoch seconds, inclusive)
+        end: Latest timestamp to return (epoch seconds, inclusive)
+        max_points: Most points per game, downsampled with LTTB
+        
+    Returns:
+        One dictionary per game (in game date order) with 'game_id',
+        'slug', 'game_date', 'game_start_utc', 'avg_price' and the history
+    """
+    team = team.lower()
+    params: Dict[str, Any] = {
+        "team": team,
+        "window": int(hours * 3600),
+        "start": start if start is not None else MIN_TIMESTAMP,
+        "end": end if end is not None else MAX_TIMESTAMP,
+    }
+    if game_ids is None:
+        where = "g.first_team = :team OR g.second_team = :team"
+    else:
+        where = "g.id IN (SELECT value FROM json_each(:ids))"
+        params["ids"] = json.dumps([int(game_id) for game_id in game_ids])
     
-    # Parse slug to determine if we need to invert prices
-    parts = slug.split('-')
-    is_phi_away = len(parts) >= 3 and parts[2].lower() == 'phi'
+    cursor = readers.connection().cursor()
+    cursor.execute(f"""
+        WITH selected AS (
+            SELECT g.id, g.slug, g.game_date, g.game_start_utc, g.second_team = :team AS inverted,
+                   (SELECT AVG(CASE WHEN g.second_team = :team THEN 100.0 - w.price ELSE w.price END)
+                    FROM price_history w
+                    WHERE w.game_id = g.id
+                      AND w.timestamp BETWEEN g.game_start_ts - :window AND g.game_start_ts) AS avg_price
+            FROM games g
+            WHERE {where}
+        )
+        SELECT s.id, s.slug, s.game_date, s.game_start_utc, s.avg_price,
+               ph.timestamp,
+               CASE WHEN s.inverted THEN 100.0 - ph.price ELSE ph.price END,
+               ph.timestamp_utc, ph.fidelity_minutes
+        FROM selected s
+        LEFT JOIN price_history ph
+          ON ph.game_id = s.id AND ph.timestamp BETWEEN :start AND :end
+        ORDER BY s.game_date ASC, s.id ASC, ph.timestamp ASC
+    """, params)
     
-    # Get all price history for this game
-    cursor.execute("""
-        SELECT timestamp_utc, price
-        FROM price_history
-        WHERE game_id = ?
-        ORDER BY timestamp_utc ASC
-    """, (game_id,))
+    games: List[Dict[str, Any]] = []
+    rows_by_game: List[List[tuple]] = []
+    for game_id, slug, game_date, game_start_utc, avg_price, *point in cursor:
+        if not games or games[-1]['game_id'] != game_id:
+            games.append({
+                'game_id': game_id,
+                'slug': slug,
+                'game_date': game_date,
+                'game_start_utc': game_start_utc,
+                'avg_price': avg_price,
+            })
+            rows_by_game.append([])
+        if point[0] is not None:
+            rows_by_game[-1].append(tuple(point))
     
-    prices_in_window = []
-    for row in cursor.fetchall():
-        timestamp_utc = row['timestamp_utc']
-        price = row['price']
-        
-        # Parse timestamp which has format: 2025-10-21 00:00:15 (no timezone)
-        # Treat as UTC
-        if 'T' in timestamp_utc:
-            # ISO format with potential Z
-            timestamp_dt = datetime.fromisoformat(timestamp_utc.replace('Z', '+00:00'))
+    for game, rows in zip(games, rows_by_game):
+        if max_points:
+            rows = downsample.lttb(rows, max_points)
+        if compact:
+            game['t'] = [row[0] for row in rows]
+            game['p'] = [row[1] for row in rows]
         else:
-            # Space-separated format, assume UTC
-            timestamp_dt = datetime.strptime(timestamp_utc, '%Y-%m-%d %H:%M:%S')
-            # Make timezone-aware (UTC)
-            from datetime import timezone
-            timestamp_dt = timestamp_dt.replace(tzinfo=timezone.utc)
-        
-        # Calculate hours before game start
-        hours_before_game = (game_start_dt - timestamp_dt).total_seconds() / 3600
-        
-        # Include prices from 48 hours to 0 hours before game start
-        if 0 <= hours_before_game <= 48:
-            # Invert price if PHI is away team
-            if is_phi_away:
-                price = 100.0 - price
-            prices_in_window.append(price)
-    
-    conn.close()
+            game['history'] = [
+                {'timestamp_utc': timestamp_utc, 'price': price, 'fidelity_minutes': fidelity_minutes}
+                for _, price, timestamp_utc, fidelity_minutes in rows
+            ]
     
-    if prices_in_window:
-        return sum(prices_in_window) / len(prices_in_window)
-    else:
-        return None
+    return games
 
 
-def get_final_price(game_id: int) -> Optional[float]:
+@metrics.timed(metrics.DB_QUERY_SECONDS)
+def get_final_price(game_id: int, team: str = DEFAULT_TEAM) -> Optional[float]:
     """Get the final price (most recent price in the price history series).
     
     Args:
         game_id: Game ID
+        team: Team abbreviation whose perspective prices are returned from
         
     Returns:
         Final price, or None if no data available
     """
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
+    cursor = readers.connection().cursor()
     
     # Get game info
     cursor.execute("""
@@ -274,94 +1093,162 @@ def get_final_price(game_id: int) -> Optional[float]:
     """, (game_id,))
     game_row = cursor.fetchone()
     if not game_row:
-        conn.close()
         return None
     
     slug = game_row['slug']
     
     # Parse slug to determine if we need to invert prices
-    parts = slug.split('-')
-    is_phi_away = len(parts) >= 3 and parts[2].lower() == 'phi'
+    invert = is_second_team(slug, team)
     
     # Get the most recent price (last in the series)
     cursor.execute("""
         SELECT price
         FROM price_history
         WHERE game_id = ?
-        ORDER BY timestamp_utc DESC
+        ORDER BY timestamp DESC
         LIMIT 1
     """, (game_id,))
     
     row = cursor.fetchone()
-    conn.close()
     
     if row:
         price = row['price']
-        # Invert price if PHI is away team
-        if is_phi_away:
+        # Invert price for the second team
+        if invert:
             price = 100.0 - price
         
-        # Clean up final price values
-        if price > 95:
-            price = 100.0
-        elif price < 1:
-            price = 0.0
-        
-        return price
+        return settle_final_price(price)
     
     return None
 
 
-def generate_game_analysis_dataset() -> List[Dict[str, Any]]:
+def settle_final_price(price: float) -> float:
+    """Clean up final price values (snap near-resolved markets to 0 or 100)."""
+    if price > 95:
+        return 100.0
+    if price < 1:
+        return 0.0
+    return price
+
+
+def calculate_roi(avg_48h: Optional[float], final_price: Optional[float]) -> Optional[float]:
+    """Calculate ROI for buying at the 48h average and holding to the final price."""
+    if avg_48h is None or final_price is None:
+        return None
+    # Assume binary outcome: final_price near 100 = win, near 0 = loss
+    # For simplicity, we'll use the actual final price as the outcome
+    # If game resolved (price at 0 or 100), calculate ROI
+    if final_price >= 99:
+        # Win: bought at avg_48h, value is now 100
+        return ((100 - avg_48h) / avg_48h) * 100
+    if final_price <= 1:
+        # Loss: bought at avg_48h, value is now 0
+        return -100.0
+    # Game not yet resolved or price in between
+    return ((final_price - avg_48h) / avg_48h) * 100
+
+
+@metrics.timed(metrics.DB_QUERY_SECONDS)
+def generate_game_analysis_dataset(team: str = DEFAULT_TEAM) -> List[Dict[str, Any]]:
     """Generate analysis dataset with game details, avg price, final price, and ROI.
     
+    Reads the materialized game_analysis rows, which the ingest paths keep
+    up to date, so no price history is scanned.
+    
+    Args:
+        team: Team abbreviation to analyze
+        
     Returns:
         List of game analysis dictionaries
     """
-    games = get_all_games()
-    analysis_data = []
+    cursor = readers.connection().cursor()
     
-    for game in games:
-        game_id = game['id']
-        avg_48h = calculate_48h_average_price(game_id)
-        final_price = get_final_price(game_id)
-        
-        # Calculate ROI
-        roi = None
-        if avg_48h is not None and final_price is not None:
-            # Assume binary outcome: final_price near 100 = win, near 0 = loss
-            # For simplicity, we'll use the actual final price as the outcome
-            # If game resolved (price at 0 or 100), calculate ROI
-            if final_price >= 99:
-                # Win: bought at avg_48h, value is now 100
-                roi = ((100 - avg_48h) / avg_48h) * 100
-            elif final_price <= 1:
-                # Loss: bought at avg_48h, value is now 0
-                roi = -100.0
-            else:
-                # Game not yet resolved or price in between
-                roi = ((final_price - avg_48h) / avg_48h) * 100
+    cursor.execute("""
+        SELECT g.id, g.game_date, g.slug, g.game_start_utc,
+               a.avg_48h_price, a.final_price, a.roi_percent
+        FROM games g
+        LEFT JOIN game_analysis a ON a.game_id = g.id AND a.team = :team
+        WHERE g.first_team = :team OR g.second_team = :team
+        ORDER BY g.game_date ASC, g.id ASC
+    """, {"team": team.lower()})
+    
+    return [
+        {
+            'game_id': game_id,
+            'game_date': game_date,
+            'slug': slug,
+            'game_start_utc': game_start_utc,
+            'avg_48h_price': avg_48h,
+            'final_price': final_price,
+            'roi_percent': roi
+        }
+        for game_id, game_date, slug, game_start_utc, avg_48h, final_price, roi in cursor.fetchall()
+    ]
+
+
+@metrics.timed(metrics.DB_QUERY_SECONDS)
+def compute_game_analysis_dataset(team: str = DEFAULT_TEAM) -> List[Dict[str, Any]]:
+    """Compute the analysis dataset directly from price history.
+    
+    All games are computed in one SQL statement: per game, the 48h window
+    average is a range scan over the (game_id, timestamp) index and the
+    final price is a single indexed lookup of the last row. Output matches
+    the original per-game Python computation row for row
+    (tests/test_game_analysis.py).
+    
+    Args:
+        team: Team abbreviation to analyze
         
+    Returns:
+        List of game analysis dictionaries
+    """
+    cursor = readers.connection().cursor()
+    
+    cursor.execute("""
+        SELECT g.id, g.game_date, g.slug, g.game_start_utc,
+               (
+                   SELECT AVG(CASE WHEN g.second_team = :team THEN 100.0 - ph.price ELSE ph.price END)
+                   FROM price_history ph
+                   WHERE ph.game_id = g.id
+                     AND ph.timestamp BETWEEN g.game_start_ts - :window AND g.game_start_ts
+               ) AS avg_price,
+               (
+                   SELECT CASE WHEN g.second_team = :team THEN 100.0 - ph.price ELSE ph.price END
+                   FROM price_history ph
+                   WHERE ph.game_id = g.id
+                   ORDER BY ph.timestamp DESC
+                   LIMIT 1
+               ) AS last_price
+        FROM games g
+        WHERE g.first_team = :team OR g.second_team = :team
+        ORDER BY g.game_date ASC, g.id ASC
+    """, {"team": team.lower(), "window": 48 * 3600})
+    
+    analysis_data = []
+    for game_id, game_date, slug, game_start_utc, avg_48h, last_price in cursor.fetchall():
+        final_price = settle_final_price(last_price) if last_price is not None else None
         analysis_data.append({
             'game_id': game_id,
-            'game_date': game['game_date'],
-            'slug': game['slug'],
-            'game_start_utc': game['game_start_utc'],
+            'game_date': game_date,
+            'slug': slug,
+            'game_start_utc': game_start_utc,
             'avg_48h_price': avg_48h,
             'final_price': final_price,
-            'roi_percent': roi
+            'roi_percent': calculate_roi(avg_48h, final_price)
         })
     
     return analysis_data
 
 
-def save_analysis_dataset_to_csv(output_path: str = "game_analysis.csv"):
+@metrics.timed(metrics.DB_QUERY_SECONDS)
+def save_analysis_dataset_to_csv(output_path: str = "game_analysis.csv", team: str = DEFAULT_TEAM):
     """Save game analysis dataset to CSV file.
     
     Args:
         output_path: Path to output CSV file
+        team: Team abbreviation to analyze
     """
-    analysis_data = generate_game_analysis_dataset()
+    analysis_data = generate_game_analysis_dataset(team)
     
     with open(output_path, 'w', newline='') as f:
         writer = csv.DictWriter(f, fieldnames=[
@@ -374,17 +1261,113 @@ def save_analysis_dataset_to_csv(output_path: str = "game_analysis.csv"):
     logger.info(f"Game analysis dataset saved to {output_path}")
 
 
-def run_backtest(initial_capital: float = 10000.0, bet_percentage: float = 0.02) -> List[Dict[str, Any]]:
+@metrics.timed(metrics.DB_QUERY_SECONDS)
+def get_team_price_points(team: str = DEFAULT_TEAM) -> List[tuple]:
+    """Get every price point of a team's games in one ordered scan.
+    
+    Args:
+        team: Team abbreviation whose perspective prices are returned from
+        
+    Returns:
+        Tuples of (game_id, game_date, slug, game_start_ts, timestamp, price),
+        ordered by game date, game and timestamp; games without prices
+        appear once with timestamp and price None
+    """
+    cursor = readers.connection().cursor()
+    cursor.execute("""
+        SELECT g.id, g.game_date, g.slug, g.game_start_ts, ph.timestamp,
+               CASE WHEN g.second_team = :team THEN 100.0 - ph.price ELSE ph.price END
+        FROM games g
+        LEFT JOIN price_history ph ON ph.game_id = g.id
+        WHERE g.first_team = :team OR g.second_team = :team
+        ORDER BY g.game_date ASC, g.id ASC, ph.timestamp ASC
+    """, {"team": team.lower()})
+    return [tuple(row) for row in cursor.fetchall()]
+
+
+@metrics.timed(metrics.DB_QUERY_SECONDS)
+def get_backtest_inputs(
+    team: str = DEFAULT_TEAM,
+    entry_windows: Iterable[float] = (48,)
+) -> List[Dict[str, Any]]:
+    """Get per-game entry prices for several windows plus the raw last price.
+    
+    One SQL statement computes, for every game of the team, the average
+    price over each pre-game window and the unsettled last price, all from
+    the team's perspective.
+    
+    Args:
+        team: Team abbreviation whose games are bet on
+        entry_windows: Window lengths in hours before game start
+        
+    Returns:
+        List of dictionaries with 'game_id', 'game_date', 'slug',
+        'entry_prices' (one per window, None without data) and 'last_price'
+    """
+    entry_windows = list(entry_windows)
+    params: Dict[str, Any] = {"team": team.lower()}
+    window_columns = []
+    for i, hours in enumerate(entry_windows):
+        params[f"window_{i}"] = int(hours * 3600)
+        window_columns.append(f"""
+               (
+                   SELECT AVG(CASE WHEN g.second_team = :team THEN 100.0 - ph.price ELSE ph.price END)
+                   FROM price_history ph
+                   WHERE ph.game_id = g.id
+                     AND ph.timestamp BETWEEN g.game_start_ts - :window_{i} AND g.game_start_ts
+               ),""")
+    
+    cursor = readers.connection().cursor()
+    cursor.execute(f"""
+        SELECT g.id, g.game_date, g.slug,{"".join(window_columns)}
+               (
+                   SELECT CASE WHEN g.second_team = :team THEN 100.0 - ph.price ELSE ph.price END
+                   FROM price_history ph
+                   WHERE ph.game_id = g.id
+                   ORDER BY ph.timestamp DESC
+                   LIMIT 1
+               )
+        FROM games g
+        WHERE g.first_team = :team OR g.second_team = :team
+        ORDER BY g.game_date ASC, g.id ASC
+    """, params)
+    
+    return [
+        {
+            'game_id': row[0],
+            'game_date': row[1],
+            'slug': row[2],
+            'entry_prices': list(row[3:-1]),
+            'last_price': row[-1]
+        }
+        for row in cursor.fetchall()
+    ]
+
+
+@metrics.timed(metrics.DB_QUERY_SECONDS)
+def run_backtest(
+    initial_capital: float = BACKTEST_INITIAL_CAPITAL,
+    bet_percentage: float = BACKTEST_BET_PERCENTAGE,
+    team: str = DEFAULT_TEAM,
+    strategy: Optional[Any] = None
+) -> List[Dict[str, Any]]:
     """Run backtest simulation betting fixed percentage of bankroll on each game.
     
     Args:
         initial_capital: Starting capital ($10,000 default)
         bet_percentage: Percentage of bankroll to bet on each game (2% default)
+        team: Team abbreviation whose games are bet on
+        strategy: Optional strategies.EntryStrategy; by default the whole bet
+            is placed at the materialized 48h average price
         
     Returns:
         List of backtest results with game info and running bankroll
     """
-    analysis_data = generate_game_analysis_dataset()
+    if strategy is not None:
+        import strategies
+        return strategies.run_backtest(strategy, team, initial_capital, bet_percentage)
+    
+    analysis_data = generate_game_analysis_dataset(team)
     
     # Filter out games without ROI data
     valid_games = [g for g in analysis_data if g['roi_percent'] is not None]
@@ -425,7 +1408,7 @@ if __name__ == "__main__":
     # Initialize and load data
     logging.basicConfig(level=logging.INFO)
     init_database()
-    load_csv_to_database("price_history/price_history_all.csv")
+    load_csv_to_database(os.path.join(OUTPUT_DIR, CONSOLIDATED_FILENAME))
     print("Database initialized and loaded successfully!")
     
     # Generate analysis dataset
@@ -0,0 +1,177 @@
+"""
+Shape-preserving downsampling of price series for charts.
+
+Largest-Triangle-Three-Buckets (LTTB) keeps the first and last points and,
+from each of ``max_points - 2`` equal buckets in between, the point that
+forms the largest triangle with the previously kept point and the average
+of the next bucket. Spikes and turns survive, flat stretches collapse.
+
+``LevelCache`` keeps precomputed coarse levels (every ``factor``-th
+resolution) per game and data version, so a chart request is a binary
+search into the smallest level that still has enough points in range plus
+one cheap LTTB pass.
+"""
+import bisect
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, List, Optional, Sequence, Tuple
+
+from config import DOWNSAMPLE_CACHE_GAMES, DOWNSAMPLE_LEVEL_FACTOR, DOWNSAMPLE_MIN_LEVEL_POINTS
+
+logger = logging.getLogger(__name__)
+
+Row = Tuple  # (timestamp, ...) rows sorted by timestamp
+
+
+def lttb_indices(xs: Sequence[float], ys: Sequence[float], max_points: int) -> List[int]:
+    """Pick the indices LTTB keeps.
+
+    Args:
+        xs: Strictly increasing x values (epoch seconds)
+        ys: Y values (prices)
+        max_points: Number of points to keep (at least 3 to downsample)
+
+    Returns:
+        Sorted indices into the series; every index when it already fits
+    """
+    n = len(xs)
+    if max_points >= n or n <= 2:
+        return list(range(n))
+    if max_points < 3:
+        return [0, n - 1][:max(max_points, 1)]
+
+    every = (n - 2) / (max_points - 2)
+    kept = [0]
+    a = 0
+    for i in range(max_points - 2):
+        # Average of the next bucket (the last point for the final bucket)
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, n)
+        count = avg_end - avg_start
+        avg_x = sum(xs[avg_start:avg_end]) / count
+        avg_y = sum(ys[avg_start:avg_end]) / count
+
+        ax, ay = xs[a], ys[a]
+        best, best_area = -1, -1.0
+        for j in range(int(i * every) + 1, int((i + 1) * every) + 1):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        kept.append(best)
+        a = best
+    kept.append(n - 1)
+    return kept
+
+
+def lttb(rows: Sequence[Row], max_points: int, price_index: int = 1) -> List[Row]:
+    """Downsample rows with LTTB.
+
+    Args:
+        rows: Rows sorted by timestamp (column 0)
+        max_points: Number of rows to keep
+        price_index: Column holding the y value
+
+    Returns:
+        The kept rows, in order
+    """
+    if len(rows) <= max_points:
+        return list(rows)
+    xs = [row[0] for row in rows]
+    ys = [row[price_index] for row in rows]
+    return [rows[i] for i in lttb_indices(xs, ys, max_points)]
+
+
+def build_levels(
+    rows: Sequence[Row],
+    factor: int = DOWNSAMPLE_LEVEL_FACTOR,
+    min_points: int = DOWNSAMPLE_MIN_LEVEL_POINTS,
+    price_index: int = 1
+) -> List[List[Row]]:
+    """Precompute coarse resolutions of a full series.
+
+    Args:
+        rows: Full series sorted by timestamp
+        factor: Each level keeps 1/factor of the previous level's points
+        min_points: Coarsest level size
+
+    Returns:
+        Levels from finest to coarsest, excluding the full series itself
+    """
+    levels = []
+    size = len(rows) // factor
+    while size >= min_points:
+        levels.append(lttb(rows, size, price_index))
+        size //= factor
+    return levels
+
+
+def select_from_levels(
+    levels: Sequence[Sequence[Row]],
+    start: int,
+    end: int,
+    max_points: int,
+    price_index: int = 1
+) -> Optional[List[Row]]:
+    """Downsample a time range using the coarsest level with enough points.
+
+    Args:
+        levels: Levels from finest to coarsest (see build_levels)
+        start: Range start (epoch seconds, inclusive)
+        end: Range end (epoch seconds, inclusive)
+        max_points: Points wanted
+
+    Returns:
+        Downsampled rows, or None if no level has ``max_points`` points in
+        range (the caller should fall back to the full-resolution rows)
+    """
+    for level in reversed(levels):
+        timestamps = [row[0] for row in level]
+        lo = bisect.bisect_left(timestamps, start)
+        hi = bisect.bisect_right(timestamps, end)
+        if hi - lo >= max_points:
+            return lttb(level[lo:hi], max_points, price_index)
+    return None
+
+
+class LevelCache:
+    """LRU cache of per-game downsampling levels."""
+
+    def __init__(self, max_games: int = DOWNSAMPLE_CACHE_GAMES):
+        """Initialize the cache.
+
+        Args:
+            max_games: Most games whose levels are kept
+        """
+        self.max_games = max_games
+        self._levels: "OrderedDict[Hashable, List[List[Row]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, load: Callable[[], Sequence[Row]]) -> List[List[Row]]:
+        """Get the levels for ``key``, building them from ``load()`` on a miss.
+
+        Args:
+            key: Identifies the series and its version, e.g. (game_id, data_version)
+            load: Returns the full series
+
+        Returns:
+            Levels from finest to coarsest
+        """
+        with self._lock:
+            levels = self._levels.get(key)
+            if levels is not None:
+                self._levels.move_to_end(key)
+                return levels
+
+        levels = build_levels(load())
+        with self._lock:
+            self._levels[key] = levels
+            while len(self._levels) > self.max_games:
+                self._levels.popitem(last=False)
+        logger.debug("Built downsampling levels", extra={"key": str(key), "levels": [len(l) for l in levels]})
+        return levels
+
+    def clear(self):
+        """Drop every cached level."""
+        with self._lock:
+            self._levels.clear()
@@ -0,0 +1,147 @@
+"""
+Content-addressed on-disk cache of Gamma and CLOB API responses.
+
+Responses are keyed by URL plus normalized query parameters. In ``record``
+mode the cache is read-through: fresh entries are served from disk and
+misses go to the network and are stored. In ``replay`` mode only the cache
+is consulted, so extraction runs are offline and deterministic.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import requests
+
+from config import HTTP_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+MODE_OFF = "off"
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+MODES = (MODE_OFF, MODE_RECORD, MODE_REPLAY)
+
+Params = Optional[Union[Dict[str, Any], Iterable[Tuple[str, Any]]]]
+
+
+def normalize_params(params: Params) -> List[Tuple[str, str]]:
+    """Turn query parameters into a sorted list of string pairs.
+
+    Args:
+        params: Query parameters as a dict or a sequence of pairs
+
+    Returns:
+        Sorted list of (name, value) string tuples
+    """
+    if not params:
+        return []
+    items = params.items() if isinstance(params, dict) else params
+    return sorted((str(k), str(v)) for k, v in items)
+
+
+def cache_key(url: str, params: Params) -> str:
+    """Compute the content address for a GET request.
+
+    Args:
+        url: Request URL without query string
+        params: Query parameters
+
+    Returns:
+        Hex SHA-256 digest identifying the request
+    """
+    canonical = json.dumps([url, normalize_params(params)], separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Record/replay cache for successful HTTP GET responses."""
+
+    def __init__(self, cache_dir: str = HTTP_CACHE_DIR, mode: str = MODE_RECORD):
+        """Initialize the response cache.
+
+        Args:
+            cache_dir: Directory holding cached responses
+            mode: 'record' (read-through) or 'replay' (cache only)
+        """
+        if mode not in (MODE_RECORD, MODE_REPLAY):
+            raise ValueError(f"Unsupported cache mode: {mode}")
+        self.cache_dir = cache_dir
+        self.mode = mode
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @property
+    def replay(self) -> bool:
+        """True if the network must never be used."""
+        return self.mode == MODE_REPLAY
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.response")
+
+    def get(self, url: str, params: Params = None) -> Optional[requests.Response]:
+        """Look up a cached response.
+
+        Expired entries are ignored in record mode but still served in
+        replay mode, where the recording is the source of truth.
+
+        Args:
+            url: Request URL without query string
+            params: Query parameters
+
+        Returns:
+            A requests.Response rebuilt from disk, or None on a miss
+        """
+        path = self._path(cache_key(url, params))
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            logger.warning("Unreadable cache entry", extra={"path": path})
+            return None
+
+        expires_at = entry.get("expires_at")
+        if not self.replay and expires_at is not None and time.time() >= expires_at:
+            logger.debug("Cache entry expired", extra={"url": url})
+            return None
+
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response._content = entry["body"].encode("utf-8")
+        response.encoding = "utf-8"
+        response.url = entry["url"]
+        response.headers["Content-Type"] = entry.get("content_type", "application/json")
+        response.headers["X-Cache"] = "HIT"
+        return response
+
+    def put(self, url: str, params: Params, response: requests.Response, ttl: Optional[float]):
+        """Store a successful response.
+
+        Args:
+            url: Request URL without query string
+            params: Query parameters
+            response: Response to store (only 200s are cached)
+            ttl: Seconds until the entry expires, or None to keep it forever
+        """
+        if response.status_code != 200:
+            return
+        now = time.time()
+        entry = {
+            "url": url,
+            "params": normalize_params(params),
+            "status": response.status_code,
+            "content_type": response.headers.get("Content-Type", "application/json"),
+            "body": response.text,
+            "stored_at": now,
+            "expires_at": None if ttl is None else now + ttl,
+        }
+        path = self._path(cache_key(url, params))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
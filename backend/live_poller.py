@@ -0,0 +1,400 @@
+"""
+Live price polling with Server-Sent Events fan-out.
+
+``LivePoller`` runs in the background on game days. Every
+``LIVE_POLL_INTERVAL_SECONDS`` it fetches the games currently inside
+their price window with one shared ``PolymarketClient``. It asks only for
+points newer than those already stored, writes them through a
+``database.DatabaseWriter``, and publishes them to an ``EventBroker``.
+Once a window has closed, one final successful settle poll marks the game
+complete, so later ``--incremental`` runs skip it. A failed poll is
+retried on the next interval.
+
+The broker keeps a bounded buffer of recent events. Every connected
+dashboard streams from that buffer, so adding clients never adds
+upstream requests or database reads. Clients that reconnect with
+``Last-Event-ID`` are caught up from the buffer.
+
+Run standalone (writes to the database without serving clients):
+    python live_poller.py --league --team phi
+    python live_poller.py --schedule live.json --gamma-base http://127.0.0.1:8001 \\
+        --clob-base http://127.0.0.1:8001
+"""
+import argparse
+import json
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional
+
+from config import (
+    CLOB_API_BASE,
+    GAMMA_API_BASE,
+    LIVE_EVENT_BUFFER,
+    LIVE_POLL_FIDELITY,
+    LIVE_POLL_INTERVAL_SECONDS,
+    LIVE_SSE_HEARTBEAT_SECONDS,
+    LOG_FORMAT,
+    LOG_LEVEL,
+    NBA_TEAMS,
+    SIXERS_GAMES,
+)
+import database
+from polymarket_client import PolymarketClient, price_window
+from schedule import games_for_team, load_league_schedule, parse_slug
+
+logger = logging.getLogger(__name__)
+
+
+class LiveEvent:
+    """One published event, encoded at most once per team perspective."""
+
+    def __init__(self, event_id: int, event_type: str, data: Dict[str, Any]):
+        self.id = event_id
+        self.type = event_type
+        self.data = data
+        self._encoded: Dict[Optional[str], str] = {}
+
+    def encode(self, team: Optional[str] = None) -> str:
+        """Format the event as an SSE message.
+
+        Price events carry first-team prices; for the second team they are
+        inverted so clients always receive their team's win probability.
+        """
+        message = self._encoded.get(team)
+        if message is None:
+            data = self.data
+            if team and data.get('second_team') == team and 'p' in data:
+                data = {**data, 'p': [round(100.0 - p, 2) for p in data['p']]}
+            payload = json.dumps(data, separators=(",", ":"))
+            message = f"id: {self.id}\nevent: {self.type}\ndata: {payload}\n\n"
+            self._encoded[team] = message
+        return message
+
+
+def price_event(slug: str, game_id: int, history: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Payload of a 'prices' event: new points of one game, first-team prices (0-100).
+
+    Args:
+        slug: Game slug
+        game_id: Database ID of the game
+        history: New CLOB points with 't' and 'p' (0-1)
+    """
+    teams = parse_slug(slug)
+    return {
+        "game_id": game_id,
+        "slug": slug,
+        "first_team": teams['first_team'],
+        "second_team": teams['second_team'],
+        "t": [int(entry['t']) for entry in history],
+        "p": [round(float(entry['p']) * 100, 2) for entry in history],
+    }
+
+
+class EventBroker:
+    """Bounded in-memory event log shared by every streaming client."""
+
+    def __init__(self, buffer_size: int = LIVE_EVENT_BUFFER):
+        """Initialize the broker.
+
+        Args:
+            buffer_size: Most recent events kept for reconnecting clients
+        """
+        self._events: "deque[LiveEvent]" = deque(maxlen=buffer_size)
+        self._last_id = 0
+        self._condition = threading.Condition()
+        self.subscribers = 0
+
+    @property
+    def last_id(self) -> int:
+        """ID of the newest event (0 before the first)."""
+        return self._last_id
+
+    def publish(self, event_type: str, data: Dict[str, Any]) -> LiveEvent:
+        """Append an event and wake every waiting client.
+
+        Args:
+            event_type: SSE event name
+            data: JSON-serializable payload
+
+        Returns:
+            The published event
+        """
+        with self._condition:
+            self._last_id += 1
+            event = LiveEvent(self._last_id, event_type, data)
+            self._events.append(event)
+            self._condition.notify_all()
+        return event
+
+    def wait(self, last_id: int, timeout: float) -> Optional[List[LiveEvent]]:
+        """Wait for events newer than ``last_id``.
+
+        Args:
+            last_id: Newest event the client has seen
+            timeout: Seconds to wait before returning empty-handed
+
+        Returns:
+            New events (possibly empty after a timeout), or None if events
+            after ``last_id`` have already left the buffer
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._last_id > last_id, timeout)
+            if self._last_id <= last_id:
+                return []
+            if self._events[0].id > last_id + 1:
+                return None
+            return [event for event in self._events if event.id > last_id]
+
+    def stream(
+        self,
+        team: Optional[str] = None,
+        last_id: Optional[int] = None,
+        heartbeat: float = LIVE_SSE_HEARTBEAT_SECONDS
+    ) -> Iterator[str]:
+        """Yield SSE messages for one client until it disconnects.
+
+        Args:
+            team: Team perspective for prices
+            last_id: Last-Event-ID sent by a reconnecting client (None
+                streams only events published from now on)
+            heartbeat: Seconds between keep-alive comments on an idle stream
+        """
+        last_id = self._last_id if last_id is None else last_id
+        with self._condition:
+            self.subscribers += 1
+        try:
+            yield f"retry: {int(heartbeat * 1000)}\n\n"
+            while True:
+                events = self.wait(last_id, heartbeat)
+                if events is None:
+                    # The client missed events; tell it to reload from the API
+                    last_id = self._last_id
+                    yield f"id: {last_id}\nevent: reset\ndata: {{}}\n\n"
+                elif not events:
+                    yield ": keep-alive\n\n"
+                else:
+                    for event in events:
+                        yield event.encode(team)
+                    last_id = events[-1].id
+        finally:
+            with self._condition:
+                self.subscribers -= 1
+
+
+class LivePoller:
+    """Background poller for games inside their price window."""
+
+    def __init__(
+        self,
+        games: List[Dict[str, Any]],
+        client: Optional[PolymarketClient] = None,
+        broker: Optional[EventBroker] = None,
+        interval: float = LIVE_POLL_INTERVAL_SECONDS,
+        fidelity: int = LIVE_POLL_FIDELITY
+    ):
+        """Initialize the poller.
+
+        Args:
+            games: Schedule entries with 'slug' and 'start_iso'
+            client: Polymarket client shared by every poll
+            broker: Receives a 'prices' event per game that gained points
+            interval: Seconds between polls
+            fidelity: Minutes between fetched points
+        """
+        self.games = games
+        self.client = client or PolymarketClient()
+        self.broker = broker or EventBroker()
+        self.interval = interval
+        self.fidelity = fidelity
+        self.polls = 0
+        self.points_written = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._writer: Optional[database.DatabaseWriter] = None
+        self._last_timestamps: Dict[str, Optional[int]] = {}
+        self._closed: set = set()
+
+    def _open(self):
+        """Open the writer and load what is already stored."""
+        # Flushed explicitly after every poll so new points are published at once
+        self._writer = database.DatabaseWriter(
+            batch_points=float('inf'), flush_interval=float('inf'), fidelity_minutes=self.fidelity
+        )
+        for state in database.get_sync_state().values():
+            self._last_timestamps[state['slug']] = state['last_timestamp']
+            if state['complete']:
+                self._closed.add(state['slug'])
+        database.close_connections()
+
+    def active_games(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Games whose price window has opened and that are not yet fully stored.
+
+        This includes games whose window has closed but which have not yet
+        had a successful settle poll.
+        """
+        now = time.time() if now is None else now
+        active = []
+        for game in self.games:
+            if game['slug'] in self._closed:
+                continue
+            start_ts, _ = price_window(game['start_iso'])
+            if start_ts <= now:
+                active.append(game)
+        return active
+
+    def poll_once(self, now: Optional[float] = None) -> int:
+        """Fetch, store and publish new points for every active game.
+
+        Args:
+            now: Current Unix time (defaults to the clock)
+
+        Returns:
+            Number of new points written
+        """
+        if self._writer is None:
+            self._open()
+        now = time.time() if now is None else now
+        active = self.active_games(now)
+        self.client.resolve_markets([game['slug'] for game in active])
+
+        fetched: Dict[str, List[Dict[str, Any]]] = {}
+        settled = []
+        for game in active:
+            slug = game['slug']
+            token_id = self.client.get_token_id_from_slug(slug)
+            if not token_id:
+                continue
+            last_ts = self._last_timestamps.get(slug)
+            history = self.client.get_price_history(
+                token_id, game['start_iso'], since_ts=last_ts, fidelity=self.fidelity
+            )
+            if history is None:
+                logger.warning("Live fetch failed", extra={"slug": slug})
+                continue
+            if last_ts is not None:
+                history = [entry for entry in history if entry['t'] > last_ts]
+
+            # Points up to the window end are final one fidelity step later;
+            # a successful poll after that settles the game
+            _, window_end = price_window(game['start_iso'])
+            complete = now >= window_end + self.fidelity * 60
+            if history or complete:
+                self._writer.write_game(
+                    slug=slug,
+                    game_date=game['start_iso'][:10],
+                    game_start_iso=game['start_iso'],
+                    token_id=token_id,
+                    history=history,
+                    complete=complete
+                )
+            if history:
+                fetched[slug] = history
+            if complete:
+                settled.append(slug)
+
+        changed = self._writer.flush()
+        # Only stored points move the high-water marks; after a failed flush
+        # the same points are fetched again
+        for slug, history in fetched.items():
+            self._last_timestamps[slug] = max(entry['t'] for entry in history)
+        self._closed.update(settled)
+        points = 0
+        for slug, game_id in changed.items():
+            history = fetched[slug]
+            self.broker.publish("prices", price_event(slug, game_id, history))
+            points += len(history)
+
+        self.polls += 1
+        self.points_written += points
+        logger.info(
+            "Live poll finished",
+            extra={"active": len(active), "games_updated": len(changed), "points": points}
+        )
+        return points
+
+    def run(self):
+        """Poll until stop() is called."""
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.poll_once()
+            except Exception:
+                logger.exception("Live poll failed")
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+        self.close()
+
+    def close(self):
+        """Flush and close the database writer."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        database.close_connections()
+
+    def start(self) -> "LivePoller":
+        """Start polling on a daemon thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="live-poller", daemon=True)
+        self._thread.start()
+        logger.info("Live poller started", extra={"games": len(self.games), "interval": self.interval})
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop polling and wait for the current poll to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Add the live poller options to a command-line parser."""
+    parser.add_argument("--schedule", metavar="PATH",
+                        help="League schedule JSON to poll (default: configured schedule)")
+    parser.add_argument("--league", action="store_true",
+                        help="Poll the league schedule instead of SIXERS_GAMES")
+    parser.add_argument("--team", help="Only poll this team's games (implies --league)")
+    parser.add_argument("--interval", type=float, default=LIVE_POLL_INTERVAL_SECONDS,
+                        help="Seconds between polls")
+    parser.add_argument("--fidelity", type=int, default=LIVE_POLL_FIDELITY,
+                        help="Minutes between fetched points")
+    parser.add_argument("--gamma-base", default=GAMMA_API_BASE, help="Gamma API base URL")
+    parser.add_argument("--clob-base", default=CLOB_API_BASE, help="CLOB API base URL")
+
+
+def build_poller(args: argparse.Namespace, broker: Optional[EventBroker] = None) -> LivePoller:
+    """Create a poller from parsed add_arguments options."""
+    if args.schedule:
+        games = load_league_schedule(args.schedule)
+    elif args.league or args.team:
+        games = load_league_schedule(teams=NBA_TEAMS)
+    else:
+        games = list(SIXERS_GAMES)
+    if args.team:
+        games = games_for_team(games, args.team)
+    client = PolymarketClient(gamma_base=args.gamma_base, clob_base=args.clob_base)
+    return LivePoller(games, client=client, broker=broker, interval=args.interval, fidelity=args.fidelity)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Poll live prices for games in their window.")
+    add_arguments(parser)
+    parser.add_argument("--once", action="store_true", help="Poll once and exit")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=LOG_LEVEL, format=LOG_FORMAT)
+    poller = build_poller(args)
+    try:
+        if args.once:
+            poller.poll_once()
+        else:
+            poller.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        poller.close()
+
+
+if __name__ == "__main__":
+    main()
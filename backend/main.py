@@ -4,59 +4,601 @@ Main script for extracting Sixers price history from Polymarket.
 This script fetches historical pricing data for Philadelphia 76ers games
 from the Polymarket prediction markets and saves them to CSV files.
 """
+import argparse
 import logging
 import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
 
-from config import SIXERS_GAMES, LOG_LEVEL, LOG_FORMAT, REQUEST_DELAY_SECONDS
-from polymarket_client import PolymarketClient
+from config import (
+    SIXERS_GAMES,
+    GAMMA_API_BASE,
+    CLOB_API_BASE,
+    LOG_LEVEL,
+    LOG_FORMAT,
+    REQUEST_DELAY_SECONDS,
+    CONSOLIDATED_FORMAT,
+    COLUMNAR_PARTITION_BY,
+    HTTP_CACHE_MODE,
+    HTTP_CACHE_DIR,
+    EXTRACTION_WORKERS,
+    EXTRACTION_MAX_IN_FLIGHT,
+    RATE_LIMIT_REQUESTS_PER_SECOND,
+    RATE_LIMIT_BURST,
+    PRICE_FIDELITY,
+    METRICS_DUMP_PATH,
+    NBA_TEAMS,
+)
+import database
+import metrics
+from polymarket_client import PolymarketClient, price_window
 from data_writer import PriceHistoryWriter
+from http_cache import MODE_OFF, MODES, ResponseCache
+from market_cache import MarketCache
+from rate_limiter import TokenBucket
+from schedule import games_for_team, load_league_schedule, shard_games
 
 # Configure logging
 logging.basicConfig(level=LOG_LEVEL, format=LOG_FORMAT)
 logger = logging.getLogger(__name__)
 
 
-def run_extraction():
-    """Extract price history for all Sixers games."""
-    logger.info("Starting Sixers Price History Extraction", extra={"games": len(SIXERS_GAMES)})
-    
-    client = PolymarketClient()
-    writer = PriceHistoryWriter()
-    
-    for game in SIXERS_GAMES:
-        slug = game['slug']
-        logger.info("Processing game", extra={"slug": slug})
-        
-        # Step 1: Get token ID from slug
-        token_id = client.get_token_id_from_slug(slug)
-        if not token_id:
-            logger.warning("No token id resolved", extra={"slug": slug})
-            continue
-        
-        logger.info("Token ID", extra={"token_id": token_id})
-        
-        # Step 2: Get price history
+def fetch_game(
+    client: PolymarketClient,
+    game: Dict[str, str],
+    sync_state: Optional[Dict[str, Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """Resolve a game's token ID and fetch its price history.
+
+    Args:
+        client: Polymarket API client
+        game: Schedule entry with 'slug' and 'start_iso'
+        sync_state: Latest stored timestamp per token (from
+            database.get_sync_state); when given, only points newer than
+            the stored ones are fetched and returned
+
+    Returns:
+        Dictionary with the game, its token ID (or None) and price history
+    """
+    slug = game['slug']
+    incremental = sync_state is not None
+    logger.info("Processing game", extra={"slug": slug})
+
+    # Step 1: Get token ID from slug
+    token_id = client.get_token_id_from_slug(slug)
+    if not token_id:
+        logger.warning("No token id resolved", extra={"slug": slug})
+        return {"game": game, "token_id": None, "history": [], "incremental": incremental}
+
+    logger.info("Token ID", extra={"token_id": token_id})
+
+    # Step 2: Get price history
+    if not incremental:
         history = client.get_price_history(token_id, game['start_iso'])
-        
-        # Step 3: Write to CSV
-        if history:
-            game_date = game['start_iso'][:10]
-            writer.write_price_history(slug, game_date, history)
-            writer.write_consolidated_history(
-                slug=slug,
-                game_date=game_date,
-                game_start_iso=game['start_iso'],
-                token_id=token_id,
-                history=history
+        return {"game": game, "token_id": token_id, "history": history or [], "incremental": False}
+
+    last_ts = sync_state.get(token_id, {}).get('last_timestamp')
+    _, window_end = price_window(game['start_iso'])
+    window_closed = time.time() >= window_end + PRICE_FIDELITY * 60
+    history = client.get_price_history(token_id, game['start_iso'], since_ts=last_ts)
+    if history is None:
+        # A failed request says nothing about the tail; retry on the next run
+        logger.warning("Incremental fetch failed", extra={"slug": slug, "since": last_ts})
+        return {"game": game, "token_id": token_id, "history": [], "incremental": True, "complete": False}
+    # Everything fetched successfully after the window has closed (plus one
+    # fidelity step of slack) is final, so the game never needs fetching again.
+    complete = window_closed
+    if last_ts is not None:
+        history = [entry for entry in history if entry['t'] > last_ts]
+    logger.info("Incremental fetch", extra={"slug": slug, "since": last_ts, "new_points": len(history)})
+    return {
+        "game": game,
+        "token_id": token_id,
+        "history": history,
+        "incremental": True,
+        "complete": complete,
+    }
+
+
+def write_game(writers: List[Any], result: Dict[str, Any]):
+    """Hand a fetched game's price history to every output writer.
+
+    Writers are a PriceHistoryWriter (CSV export) and/or a
+    database.DatabaseWriter (streaming SQLite ingestion); both expose a
+    write_game method. Only the CSV export is told whether the history is
+    partial, since database merges are always idempotent.
+
+    Args:
+        writers: Output writers
+        result: Result returned by fetch_game
+    """
+    game = result['game']
+    slug = game['slug']
+    token_id = result['token_id']
+    history = result['history']
+    if not token_id:
+        return
+
+    # Step 3: Write to the configured outputs
+    if not history and not result.get('incremental'):
+        logger.warning("No price history found", extra={"slug": slug, "token_id": token_id})
+        return
+
+    for writer in writers:
+        options = {}
+        if isinstance(writer, PriceHistoryWriter):
+            options['incremental'] = result.get('incremental', False)
+        writer.write_game(
+            slug=slug,
+            game_date=game['start_iso'][:10],
+            game_start_iso=game['start_iso'],
+            token_id=token_id,
+            history=history,
+            complete=result.get('complete', False),
+            **options
+        )
+
+
+def prepare_writers(writers: Optional[List[Any]], incremental: bool) -> List[Any]:
+    """Default to CSV output and make sure incremental runs update the database.
+
+    Incremental runs read their sync state from the database, so a
+    DatabaseWriter is always added to keep that state current.
+    """
+    writers = list(writers) if writers else [PriceHistoryWriter()]
+    if incremental and not any(isinstance(w, database.DatabaseWriter) for w in writers):
+        writers.append(database.DatabaseWriter())
+    return writers
+
+
+def close_writers(writers: List[Any]):
+    """Flush and close every output writer."""
+    for writer in writers:
+        writer.close()
+
+
+def log_throughput(
+    games: int,
+    elapsed: float,
+    requests_made: int,
+    endpoint_stats: Dict[str, Dict[str, Any]]
+):
+    """Log games/sec, requests/sec and per-endpoint stats for a finished run."""
+    elapsed = max(elapsed, 1e-9)
+    logger.info(
+        "Extraction complete: %d games, %d requests in %.2fs (%.2f games/sec, %.2f requests/sec)",
+        games, requests_made, elapsed, games / elapsed, requests_made / elapsed,
+        extra={
+            "games": games,
+            "requests": requests_made,
+            "elapsed_seconds": elapsed,
+            "games_per_second": games / elapsed,
+            "requests_per_second": requests_made / elapsed,
+        }
+    )
+    for endpoint, stats in endpoint_stats.items():
+        logger.info(
+            "%s: %d requests, %d retries, %d errors, avg %.1fms, max %.1fms",
+            endpoint, stats["requests"], stats["retries"], stats["errors"],
+            stats["avg_latency_ms"], stats["max_latency_ms"],
+            extra={"endpoint": endpoint, **stats}
+        )
+
+
+def load_sync_state(games: List[Dict[str, str]]):
+    """Load incremental sync state and drop games that are fully fetched.
+
+    Args:
+        games: Schedule entries
+
+    Returns:
+        Tuple of (sync state per token, games that still need fetching)
+    """
+    database.init_database()
+    sync_state = database.get_sync_state()
+    closed = {state['slug'] for state in sync_state.values() if state['complete']}
+    remaining = [game for game in games if game['slug'] not in closed]
+    logger.info(
+        "Incremental mode: skipping %d closed games",
+        len(games) - len(remaining),
+        extra={"closed": len(games) - len(remaining), "remaining": len(remaining)}
+    )
+    return sync_state, remaining
+
+
+def merge_endpoint_stats(stats_list: List[Dict[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """Combine per-endpoint stats collected by several clients."""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for client_stats in stats_list:
+        for endpoint, stats in client_stats.items():
+            total = merged.setdefault(endpoint, {
+                "requests": 0, "retries": 0, "errors": 0, "rejected": 0,
+                "cache_hits": 0, "cache_misses": 0,
+                "avg_latency_ms": 0.0, "max_latency_ms": 0.0,
+            })
+            requests_before = total["requests"]
+            for key in ("requests", "retries", "errors", "rejected", "cache_hits", "cache_misses"):
+                total[key] += stats[key]
+            if total["requests"]:
+                total["avg_latency_ms"] = round(
+                    (total["avg_latency_ms"] * requests_before
+                     + stats["avg_latency_ms"] * stats["requests"]) / total["requests"], 2
+                )
+            total["max_latency_ms"] = max(total["max_latency_ms"], stats["max_latency_ms"])
+    return merged
+
+
+def run_extraction(
+    games: Optional[List[Dict[str, str]]] = None,
+    market_cache: Optional[MarketCache] = None,
+    incremental: bool = False,
+    response_cache: Optional[ResponseCache] = None,
+    writers: Optional[List[Any]] = None,
+    gamma_base: str = GAMMA_API_BASE,
+    clob_base: str = CLOB_API_BASE,
+):
+    """Extract price history for all Sixers games.
+
+    Args:
+        games: Schedule entries to extract (defaults to SIXERS_GAMES)
+        market_cache: Optional persistent slug -> market cache
+        incremental: Only fetch points newer than those already stored
+        response_cache: Optional record/replay HTTP response cache
+        writers: Output writers (defaults to a CSV PriceHistoryWriter)
+        gamma_base: Gamma API base URL
+        clob_base: CLOB API base URL
+    """
+    games = SIXERS_GAMES if games is None else games
+    logger.info("Starting Sixers Price History Extraction", extra={"games": len(games)})
+
+    sync_state = None
+    if incremental:
+        sync_state, games = load_sync_state(games)
+
+    client = PolymarketClient(
+        market_cache=market_cache,
+        response_cache=response_cache,
+        gamma_base=gamma_base,
+        clob_base=clob_base
+    )
+    writers = prepare_writers(writers, incremental)
+    started = time.monotonic()
+    replay = response_cache is not None and response_cache.replay
+
+    for game in games:
+        write_game(writers, fetch_game(client, game, sync_state))
+
+        # Rate limiting (nothing to limit when replaying from the cache)
+        if not replay:
+            time.sleep(REQUEST_DELAY_SECONDS)
+
+    close_writers(writers)
+    log_throughput(len(games), time.monotonic() - started, client.request_count, client.get_stats())
+    client.close()
+
+
+def run_concurrent_extraction(
+    games: Optional[List[Dict[str, str]]] = None,
+    workers: int = EXTRACTION_WORKERS,
+    max_in_flight: int = EXTRACTION_MAX_IN_FLIGHT,
+    requests_per_second: float = RATE_LIMIT_REQUESTS_PER_SECOND,
+    burst: int = RATE_LIMIT_BURST,
+    market_cache: Optional[MarketCache] = None,
+    incremental: bool = False,
+    response_cache: Optional[ResponseCache] = None,
+    writers: Optional[List[Any]] = None,
+    gamma_base: str = GAMMA_API_BASE,
+    clob_base: str = CLOB_API_BASE,
+):
+    """Extract price history for many games using a worker pool.
+
+    All workers share one token-bucket limiter instead of sleeping between
+    games. Results are written in schedule order regardless of the order
+    in which fetches complete. All slugs are resolved up front with bulk
+    Gamma requests (or from the market cache) before workers start.
+
+    Args:
+        games: Schedule entries to extract (defaults to SIXERS_GAMES)
+        workers: Number of worker threads
+        max_in_flight: Maximum games fetched but not yet written
+        requests_per_second: Aggregate request rate across all workers
+        burst: Token-bucket capacity
+        market_cache: Optional persistent slug -> market cache
+        incremental: Only fetch points newer than those already stored
+        response_cache: Optional record/replay HTTP response cache
+        writers: Output writers (defaults to a CSV PriceHistoryWriter)
+        gamma_base: Gamma API base URL
+        clob_base: CLOB API base URL
+    """
+    games = SIXERS_GAMES if games is None else games
+    sync_state = None
+    if incremental:
+        sync_state, games = load_sync_state(games)
+    max_in_flight = max(1, max_in_flight)
+    logger.info(
+        "Starting concurrent extraction",
+        extra={"games": len(games), "workers": workers, "max_in_flight": max_in_flight}
+    )
+
+    client = PolymarketClient(
+        rate_limiter=TokenBucket(requests_per_second, burst),
+        market_cache=market_cache,
+        response_cache=response_cache,
+        gamma_base=gamma_base,
+        clob_base=clob_base
+    )
+    writers = prepare_writers(writers, incremental)
+    started = time.monotonic()
+    pending = deque()
+
+    # Warm the client with every market at once instead of one Gamma call per game
+    client.resolve_markets([game['slug'] for game in games])
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for game in games:
+            if len(pending) >= max_in_flight:
+                write_game(writers, pending.popleft().result())
+            pending.append(executor.submit(fetch_game, client, game, sync_state))
+
+        while pending:
+            write_game(writers, pending.popleft().result())
+
+    close_writers(writers)
+    log_throughput(len(games), time.monotonic() - started, client.request_count, client.get_stats())
+    client.close()
+
+
+def _fetch_shard(
+    games: List[Dict[str, str]],
+    sync_state: Optional[Dict[str, Dict[str, Any]]],
+    workers: int,
+    requests_per_second: float,
+    burst: int,
+    use_market_cache: bool,
+    http_cache_mode: str,
+    http_cache_dir: str,
+    gamma_base: str = GAMMA_API_BASE,
+    clob_base: str = CLOB_API_BASE,
+) -> Dict[str, Any]:
+    """Fetch one shard of games inside a worker process.
+
+    Caches are opened by path inside the process because database
+    connections cannot be shared across processes. Metrics recorded here
+    are returned for the parent to merge.
+    """
+    metrics.REGISTRY.clear()
+    response_cache = None
+    if http_cache_mode != MODE_OFF:
+        response_cache = ResponseCache(http_cache_dir, mode=http_cache_mode)
+    client = PolymarketClient(
+        rate_limiter=TokenBucket(requests_per_second, burst),
+        market_cache=MarketCache() if use_market_cache else None,
+        response_cache=response_cache,
+        gamma_base=gamma_base,
+        clob_base=clob_base
+    )
+    client.resolve_markets([game['slug'] for game in games])
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda game: fetch_game(client, game, sync_state), games))
+    client.close()
+    return {
+        "results": results,
+        "requests": client.request_count,
+        "stats": client.get_stats(),
+        "metrics": metrics.REGISTRY.snapshot(),
+    }
+
+
+def run_sharded_extraction(
+    games: List[Dict[str, str]],
+    processes: int,
+    workers: int = EXTRACTION_WORKERS,
+    requests_per_second: float = RATE_LIMIT_REQUESTS_PER_SECOND,
+    burst: int = RATE_LIMIT_BURST,
+    use_market_cache: bool = True,
+    incremental: bool = False,
+    http_cache_mode: str = MODE_OFF,
+    http_cache_dir: str = HTTP_CACHE_DIR,
+    writers: Optional[List[Any]] = None,
+    gamma_base: str = GAMMA_API_BASE,
+    clob_base: str = CLOB_API_BASE,
+):
+    """Extract many games by splitting the schedule across worker processes.
+
+    Each process fetches one hash-partitioned shard with its own thread
+    pool; the request rate is divided evenly between processes. Fetched
+    results come back to this process and are written in schedule order.
+
+    Args:
+        games: Deduplicated schedule entries
+        processes: Number of worker processes (shards)
+        workers: Worker threads per process
+        requests_per_second: Aggregate request rate across all processes
+        burst: Token-bucket capacity per process
+        use_market_cache: Use the on-disk market cache
+        incremental: Only fetch points newer than those already stored
+        http_cache_mode: 'off', 'record' or 'replay'
+        http_cache_dir: Directory holding recorded API responses
+        writers: Output writers (defaults to a CSV PriceHistoryWriter)
+        gamma_base: Gamma API base URL
+        clob_base: CLOB API base URL
+    """
+    sync_state = None
+    if incremental:
+        sync_state, games = load_sync_state(games)
+    processes = max(1, processes)
+    logger.info(
+        "Starting sharded extraction",
+        extra={"games": len(games), "processes": processes, "workers": workers}
+    )
+
+    writers = prepare_writers(writers, incremental)
+    started = time.monotonic()
+    order = {game['slug']: i for i, game in enumerate(games)}
+    results: List[Dict[str, Any]] = []
+    requests_made = 0
+    stats_list = []
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [
+            executor.submit(
+                _fetch_shard,
+                shard_games(games, index, processes),
+                sync_state,
+                workers,
+                requests_per_second / processes,
+                burst,
+                use_market_cache,
+                http_cache_mode,
+                http_cache_dir,
+                gamma_base,
+                clob_base,
             )
-        else:
-            logger.warning("No price history found", extra={"slug": slug, "token_id": token_id})
-        
-        # Rate limiting
-        time.sleep(REQUEST_DELAY_SECONDS)
-    
-    logger.info("Extraction complete")
+            for index in range(processes)
+        ]
+        for future in futures:
+            shard = future.result()
+            results.extend(shard["results"])
+            requests_made += shard["requests"]
+            stats_list.append(shard["stats"])
+            metrics.REGISTRY.merge(shard["metrics"])
+
+    for result in sorted(results, key=lambda r: order[r['game']['slug']]):
+        write_game(writers, result)
+
+    close_writers(writers)
+    log_throughput(len(games), time.monotonic() - started, requests_made, merge_endpoint_stats(stats_list))
+
+
+def select_games(league: bool, team: Optional[str], shard: Optional[str]) -> List[Dict[str, Any]]:
+    """Choose the schedule entries for a run.
+
+    Args:
+        league: Use the deduplicated league schedule instead of SIXERS_GAMES
+        team: Restrict the league schedule to one team's games
+        shard: Optional 'INDEX/COUNT' selecting one shard of the schedule
+
+    Returns:
+        Schedule entries to extract
+    """
+    games = load_league_schedule(teams=NBA_TEAMS) if (league or team) else list(SIXERS_GAMES)
+    if team:
+        games = games_for_team(games, team)
+    if shard:
+        index, count = (int(part) for part in shard.split('/'))
+        games = shard_games(games, index, count)
+    return games
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Extract Polymarket price history.")
+    parser.add_argument("--concurrent", action="store_true",
+                        help="Fetch games with a worker pool and shared rate limiter")
+    parser.add_argument("--league", action="store_true",
+                        help="Extract the deduplicated league schedule instead of SIXERS_GAMES")
+    parser.add_argument("--team", help="Only extract games for this team (implies --league)")
+    parser.add_argument("--shard", metavar="INDEX/COUNT",
+                        help="Only extract one hash-partitioned shard of the schedule, e.g. 0/4")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="Split the schedule across this many worker processes")
+    parser.add_argument("--sink", action="append", choices=("csv", "db"),
+                        help="Output to write (repeatable): CSV export and/or streaming "
+                             "SQLite ingestion (default: csv)")
+    parser.add_argument("--consolidated-format", choices=("csv", "columnar"), default=CONSOLIDATED_FORMAT,
+                        help="Append to price_history_all.csv or upsert into the columnar store")
+    parser.add_argument("--partition-by", choices=("date", "team"), default=COLUMNAR_PARTITION_BY,
+                        help="Columnar store partitioning")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Fetch only new points and merge them into the CSVs and database")
+    parser.add_argument("--workers", type=int, default=EXTRACTION_WORKERS,
+                        help="Worker threads in concurrent mode")
+    parser.add_argument("--max-in-flight", type=int, default=EXTRACTION_MAX_IN_FLIGHT,
+                        help="Maximum games fetched but not yet written")
+    parser.add_argument("--rate", type=float, default=RATE_LIMIT_REQUESTS_PER_SECOND,
+                        help="Requests per second shared by all workers")
+    parser.add_argument("--burst", type=int, default=RATE_LIMIT_BURST,
+                        help="Token-bucket burst size")
+    parser.add_argument("--no-market-cache", action="store_true",
+                        help="Resolve every slug through Gamma without the on-disk market cache")
+    parser.add_argument("--refresh-markets", action="store_true",
+                        help="Clear the market cache before running")
+    parser.add_argument("--invalidate-market", action="append", default=[], metavar="SLUG",
+                        help="Drop a slug from the market cache before running (repeatable)")
+    parser.add_argument("--http-cache", choices=MODES, default=HTTP_CACHE_MODE,
+                        help="Record API responses to disk, or replay them without the network")
+    parser.add_argument("--http-cache-dir", default=HTTP_CACHE_DIR,
+                        help="Directory holding recorded API responses")
+    parser.add_argument("--gamma-base", default=GAMMA_API_BASE, help="Gamma API base URL")
+    parser.add_argument("--clob-base", default=CLOB_API_BASE, help="CLOB API base URL")
+    parser.add_argument("--metrics-file", default=METRICS_DUMP_PATH,
+                        help="Where to write run metrics (Prometheus text format)")
+    args = parser.parse_args(argv)
+    args.sink = args.sink or ["csv"]
+    return args
 
 
 if __name__ == "__main__":
-    run_extraction()
\ No newline at end of file
+    args = parse_args()
+    market_cache = None if args.no_market_cache else MarketCache()
+    if market_cache is not None:
+        if args.refresh_markets:
+            market_cache.clear()
+        elif args.invalidate_market:
+            market_cache.invalidate(args.invalidate_market)
+    response_cache = None
+    if args.http_cache != MODE_OFF:
+        response_cache = ResponseCache(args.http_cache_dir, mode=args.http_cache)
+
+    games = select_games(args.league, args.team, args.shard)
+    writers = []
+    if "csv" in args.sink:
+        writers.append(PriceHistoryWriter(
+            consolidated_format=args.consolidated_format,
+            partition_by=args.partition_by
+        ))
+    if "db" in args.sink:
+        writers.append(database.DatabaseWriter())
+
+    if args.processes > 1:
+        run_sharded_extraction(
+            games,
+            processes=args.processes,
+            workers=args.workers,
+            requests_per_second=args.rate,
+            burst=args.burst,
+            use_market_cache=market_cache is not None,
+            incremental=args.incremental,
+            http_cache_mode=args.http_cache,
+            http_cache_dir=args.http_cache_dir,
+            writers=writers,
+            gamma_base=args.gamma_base,
+            clob_base=args.clob_base,
+        )
+    elif args.concurrent:
+        run_concurrent_extraction(
+            games=games,
+            workers=args.workers,
+            max_in_flight=args.max_in_flight,
+            requests_per_second=args.rate,
+            burst=args.burst,
+            market_cache=market_cache,
+            incremental=args.incremental,
+            response_cache=response_cache,
+            writers=writers,
+            gamma_base=args.gamma_base,
+            clob_base=args.clob_base,
+        )
+    else:
+        run_extraction(
+            games=games,
+            market_cache=market_cache,
+            incremental=args.incremental,
+            response_cache=response_cache,
+            writers=writers,
+            gamma_base=args.gamma_base,
+            clob_base=args.clob_base,
+        )
+    if metrics.REGISTRY.enabled:
+        metrics.dump(args.metrics_file)
@@ -0,0 +1,177 @@
+"""
+Persistent cache of resolved Polymarket markets keyed by slug.
+
+A market's ``clobTokenIds`` never change once it is created, so resolved
+markets are stored on disk and re-runs skip the Gamma API for slugs that
+are already known.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from config import MARKET_CACHE_PATH
+
+logger = logging.getLogger(__name__)
+
+
+class MarketCache:
+    """SQLite-backed slug -> market metadata cache."""
+
+    def __init__(self, path: str = MARKET_CACHE_PATH):
+        """Initialize the market cache.
+
+        Args:
+            path: Path to the cache database file
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS markets (
+                slug TEXT PRIMARY KEY,
+                market_id TEXT,
+                condition_id TEXT,
+                question TEXT,
+                token_ids TEXT NOT NULL,
+                outcomes TEXT NOT NULL,
+                end_date TEXT,
+                closed INTEGER NOT NULL DEFAULT 0,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _row_to_market(row: tuple) -> Dict[str, Any]:
+        slug, market_id, condition_id, question, token_ids, outcomes, end_date, closed, fetched_at = row
+        return {
+            "slug": slug,
+            "market_id": market_id,
+            "condition_id": condition_id,
+            "question": question,
+            "token_ids": json.loads(token_ids),
+            "outcomes": json.loads(outcomes),
+            "end_date": end_date,
+            "closed": bool(closed),
+            "fetched_at": fetched_at,
+        }
+
+    def get(self, slug: str) -> Optional[Dict[str, Any]]:
+        """Get a cached market.
+
+        Args:
+            slug: Market slug identifier
+
+        Returns:
+            Market dictionary, or None if the slug is not cached
+        """
+        return self.get_many([slug]).get(slug)
+
+    def get_many(self, slugs: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Get all cached markets among the given slugs.
+
+        Args:
+            slugs: Market slug identifiers
+
+        Returns:
+            Mapping of slug to market dictionary for cached slugs only
+        """
+        slugs = list(dict.fromkeys(slugs))
+        found = {}
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(slugs), 500):
+                chunk = slugs[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(f"""
+                    SELECT slug, market_id, condition_id, question, token_ids,
+                           outcomes, end_date, closed, fetched_at
+                    FROM markets WHERE slug IN ({placeholders})
+                """, chunk).fetchall()
+                for row in rows:
+                    found[row[0]] = self._row_to_market(row)
+        return found
+
+    def put_many(self, markets: Iterable[Dict[str, Any]]):
+        """Store resolved markets, replacing existing entries.
+
+        Args:
+            markets: Market dictionaries as returned by PolymarketClient.parse_market
+        """
+        now = time.time()
+        rows = [
+            (
+                m["slug"],
+                m.get("market_id"),
+                m.get("condition_id"),
+                m.get("question"),
+                json.dumps(m["token_ids"]),
+                json.dumps(m.get("outcomes", [])),
+                m.get("end_date"),
+                int(bool(m.get("closed"))),
+                now,
+            )
+            for m in markets
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany("""
+                INSERT OR REPLACE INTO markets
+                    (slug, market_id, condition_id, question, token_ids,
+                     outcomes, end_date, closed, fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            self._conn.commit()
+        logger.debug("Cached markets", extra={"count": len(rows)})
+
+    def put(self, market: Dict[str, Any]):
+        """Store a single resolved market."""
+        self.put_many([market])
+
+    def invalidate(self, slugs: Iterable[str]) -> int:
+        """Remove specific slugs from the cache.
+
+        Args:
+            slugs: Market slug identifiers to drop
+
+        Returns:
+            Number of entries removed
+        """
+        slugs = list(slugs)
+        with self._lock:
+            removed = self._conn.executemany(
+                "DELETE FROM markets WHERE slug = ?", [(s,) for s in slugs]
+            ).rowcount
+            self._conn.commit()
+        logger.info("Invalidated cached markets", extra={"removed": removed})
+        return removed
+
+    def clear(self) -> int:
+        """Remove every cached market.
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM markets").rowcount
+            self._conn.commit()
+        logger.info("Cleared market cache", extra={"removed": removed})
+        return removed
+
+    def slugs(self) -> List[str]:
+        """List every cached slug."""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT slug FROM markets ORDER BY slug")]
@@ -0,0 +1,325 @@
+"""
+In-process counters and histograms in the Prometheus text format.
+
+Instrumented code records into module-level metrics defined here. Each
+recording is a lock-protected integer add, plus a bisect for histograms.
+Nothing is formatted until someone reads the metrics: the web server's
+``/metrics`` scrape, or ``dump()`` at the end of a ``main.py`` run.
+Set ``TEAM_TOKENS_METRICS=0`` to turn recording into a no-op.
+
+Usage:
+    metrics.UPSTREAM_REQUEST_SECONDS.labels("clob", "clob_prices_history").observe(0.12)
+
+    @metrics.timed(metrics.DB_QUERY_SECONDS)
+    def get_all_games(...): ...
+"""
+import bisect
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from config import METRICS_ENABLED
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = tuple(256 * 4 ** i for i in range(9))  # 256 B .. 16 MiB
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class _NoopChild:
+    """Stands in for every child while metrics are disabled."""
+
+    def inc(self, amount: float = 1):
+        pass
+
+    def observe(self, value: float):
+        pass
+
+
+_NOOP = _NoopChild()
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+
+class _HistogramChild:
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class _Metric(ABC):
+    """Family of children keyed by label values."""
+
+    kind = ""
+
+    def __init__(self, registry: "Registry", name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _new_child(self):
+        """Fresh child for a new combination of label values."""
+
+    def labels(self, *values: Any):
+        """Child for one combination of label values (created on first use)."""
+        if not self.registry.enabled:
+            return _NOOP
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def children(self) -> List[Tuple[Tuple[str, ...], Any]]:
+        with self._lock:
+            return sorted(self._children.items())
+
+    def clear(self):
+        with self._lock:
+            self._children.clear()
+
+
+class Counter(_Metric):
+    """Monotonic counter."""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        """Increment the unlabeled counter."""
+        self.labels().inc(amount)
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+            for key, child in self.children()
+        ]
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Any]:
+        return {key: child.value for key, child in self.children()}
+
+    def merge(self, values: Dict[Tuple[str, ...], Any]):
+        for key, value in values.items():
+            self.labels(*key).inc(value)
+
+
+class Histogram(_Metric):
+    """Distribution over fixed buckets, with count and sum."""
+
+    kind = "histogram"
+
+    def __init__(self, registry: "Registry", name: str, documentation: str,
+                 labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        """Record a value in the unlabeled histogram."""
+        self.labels().observe(value)
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, child in self.children():
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames + ("le",), key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Any]:
+        snapshot = {}
+        for key, child in self.children():
+            with child._lock:
+                snapshot[key] = (list(child.counts), child.sum)
+        return snapshot
+
+    def merge(self, values: Dict[Tuple[str, ...], Any]):
+        for key, (counts, total) in values.items():
+            child = self.labels(*key)
+            if child is _NOOP:
+                return
+            with child._lock:
+                child.counts = [a + b for a, b in zip(child.counts, counts)]
+                child.sum += total
+
+
+class Registry:
+    """Holds every metric and renders the Prometheus text exposition format."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Create and register a counter."""
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        """Create and register a histogram."""
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format (version 0.0.4)."""
+        lines = []
+        for metric in self._metrics.values():
+            samples = metric.render()
+            if not samples:
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def snapshot(self) -> Dict[str, Dict[Tuple[str, ...], Any]]:
+        """Picklable copy of every value (to ship from worker processes)."""
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def merge(self, snapshot: Dict[str, Dict[Tuple[str, ...], Any]]):
+        """Add a snapshot taken in another process to this registry."""
+        for name, values in snapshot.items():
+            metric = self._metrics.get(name)
+            if metric is not None:
+                metric.merge(values)
+
+    def clear(self):
+        """Drop every recorded value (e.g. what a forked worker inherited)."""
+        for metric in self._metrics.values():
+            metric.clear()
+
+
+REGISTRY = Registry(enabled=METRICS_ENABLED)
+
+# Polymarket client
+UPSTREAM_REQUEST_SECONDS = REGISTRY.histogram(
+    "teamtokens_upstream_request_seconds", "Latency of Gamma/CLOB HTTP attempts", ("upstream", "endpoint"))
+UPSTREAM_RESPONSES = REGISTRY.counter(
+    "teamtokens_upstream_responses_total",
+    "Gamma/CLOB outcomes by HTTP status (or error, rejected, cache_hit)", ("upstream", "endpoint", "status"))
+POINTS_FETCHED = REGISTRY.counter(
+    "teamtokens_points_fetched_total", "Price points received from the CLOB API")
+
+# Output sinks
+SINK_WRITE_SECONDS = REGISTRY.histogram(
+    "teamtokens_sink_write_seconds", "Time spent writing to an output (csv per game, db per flush)", ("sink",))
+SINK_POINTS = REGISTRY.counter(
+    "teamtokens_sink_points_total", "Price points written to an output", ("sink",))
+
+# Database
+DB_QUERY_SECONDS = REGISTRY.histogram(
+    "teamtokens_db_query_seconds", "Time spent in database.py functions", ("function",))
+
+# Web server
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "teamtokens_http_request_seconds", "Web server request latency by route", ("route",))
+HTTP_REQUESTS = REGISTRY.counter(
+    "teamtokens_http_requests_total", "Web server requests by route, method and status", ("route", "method", "status"))
+HTTP_RESPONSE_BYTES = REGISTRY.histogram(
+    "teamtokens_http_response_bytes", "Web server response body size by route", ("route",), buckets=SIZE_BUCKETS)
+
+
+def timed(histogram: Histogram, label: Optional[str] = None) -> Callable[[Callable], Callable]:
+    """Decorator recording a function's run time in ``histogram``.
+
+    Args:
+        histogram: Histogram with a single label
+        label: Label value (defaults to the function name)
+    """
+    def decorator(func: Callable) -> Callable:
+        if not REGISTRY.enabled:
+            return func
+        name = label or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                # Looked up per call: Registry.clear() drops the family's children
+                histogram.labels(name).observe(time.perf_counter() - started)
+
+        return wrapper
+
+    return decorator
+
+
+def render() -> str:
+    """Render the default registry."""
+    return REGISTRY.render()
+
+
+def dump(path: str) -> str:
+    """Write the default registry to a file.
+
+    Args:
+        path: Output file (Prometheus text format)
+
+    Returns:
+        The path written
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(REGISTRY.render())
+    logger.info("Wrote metrics", extra={"path": path})
+    return path
@@ -0,0 +1,295 @@
+"""
+Monte Carlo risk analysis of the fixed-fraction betting strategy.
+
+The backtest shows one realized season. Here many seasons are simulated
+from the game analysis dataset and reduced to distributions: NAV
+percentile bands after every game, season-end NAV, maximum drawdown and
+probability of ruin.
+
+Simulation modes:
+
+- ``bootstrap``: each season draws games (with replacement) from the
+  realized per-game ROIs
+- ``shuffle``: each season plays the realized games in a random order
+  (same final NAV, different drawdowns)
+- ``implied``: each game is re-decided by a coin flip with the pre-game
+  implied win probability (the 48h average price), winning pays
+  (100 - price) / price and losing forfeits the stake
+
+Paths are simulated in fixed-size batches on a process pool. Each batch
+has its own child of one SeedSequence, so results depend only on the seed
+and batch size, not on the worker count. Batches are folded into
+fixed-bin histograms as they arrive, so memory does not grow with the
+number of paths.
+"""
+import logging
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from config import (
+    BACKTEST_BET_PERCENTAGE,
+    BACKTEST_INITIAL_CAPITAL,
+    DEFAULT_TEAM,
+    MONTE_CARLO_BATCH_PATHS,
+    MONTE_CARLO_HISTOGRAM_BINS,
+    MONTE_CARLO_MAX_PATHS,
+    MONTE_CARLO_NAV_RANGE,
+    MONTE_CARLO_PATHS,
+    MONTE_CARLO_RUIN_FRACTION,
+    MONTE_CARLO_WORKERS,
+)
+import database
+
+logger = logging.getLogger(__name__)
+
+MODE_BOOTSTRAP = "bootstrap"
+MODE_SHUFFLE = "shuffle"
+MODE_IMPLIED = "implied"
+MODES = (MODE_BOOTSTRAP, MODE_SHUFFLE, MODE_IMPLIED)
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def load_inputs(team: str = DEFAULT_TEAM) -> Dict[str, Any]:
+    """Load per-game inputs from the game analysis dataset.
+
+    Args:
+        team: Team abbreviation whose games are bet on
+
+    Returns:
+        Dictionary with 'games' (metadata), 'roi' (fractional realized
+        ROI) and 'price' (pre-game price, 0-100) for games with an ROI
+    """
+    games = [
+        g for g in database.generate_game_analysis_dataset(team)
+        if g['roi_percent'] is not None and g['avg_48h_price']
+    ]
+    return {
+        "games": [{k: g[k] for k in ('game_id', 'game_date', 'slug')} for g in games],
+        "roi": np.array([g['roi_percent'] / 100.0 for g in games], dtype=np.float64),
+        "price": np.array([g['avg_48h_price'] for g in games], dtype=np.float64),
+    }
+
+
+def _histogram_edges(bins: int) -> Dict[str, np.ndarray]:
+    lo, hi = MONTE_CARLO_NAV_RANGE
+    return {
+        "log_nav": np.linspace(math.log(lo), math.log(hi), bins + 1),
+        "drawdown": np.linspace(0.0, 1.0, bins + 1),
+    }
+
+
+def _bin(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Map values to bin indices, clamping out-of-range values to the end bins."""
+    width = edges[1] - edges[0]
+    return np.clip(((values - edges[0]) / width).astype(np.int64), 0, len(edges) - 2)
+
+
+def simulate_batch(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Simulate one batch of seasons and reduce it to histograms.
+
+    Runs in a worker process; everything it needs is in ``task``.
+
+    Args:
+        task: Dictionary with 'mode', 'roi', 'price', 'paths', 'seed'
+            (a numpy SeedSequence), 'bet_fraction', 'ruin_fraction' and 'bins'
+
+    Returns:
+        Partial reduction with 'paths', 'nav_counts' (games x bins),
+        'final_counts', 'drawdown_counts', 'ruined' and 'final_nav_sum'
+        (NAV as multiples of capital)
+    """
+    rng = np.random.default_rng(task["seed"])
+    roi, price = task["roi"], task["price"]
+    paths, games = task["paths"], len(roi)
+    mode = task["mode"]
+
+    if mode == MODE_BOOTSTRAP:
+        returns = roi[rng.integers(0, games, size=(paths, games))]
+    elif mode == MODE_SHUFFLE:
+        returns = roi[rng.permuted(np.tile(np.arange(games), (paths, 1)), axis=1)]
+    elif mode == MODE_IMPLIED:
+        wins = rng.random((paths, games)) < price / 100.0
+        returns = np.where(wins, (100.0 - price) / price, -1.0)
+    else:
+        raise ValueError(f"Unknown simulation mode: {mode}")
+
+    # Work in log space: NAV relative to capital after each game
+    log_nav = np.cumsum(np.log1p(task["bet_fraction"] * returns), axis=1)
+
+    edges = _histogram_edges(task["bins"])
+    bins = task["bins"]
+    nav_bins = _bin(log_nav, edges["log_nav"])
+    offsets = np.arange(games, dtype=np.int64) * bins
+    nav_counts = np.bincount((nav_bins + offsets).ravel(), minlength=games * bins).reshape(games, bins)
+
+    peaks = np.maximum.accumulate(np.maximum(log_nav, 0.0), axis=1)
+    max_drawdown = (1.0 - np.exp(log_nav - peaks)).max(axis=1)
+
+    return {
+        "paths": paths,
+        "nav_counts": nav_counts,
+        "final_counts": nav_counts[-1].copy(),
+        "drawdown_counts": np.bincount(_bin(max_drawdown, edges["drawdown"]), minlength=bins),
+        "ruined": int((log_nav.min(axis=1) <= math.log(task["ruin_fraction"])).sum()),
+        "final_nav_sum": float(np.exp(log_nav[:, -1]).sum()),
+    }
+
+
+class HistogramReducer:
+    """Streaming reducer that folds batch results into running histograms."""
+
+    def __init__(self, games: int, bins: int):
+        """Initialize empty histograms.
+
+        Args:
+            games: Games per simulated season
+            bins: Bins per histogram
+        """
+        self.bins = bins
+        self.edges = _histogram_edges(bins)
+        self.paths = 0
+        self.ruined = 0
+        self.final_nav_sum = 0.0
+        self.nav_counts = np.zeros((games, bins), dtype=np.int64)
+        self.final_counts = np.zeros(bins, dtype=np.int64)
+        self.drawdown_counts = np.zeros(bins, dtype=np.int64)
+
+    def add(self, batch: Dict[str, Any]):
+        """Fold one batch result into the running totals."""
+        self.paths += batch["paths"]
+        self.ruined += batch["ruined"]
+        self.final_nav_sum += batch["final_nav_sum"]
+        self.nav_counts += batch["nav_counts"]
+        self.final_counts += batch["final_counts"]
+        self.drawdown_counts += batch["drawdown_counts"]
+
+    @staticmethod
+    def _percentiles(counts: np.ndarray, edges: np.ndarray, percentiles: Sequence[float]) -> np.ndarray:
+        """Percentiles (bin midpoints) from histogram counts; counts may be 2-D (rows x bins)."""
+        counts = np.atleast_2d(counts)
+        cumulative = np.cumsum(counts, axis=1)
+        totals = cumulative[:, -1:]
+        centers = (edges[:-1] + edges[1:]) / 2
+        result = np.empty((counts.shape[0], len(percentiles)))
+        for j, q in enumerate(percentiles):
+            index = np.argmax(cumulative >= np.maximum(totals * q / 100.0, 1), axis=1)
+            result[:, j] = centers[index]
+        return result
+
+    def result(self, capital: float, percentiles: Sequence[float] = PERCENTILES) -> Dict[str, Any]:
+        """Summarize the reduced histograms.
+
+        Args:
+            capital: Starting NAV used to scale results
+            percentiles: Percentiles to report
+
+        Returns:
+            Dictionary with NAV percentile bands per game (starting with the
+            initial capital), season-end NAV and max drawdown percentiles,
+            mean season-end NAV and probability of ruin
+        """
+        bands = np.exp(self._percentiles(self.nav_counts, self.edges["log_nav"], percentiles)) * capital
+        final = np.exp(self._percentiles(self.final_counts, self.edges["log_nav"], percentiles)[0]) * capital
+        drawdown = self._percentiles(self.drawdown_counts, self.edges["drawdown"], percentiles)[0] * 100
+        return {
+            "paths": self.paths,
+            "bands": {
+                f"p{q:g}": [round(capital, 2)] + np.round(bands[:, j], 2).tolist()
+                for j, q in enumerate(percentiles)
+            },
+            "final_nav": {f"p{q:g}": round(float(v), 2) for q, v in zip(percentiles, final)},
+            "mean_final_nav": round(self.final_nav_sum / self.paths * capital, 2) if self.paths else None,
+            "max_drawdown_percent": {f"p{q:g}": round(float(v), 2) for q, v in zip(percentiles, drawdown)},
+            "probability_of_ruin": self.ruined / self.paths if self.paths else None,
+        }
+
+
+def run_simulation(
+    team: str = DEFAULT_TEAM,
+    mode: str = MODE_BOOTSTRAP,
+    paths: int = MONTE_CARLO_PATHS,
+    bet_fraction: float = BACKTEST_BET_PERCENTAGE,
+    initial_capital: float = BACKTEST_INITIAL_CAPITAL,
+    seed: int = 0,
+    workers: Optional[int] = MONTE_CARLO_WORKERS,
+    batch_paths: int = MONTE_CARLO_BATCH_PATHS,
+    ruin_fraction: float = MONTE_CARLO_RUIN_FRACTION,
+    bins: int = MONTE_CARLO_HISTOGRAM_BINS
+) -> Dict[str, Any]:
+    """Simulate many seasons of the betting strategy.
+
+    Args:
+        team: Team abbreviation whose games are bet on
+        mode: 'bootstrap', 'shuffle' or 'implied'
+        paths: Number of simulated seasons
+        bet_fraction: Fraction of bankroll bet on each game (0 < f < 1)
+        initial_capital: Starting NAV
+        seed: Seed for reproducible results
+        workers: Worker processes (1 runs in-process)
+        batch_paths: Paths per batch
+        ruin_fraction: NAV at or below this share of capital counts as ruin
+        bins: Bins per histogram
+
+    Returns:
+        Dictionary with the inputs, 'games' (x-axis for the bands) and the
+        reduced distributions (see HistogramReducer.result)
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown simulation mode {mode!r}; choose from {list(MODES)}")
+    if not 0 < bet_fraction < 1:
+        raise ValueError("bet_fraction must be between 0 and 1")
+    if not 0 < paths <= MONTE_CARLO_MAX_PATHS:
+        raise ValueError(f"paths must be between 1 and {MONTE_CARLO_MAX_PATHS}")
+
+    started = time.perf_counter()
+    inputs = load_inputs(team)
+    games = len(inputs["roi"])
+    summary: Dict[str, Any] = {
+        "team": team,
+        "mode": mode,
+        "bet_fraction": bet_fraction,
+        "initial_capital": initial_capital,
+        "seed": seed,
+        "ruin_fraction": ruin_fraction,
+        "games": inputs["games"],
+    }
+    if games == 0:
+        return {**summary, "paths": 0, "elapsed_ms": 0.0}
+
+    batch_sizes = [min(batch_paths, paths - lo) for lo in range(0, paths, batch_paths)]
+    seeds = np.random.SeedSequence(seed).spawn(len(batch_sizes))
+    tasks = (
+        {
+            "mode": mode,
+            "roi": inputs["roi"],
+            "price": inputs["price"],
+            "paths": size,
+            "seed": child,
+            "bet_fraction": bet_fraction,
+            "ruin_fraction": ruin_fraction,
+            "bins": bins,
+        }
+        for size, child in zip(batch_sizes, seeds)
+    )
+
+    reducer = HistogramReducer(games, bins)
+    workers = max(1, min(workers or 1, len(batch_sizes)))
+    if workers == 1:
+        for task in tasks:
+            reducer.add(simulate_batch(task))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for batch in executor.map(simulate_batch, tasks):
+                reducer.add(batch)
+
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    logger.info(
+        "Monte Carlo simulation finished",
+        extra={"team": team, "mode": mode, "paths": paths, "workers": workers, "elapsed_ms": elapsed_ms}
+    )
+    return {**summary, **reducer.result(initial_capital), "elapsed_ms": elapsed_ms}
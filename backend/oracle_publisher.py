@@ -0,0 +1,604 @@
+"""
+Price oracle publisher for the Sports Oracle contract.
+
+Watches many game slugs with one shared ``PolymarketClient`` and posts
+their YES prices on chain, keyed by slug (see contracts/SPEC.md).
+
+Cost controls:
+
+- Suppression: a price is only published when it has moved by at least
+  ``ORACLE_DEVIATION_THRESHOLD`` points since the last publish, or when
+  ``ORACLE_HEARTBEAT_SECONDS`` have passed.
+- Batching: up to ``ORACLE_BATCH_SIZE`` slug -> price updates go into
+  one ``updatePrices(string[],uint256[])`` transaction. All of a cycle's
+  transactions are sent in one JSON-RPC batch request.
+- Pipelining: nonces are assigned locally, so transactions are sent
+  without waiting for earlier ones to be mined. Up to
+  ``ORACLE_MAX_IN_FLIGHT`` stay pending, and their receipts are polled
+  together in one batch request. If a node rejects a nonce, the next
+  nonce is re-read from the chain and the unsent updates are retried in
+  the next cycle. A transaction with no receipt after
+  ``ORACLE_TX_TIMEOUT_SECONDS`` (dropped or replaced) frees its slot: its
+  prices are published again and the nonce is re-read.
+
+Transactions are sent with ``eth_sendTransaction``, so the node (or a
+signer proxy in front of it) holds the key.
+
+Usage:
+    python oracle_publisher.py --league --contract 0x... --sender 0x...
+    python oracle_publisher.py --once --schedule live.json --rpc-url http://127.0.0.1:8545 \\
+        --gamma-base http://127.0.0.1:8001 --clob-base http://127.0.0.1:8001
+"""
+import argparse
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import requests
+
+from config import (
+    CLOB_API_BASE,
+    GAMMA_API_BASE,
+    LOG_FORMAT,
+    LOG_LEVEL,
+    NBA_TEAMS,
+    ORACLE_BATCH_SIZE,
+    ORACLE_CONTRACT_ADDRESS,
+    ORACLE_DEVIATION_THRESHOLD,
+    ORACLE_HEARTBEAT_SECONDS,
+    ORACLE_MAX_IN_FLIGHT,
+    ORACLE_POLL_INTERVAL_SECONDS,
+    ORACLE_PRICE_SCALE,
+    ORACLE_PRICE_WORKERS,
+    ORACLE_RPC_URL,
+    ORACLE_SENDER_ADDRESS,
+    ORACLE_TX_TIMEOUT_SECONDS,
+    ORACLE_UPDATE_SIGNATURE,
+    SIXERS_GAMES,
+)
+from polymarket_client import PolymarketClient, price_window
+from schedule import games_for_team, load_league_schedule
+
+logger = logging.getLogger(__name__)
+
+# Keccak-256 (the pre-standard padding Ethereum uses, not SHA3-256)
+_KECCAK_ROUND_CONSTANTS = (
+    0x0000000000000001, 0x0000000000008082, 0x800000000000808A, 0x8000000080008000,
+    0x000000000000808B, 0x0000000080000001, 0x8000000080008081, 0x8000000000008009,
+    0x000000000000008A, 0x0000000000000088, 0x0000000080008009, 0x000000008000000A,
+    0x000000008000808B, 0x800000000000008B, 0x8000000000008089, 0x8000000000008003,
+    0x8000000000008002, 0x8000000000000080, 0x000000000000800A, 0x800000008000000A,
+    0x8000000080008081, 0x8000000000008080, 0x0000000080000001, 0x8000000080008008,
+)
+_KECCAK_ROTATIONS = (
+    0, 1, 62, 28, 27,
+    36, 44, 6, 55, 20,
+    3, 10, 43, 25, 39,
+    41, 45, 15, 21, 8,
+    18, 2, 61, 56, 14,
+)
+_MASK_64 = (1 << 64) - 1
+
+
+def _keccak_f(state: List[int]):
+    """Apply the Keccak-f[1600] permutation to 25 lanes (index x + 5y) in place."""
+    for round_constant in _KECCAK_ROUND_CONSTANTS:
+        c = [state[x] ^ state[x + 5] ^ state[x + 10] ^ state[x + 15] ^ state[x + 20] for x in range(5)]
+        d = [c[(x - 1) % 5] ^ (((c[(x + 1) % 5] << 1) | (c[(x + 1) % 5] >> 63)) & _MASK_64) for x in range(5)]
+        b = [0] * 25
+        for i in range(25):
+            x, y = i % 5, i // 5
+            lane = state[i] ^ d[x]
+            rotation = _KECCAK_ROTATIONS[i]
+            b[y + 5 * ((2 * x + 3 * y) % 5)] = ((lane << rotation) | (lane >> (64 - rotation))) & _MASK_64
+        for i in range(25):
+            x, row = i % 5, i - i % 5
+            state[i] = b[i] ^ (~b[row + (x + 1) % 5] & b[row + (x + 2) % 5])
+        state[0] ^= round_constant
+
+
+def keccak256(data: bytes) -> bytes:
+    """Ethereum Keccak-256 digest."""
+    rate = 136
+    padded = bytearray(data)
+    padded.append(0x01)
+    padded.extend(b"\x00" * (-len(padded) % rate))
+    padded[-1] |= 0x80
+    state = [0] * 25
+    for offset in range(0, len(padded), rate):
+        block = padded[offset:offset + rate]
+        for i in range(rate // 8):
+            state[i] ^= int.from_bytes(block[8 * i:8 * i + 8], "little")
+        _keccak_f(state)
+    return b"".join(lane.to_bytes(8, "little") for lane in state[:4])
+
+
+def function_selector(signature: str) -> bytes:
+    """First four bytes of the Keccak-256 of a function signature."""
+    return keccak256(signature.encode("ascii"))[:4]
+
+
+def _word(value: int) -> bytes:
+    return value.to_bytes(32, "big")
+
+
+def encode_update_call(
+    slugs: Sequence[str],
+    prices: Sequence[int],
+    signature: str = ORACLE_UPDATE_SIGNATURE
+) -> str:
+    """ABI-encode an ``updatePrices(string[],uint256[])`` call.
+
+    Args:
+        slugs: Game slugs
+        prices: On-chain prices (see ORACLE_PRICE_SCALE), one per slug
+        signature: Function signature of the contract method
+
+    Returns:
+        0x-prefixed calldata
+    """
+    strings = []
+    for slug in slugs:
+        raw = slug.encode("utf-8")
+        strings.append(_word(len(raw)) + raw + b"\x00" * (-len(raw) % 32))
+    # string[]: length, one offset per element (from after the length), then the elements
+    offsets, position = [], 32 * len(strings)
+    for encoded in strings:
+        offsets.append(_word(position))
+        position += len(encoded)
+    slugs_part = _word(len(strings)) + b"".join(offsets) + b"".join(strings)
+    prices_part = _word(len(prices)) + b"".join(_word(int(p)) for p in prices)
+    head = _word(64) + _word(64 + len(slugs_part))
+    return "0x" + (function_selector(signature) + head + slugs_part + prices_part).hex()
+
+
+def decode_update_call(calldata: str) -> Tuple[bytes, List[str], List[int]]:
+    """Decode calldata produced by encode_update_call.
+
+    Returns:
+        Tuple of (selector, slugs, prices)
+    """
+    data = bytes.fromhex(calldata[2:] if calldata.startswith("0x") else calldata)
+    selector, args = data[:4], data[4:]
+
+    def word(offset: int) -> int:
+        return int.from_bytes(args[offset:offset + 32], "big")
+
+    slugs_at, prices_at = word(0), word(32)
+    slugs = []
+    for i in range(word(slugs_at)):
+        start = slugs_at + 32 + word(slugs_at + 32 + 32 * i)
+        length = word(start)
+        slugs.append(args[start + 32:start + 32 + length].decode("utf-8"))
+    prices = [word(prices_at + 32 + 32 * i) for i in range(word(prices_at))]
+    return selector, slugs, prices
+
+
+class JsonRpcError(Exception):
+    """Error object returned by a JSON-RPC node."""
+
+    def __init__(self, error: Dict[str, Any]):
+        super().__init__(error.get("message", str(error)))
+        self.code = error.get("code")
+
+
+class JsonRpcClient:
+    """Minimal JSON-RPC 2.0 client with batch requests."""
+
+    def __init__(self, url: str = ORACLE_RPC_URL, timeout: float = 10.0):
+        """Initialize the client.
+
+        Args:
+            url: Node RPC URL
+            timeout: Request timeout in seconds
+        """
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+        self._ids = itertools.count(1)
+        self.http_requests = 0
+        self.calls = 0
+
+    def batch(self, calls: Sequence[Tuple[str, list]]) -> List[Any]:
+        """Send several calls in one HTTP request.
+
+        Args:
+            calls: (method, params) pairs
+
+        Returns:
+            One entry per call, in order: the result, or a JsonRpcError
+        """
+        if not calls:
+            return []
+        payload = [
+            {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": params}
+            for method, params in calls
+        ]
+        self.http_requests += 1
+        self.calls += len(calls)
+        response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        by_id = {item.get("id"): item for item in response.json()}
+        results = []
+        for request_payload in payload:
+            item = by_id.get(request_payload["id"], {"error": {"message": "missing response"}})
+            results.append(JsonRpcError(item["error"]) if "error" in item else item.get("result"))
+        return results
+
+    def call(self, method: str, params: list) -> Any:
+        """Send one call and return its result (raises JsonRpcError)."""
+        result = self.batch([(method, params)])[0]
+        if isinstance(result, JsonRpcError):
+            raise result
+        return result
+
+    def close(self):
+        """Close pooled connections."""
+        self.session.close()
+
+
+class DeviationFilter:
+    """Decides which prices are worth publishing."""
+
+    def __init__(
+        self,
+        deviation: float = ORACLE_DEVIATION_THRESHOLD,
+        heartbeat: float = ORACLE_HEARTBEAT_SECONDS
+    ):
+        """Initialize the filter.
+
+        Args:
+            deviation: Smallest price move (percentage points) worth publishing
+            heartbeat: Seconds after which a price is republished even if unchanged
+        """
+        self.deviation = deviation
+        self.heartbeat = heartbeat
+        self._published: Dict[str, Tuple[float, float]] = {}
+
+    def due(self, slug: str, price: float, now: float) -> bool:
+        """True if ``price`` should be published for ``slug``."""
+        last = self._published.get(slug)
+        if last is None:
+            return True
+        last_price, published_at = last
+        return abs(price - last_price) >= self.deviation or now - published_at >= self.heartbeat
+
+    def mark(self, updates: Iterable[Tuple[str, float]], now: float):
+        """Record updates as published."""
+        for slug, price in updates:
+            self._published[slug] = (price, now)
+
+    def forget(self, slugs: Iterable[str]):
+        """Force the next price of these slugs to be published (e.g. after a revert)."""
+        for slug in slugs:
+            self._published.pop(slug, None)
+
+
+class ClobPriceSource:
+    """Latest YES price per game from CLOB price history."""
+
+    def __init__(
+        self,
+        client: PolymarketClient,
+        workers: int = ORACLE_PRICE_WORKERS,
+        lookback_minutes: int = 10
+    ):
+        """Initialize the price source.
+
+        Args:
+            client: Shared Polymarket client
+            workers: Concurrent price requests
+            lookback_minutes: Minute-fidelity history fetched to find the latest point
+        """
+        self.client = client
+        self.workers = workers
+        self.lookback_minutes = lookback_minutes
+
+    @staticmethod
+    def _window_open(game: Dict[str, Any], now: float) -> bool:
+        start_ts, end_ts = price_window(game['start_iso'])
+        return start_ts <= now <= end_ts
+
+    def _latest(self, game: Dict[str, Any], now: float) -> Optional[float]:
+        token_id = self.client.get_token_id_from_slug(game['slug'])
+        if not token_id:
+            return None
+        history = self.client.get_price_history(
+            token_id, game['start_iso'], since_ts=int(now) - self.lookback_minutes * 60, fidelity=1
+        )
+        return round(float(history[-1]['p']) * 100, 2) if history else None
+
+    def __call__(self, games: Sequence[Dict[str, Any]], now: float) -> Dict[str, float]:
+        """Fetch the latest price (0-100) of each game whose window is open.
+
+        Games before or after their price window cost no requests.
+        """
+        games = [game for game in games if self._window_open(game, now)]
+        if not games:
+            return {}
+        self.client.resolve_markets([game['slug'] for game in games])
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            prices = list(executor.map(lambda game: self._latest(game, now), games))
+        return {game['slug']: price for game, price in zip(games, prices) if price is not None}
+
+
+PriceSource = Callable[[Sequence[Dict[str, Any]], float], Dict[str, float]]
+
+
+class OraclePublisher:
+    """Publishes batched, deviation-filtered price updates with pipelined nonces."""
+
+    def __init__(
+        self,
+        rpc: JsonRpcClient,
+        price_source: PriceSource,
+        contract: str = ORACLE_CONTRACT_ADDRESS,
+        sender: str = ORACLE_SENDER_ADDRESS,
+        update_filter: Optional[DeviationFilter] = None,
+        batch_size: int = ORACLE_BATCH_SIZE,
+        max_in_flight: int = ORACLE_MAX_IN_FLIGHT,
+        price_scale: int = ORACLE_PRICE_SCALE,
+        tx_timeout: float = ORACLE_TX_TIMEOUT_SECONDS
+    ):
+        """Initialize the publisher.
+
+        Args:
+            rpc: JSON-RPC client for the chain
+            price_source: Returns {slug: price (0-100)} for a list of games
+            contract: Oracle contract address
+            sender: Account that sends the transactions
+            update_filter: Deviation/heartbeat filter
+            batch_size: Most updates per transaction
+            max_in_flight: Most unconfirmed transactions
+            price_scale: On-chain price units per 100%
+            tx_timeout: Seconds without a receipt after which a transaction
+                is treated as dropped
+        """
+        if not contract or not sender:
+            raise ValueError("Oracle contract and sender addresses are required")
+        self.rpc = rpc
+        self.price_source = price_source
+        self.contract = contract
+        self.sender = sender
+        self.filter = update_filter or DeviationFilter()
+        self.batch_size = max(1, batch_size)
+        self.max_in_flight = max(1, max_in_flight)
+        self.price_scale = price_scale
+        self.tx_timeout = tx_timeout
+        self._nonce: Optional[int] = None
+        # tx hash -> (nonce, updates, submit time)
+        self._in_flight: Dict[str, Tuple[int, List[Tuple[str, float]], float]] = {}
+        self.stats = {
+            "cycles": 0,
+            "prices_seen": 0,
+            "suppressed": 0,
+            "updates_submitted": 0,
+            "submissions": 0,
+            "confirmed": 0,
+            "reverted": 0,
+            "rejected": 0,
+            "timed_out": 0,
+        }
+
+    def _sync_nonce(self):
+        """Re-read the sender's next nonce (pending transactions included)."""
+        self._nonce = int(self.rpc.call("eth_getTransactionCount", [self.sender, "pending"]), 16)
+
+    def poll_receipts(self, now: Optional[float] = None) -> int:
+        """Check every in-flight transaction in one batch request.
+
+        Transactions still without a receipt ``tx_timeout`` seconds after
+        they were sent are dropped from the in-flight set, their prices
+        are published again and the nonce is re-read from the chain.
+
+        Args:
+            now: Current Unix time (defaults to the clock)
+
+        Returns:
+            Number of transactions that were mined
+        """
+        now = time.time() if now is None else now
+        hashes = list(self._in_flight)
+        receipts = self.rpc.batch([("eth_getTransactionReceipt", [tx_hash]) for tx_hash in hashes])
+        mined = 0
+        for tx_hash, receipt in zip(hashes, receipts):
+            if receipt is None or isinstance(receipt, JsonRpcError):
+                continue
+            _, updates, _ = self._in_flight.pop(tx_hash)
+            mined += 1
+            if receipt.get("status") == "0x1":
+                self.stats["confirmed"] += 1
+            else:
+                self.stats["reverted"] += 1
+                self.filter.forget(slug for slug, _ in updates)
+                logger.warning("Oracle update reverted", extra={"tx": tx_hash, "updates": len(updates)})
+
+        expired = [
+            tx_hash for tx_hash, (_, _, sent_at) in self._in_flight.items()
+            if now - sent_at >= self.tx_timeout
+        ]
+        for tx_hash in expired:
+            nonce, updates, _ = self._in_flight.pop(tx_hash)
+            self.stats["timed_out"] += 1
+            self.filter.forget(slug for slug, _ in updates)
+            logger.warning(
+                "Oracle update timed out without a receipt",
+                extra={"tx": tx_hash, "nonce": nonce, "updates": len(updates)}
+            )
+        if expired:
+            # The dropped nonces may be free again
+            self._sync_nonce()
+        return mined
+
+    def submit(self, updates: List[Tuple[str, float]], now: float) -> int:
+        """Send updates in batched transactions with consecutive nonces.
+
+        Only as many transactions as there are free in-flight slots are
+        sent; the rest stay due and go out in a later cycle.
+
+        Args:
+            updates: (slug, price) pairs to publish
+            now: Current Unix time, recorded as the publish time
+
+        Returns:
+            Number of updates accepted by the node
+        """
+        if self._nonce is None:
+            self._sync_nonce()
+        slots = self.max_in_flight - len(self._in_flight)
+        chunks = [updates[i:i + self.batch_size] for i in range(0, len(updates), self.batch_size)][:max(slots, 0)]
+        if not chunks:
+            return 0
+
+        calls = []
+        for offset, chunk in enumerate(chunks):
+            calldata = encode_update_call(
+                [slug for slug, _ in chunk],
+                [round(price * self.price_scale / 100) for _, price in chunk]
+            )
+            calls.append(("eth_sendTransaction", [{
+                "from": self.sender,
+                "to": self.contract,
+                "data": calldata,
+                "nonce": hex(self._nonce + offset),
+            }]))
+        results = self.rpc.batch(calls)
+
+        accepted = 0
+        for offset, (chunk, result) in enumerate(zip(chunks, results)):
+            if isinstance(result, JsonRpcError):
+                self.stats["rejected"] += 1
+                logger.warning("Oracle update rejected", extra={"error": str(result), "updates": len(chunk)})
+                continue
+            self._in_flight[result] = (self._nonce + offset, chunk, now)
+            self.filter.mark(chunk, now)
+            accepted += len(chunk)
+            self.stats["submissions"] += 1
+        self.stats["updates_submitted"] += accepted
+
+        if any(isinstance(result, JsonRpcError) for result in results):
+            # Later nonces may be stuck behind the rejected one; start over from the chain
+            self._sync_nonce()
+        else:
+            self._nonce += len(chunks)
+        return accepted
+
+    def run_cycle(self, games: Sequence[Dict[str, Any]], now: Optional[float] = None) -> int:
+        """Fetch prices, drop unchanged ones and publish the rest.
+
+        Args:
+            games: Schedule entries to watch
+            now: Current Unix time (defaults to the clock)
+
+        Returns:
+            Number of updates submitted
+        """
+        now = time.time() if now is None else now
+        if self._in_flight:
+            self.poll_receipts(now)
+        prices = self.price_source(games, now)
+        updates = [(slug, price) for slug, price in prices.items() if self.filter.due(slug, price, now)]
+        submitted = self.submit(updates, now) if updates else 0
+
+        self.stats["cycles"] += 1
+        self.stats["prices_seen"] += len(prices)
+        self.stats["suppressed"] += len(prices) - len(updates)
+        logger.info(
+            "Oracle cycle finished",
+            extra={"prices": len(prices), "due": len(updates), "submitted": submitted,
+                   "in_flight": len(self._in_flight)}
+        )
+        return submitted
+
+    def drain(self, timeout: float = 30.0, poll_interval: float = 0.1) -> bool:
+        """Wait until every in-flight transaction is mined.
+
+        Returns:
+            True if nothing is left in flight
+        """
+        deadline = time.monotonic() + timeout
+        while self._in_flight and time.monotonic() < deadline:
+            if not self.poll_receipts():
+                time.sleep(poll_interval)
+        return not self._in_flight
+
+    @property
+    def in_flight(self) -> int:
+        """Transactions sent but not yet mined."""
+        return len(self._in_flight)
+
+    def summary(self) -> Dict[str, Any]:
+        """Counters plus derived ratios."""
+        stats = dict(self.stats)
+        updates = stats["updates_submitted"]
+        stats["submissions_per_update"] = round(stats["submissions"] / updates, 4) if updates else None
+        stats["rpc_http_requests"] = self.rpc.http_requests
+        stats["rpc_calls"] = self.rpc.calls
+        return stats
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Publish game prices to the Sports Oracle contract.")
+    parser.add_argument("--schedule", metavar="PATH", help="League schedule JSON to watch")
+    parser.add_argument("--league", action="store_true", help="Watch the league schedule")
+    parser.add_argument("--team", help="Only watch this team's games (implies --league)")
+    parser.add_argument("--rpc-url", default=ORACLE_RPC_URL, help="JSON-RPC URL of the chain")
+    parser.add_argument("--contract", default=ORACLE_CONTRACT_ADDRESS, help="Oracle contract address")
+    parser.add_argument("--sender", default=ORACLE_SENDER_ADDRESS, help="Account sending updates")
+    parser.add_argument("--interval", type=float, default=ORACLE_POLL_INTERVAL_SECONDS,
+                        help="Seconds between cycles")
+    parser.add_argument("--deviation", type=float, default=ORACLE_DEVIATION_THRESHOLD,
+                        help="Smallest price move (points) worth publishing")
+    parser.add_argument("--heartbeat", type=float, default=ORACLE_HEARTBEAT_SECONDS,
+                        help="Seconds after which unchanged prices are republished")
+    parser.add_argument("--batch-size", type=int, default=ORACLE_BATCH_SIZE, help="Updates per transaction")
+    parser.add_argument("--gamma-base", default=GAMMA_API_BASE, help="Gamma API base URL")
+    parser.add_argument("--clob-base", default=CLOB_API_BASE, help="CLOB API base URL")
+    parser.add_argument("--once", action="store_true", help="Run one cycle, wait for receipts and exit")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=LOG_LEVEL, format=LOG_FORMAT)
+    if args.schedule:
+        games = load_league_schedule(args.schedule)
+    elif args.league or args.team:
+        games = load_league_schedule(teams=NBA_TEAMS)
+    else:
+        games = list(SIXERS_GAMES)
+    if args.team:
+        games = games_for_team(games, args.team)
+
+    client = PolymarketClient(gamma_base=args.gamma_base, clob_base=args.clob_base)
+    rpc = JsonRpcClient(args.rpc_url)
+    publisher = OraclePublisher(
+        rpc,
+        ClobPriceSource(client),
+        contract=args.contract,
+        sender=args.sender,
+        update_filter=DeviationFilter(args.deviation, args.heartbeat),
+        batch_size=args.batch_size
+    )
+    stop = threading.Event()
+    try:
+        while not stop.is_set():
+            started = time.monotonic()
+            try:
+                publisher.run_cycle(games)
+            except (requests.RequestException, JsonRpcError):
+                logger.exception("Oracle cycle failed")
+            if args.once:
+                publisher.drain()
+                break
+            stop.wait(max(0.0, args.interval - (time.monotonic() - started)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logger.info("Oracle publisher stopped", extra=publisher.summary())
+        client.close()
+        rpc.close()
+
+
+if __name__ == "__main__":
+    main()
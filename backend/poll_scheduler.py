@@ -0,0 +1,433 @@
+"""
+Game-window-aware polling scheduler.
+
+``main.run_extraction`` fetches every game the same way. This scheduler
+instead derives a polling plan from each game's ``start_iso`` and
+``PRICE_WINDOW_HOURS_BEFORE/AFTER`` and keeps it on a heap-based timer
+queue, so request volume follows what is actually changing:
+
+- pre-window: the window has not opened, so there are no prices yet. The
+  market is checked every ``SCHEDULER_PREWINDOW_INTERVAL_SECONDS``, and the
+  game is always woken when its window opens.
+- window: inside the price window but away from tip-off; polled every
+  ``SCHEDULER_WINDOW_INTERVAL_SECONDS``.
+- hot: from ``SCHEDULER_HOT_HOURS_BEFORE`` before tip-off until
+  ``SCHEDULER_HOT_HOURS_AFTER`` after it; polled every
+  ``SCHEDULER_HOT_INTERVAL_SECONDS``.
+- settled: the window has closed. One final successful fetch marks the
+  game complete, and it is never polled again. Games already stored as
+  complete are never scheduled.
+
+A failed fetch (error status, retries used up, open circuit breaker, an
+exception) never completes a game, and neither does a database flush that
+fails. The game is re-polled after
+``SCHEDULER_RETRY_BASE_SECONDS``, doubling per consecutive failure up to
+``SCHEDULER_RETRY_MAX_SECONDS``, or at its regular time if that is sooner.
+
+Every fetch goes through one ``PolymarketClient`` whose ``TokenBucket``
+is the rate budget for all games. When more games are due than the
+budget allows, hot games are fetched first.
+
+Usage:
+    python poll_scheduler.py --league --rate 2
+    python poll_scheduler.py --schedule live.json --gamma-base http://127.0.0.1:8001 \\
+        --clob-base http://127.0.0.1:8001
+"""
+import argparse
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import (
+    CLOB_API_BASE,
+    GAMMA_API_BASE,
+    LOG_FORMAT,
+    LOG_LEVEL,
+    NBA_TEAMS,
+    PRICE_WINDOW_HOURS_AFTER,
+    RATE_LIMIT_BURST,
+    RATE_LIMIT_REQUESTS_PER_SECOND,
+    SCHEDULER_FIDELITY,
+    SCHEDULER_HOT_HOURS_AFTER,
+    SCHEDULER_HOT_HOURS_BEFORE,
+    SCHEDULER_HOT_INTERVAL_SECONDS,
+    SCHEDULER_PREWINDOW_INTERVAL_SECONDS,
+    SCHEDULER_RETRY_BASE_SECONDS,
+    SCHEDULER_RETRY_MAX_SECONDS,
+    SCHEDULER_WINDOW_INTERVAL_SECONDS,
+    SCHEDULER_WORKERS,
+    SIXERS_GAMES,
+)
+import database
+from live_poller import EventBroker, price_event
+from polymarket_client import PolymarketClient, price_window
+from rate_limiter import TokenBucket
+from schedule import games_for_team, load_league_schedule
+
+logger = logging.getLogger(__name__)
+
+PHASE_HOT = "hot"
+PHASE_WINDOW = "window"
+PHASE_PREWINDOW = "pre_window"
+PHASE_SETTLED = "settled"
+
+# Fetch order when several games are due at once
+PHASE_PRIORITY = {PHASE_HOT: 0, PHASE_WINDOW: 1, PHASE_SETTLED: 1, PHASE_PREWINDOW: 2}
+
+
+class PollPlan:
+    """Turns a game's start time into polling phases and due times."""
+
+    def __init__(
+        self,
+        hot_hours_before: float = SCHEDULER_HOT_HOURS_BEFORE,
+        hot_hours_after: float = SCHEDULER_HOT_HOURS_AFTER,
+        hot_interval: float = SCHEDULER_HOT_INTERVAL_SECONDS,
+        window_interval: float = SCHEDULER_WINDOW_INTERVAL_SECONDS,
+        prewindow_interval: float = SCHEDULER_PREWINDOW_INTERVAL_SECONDS,
+        fidelity: int = SCHEDULER_FIDELITY,
+        retry_base: float = SCHEDULER_RETRY_BASE_SECONDS,
+        retry_max: float = SCHEDULER_RETRY_MAX_SECONDS
+    ):
+        """Initialize the plan.
+
+        Args:
+            hot_hours_before: Hours before tip-off when polling speeds up
+            hot_hours_after: Hours after tip-off when it slows down again
+            hot_interval: Seconds between polls of hot games
+            window_interval: Seconds between polls of other in-window games
+            prewindow_interval: Seconds between market checks before the window
+            fidelity: Minutes between fetched points
+            retry_base: Seconds before re-polling after a failed fetch
+            retry_max: Longest delay after repeated failures
+        """
+        self.hot_before = hot_hours_before * 3600
+        self.hot_after = hot_hours_after * 3600
+        self.hot_interval = hot_interval
+        self.window_interval = window_interval
+        self.prewindow_interval = prewindow_interval
+        self.fidelity = fidelity
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+
+    def boundaries(self, game: Dict[str, Any]) -> Tuple[int, float, float, int]:
+        """Window start, hot start, hot end and settle time of a game (Unix seconds)."""
+        window_start, window_end = price_window(game['start_iso'])
+        tip_off = window_end - PRICE_WINDOW_HOURS_AFTER * 3600
+        # Points up to the window end are only final one fidelity step later
+        settle = window_end + self.fidelity * 60
+        return window_start, tip_off - self.hot_before, tip_off + self.hot_after, settle
+
+    def phase(self, game: Dict[str, Any], now: float) -> str:
+        """Polling phase of a game at ``now``."""
+        window_start, hot_start, hot_end, settle = self.boundaries(game)
+        if now >= settle:
+            return PHASE_SETTLED
+        if now < window_start:
+            return PHASE_PREWINDOW
+        if hot_start <= now < hot_end:
+            return PHASE_HOT
+        return PHASE_WINDOW
+
+    def next_due(self, game: Dict[str, Any], now: float) -> Optional[float]:
+        """When to poll a game next, given that it was just polled at ``now``.
+
+        Returns:
+            Unix time of the next poll, or None once the game is settled
+        """
+        window_start, hot_start, hot_end, settle = self.boundaries(game)
+        if now >= settle:
+            return None
+        if now < window_start:
+            return min(now + self.prewindow_interval, window_start)
+        if hot_start <= now < hot_end:
+            return min(now + self.hot_interval, settle)
+        # Wake up exactly when the game turns hot or settles
+        upcoming = hot_start if now < hot_start else settle
+        return min(now + self.window_interval, upcoming)
+
+    def retry_due(self, game: Dict[str, Any], now: float, failures: int) -> float:
+        """When to poll a game again after ``failures`` consecutive failed fetches."""
+        retry = now + min(self.retry_max, self.retry_base * 2 ** (failures - 1))
+        regular = self.next_due(game, now)
+        return retry if regular is None else min(retry, regular)
+
+
+class PollScheduler:
+    """Long-lived scheduler polling each game according to its PollPlan."""
+
+    def __init__(
+        self,
+        games: List[Dict[str, Any]],
+        client: Optional[PolymarketClient] = None,
+        plan: Optional[PollPlan] = None,
+        broker: Optional[EventBroker] = None,
+        workers: int = SCHEDULER_WORKERS,
+        clock=time.time
+    ):
+        """Initialize the scheduler.
+
+        Args:
+            games: Schedule entries with 'slug' and 'start_iso'
+            client: Polymarket client shared by every fetch; its rate
+                limiter is the request budget for all games
+            plan: Polling phases and intervals
+            broker: Optional live broker receiving 'prices' events
+            workers: Concurrent fetches of due games
+            clock: Returns the current Unix time
+        """
+        self.games = {game['slug']: game for game in games}
+        self.client = client or PolymarketClient(
+            rate_limiter=TokenBucket(RATE_LIMIT_REQUESTS_PER_SECOND, RATE_LIMIT_BURST)
+        )
+        self.plan = plan or PollPlan()
+        self.broker = broker
+        self.workers = max(1, workers)
+        self.clock = clock
+        self.polls = dict.fromkeys(PHASE_PRIORITY, 0)
+        self.points_written = 0
+        self._queue: List[Tuple[float, int, str]] = []
+        self._sequence = itertools.count()
+        self._last_timestamps: Dict[str, Optional[int]] = {}
+        self._failures: Dict[str, int] = {}
+        self._writer: Optional[database.DatabaseWriter] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _open(self):
+        """Open the writer, load stored progress and queue every unsettled game."""
+        self._writer = database.DatabaseWriter(
+            batch_points=float('inf'), flush_interval=float('inf'), fidelity_minutes=self.plan.fidelity
+        )
+        closed = set()
+        for state in database.get_sync_state().values():
+            self._last_timestamps[state['slug']] = state['last_timestamp']
+            if state['complete']:
+                closed.add(state['slug'])
+        database.close_connections()
+        now = self.clock()
+        for slug in self.games:
+            if slug not in closed:
+                self._push(now, slug)
+        logger.info("Poll scheduler loaded", extra={"queued": len(self._queue), "closed": len(closed)})
+
+    def _push(self, due: float, slug: str):
+        heapq.heappush(self._queue, (due, next(self._sequence), slug))
+
+    @property
+    def queued(self) -> int:
+        """Games still scheduled."""
+        return len(self._queue)
+
+    def next_due(self) -> Optional[float]:
+        """Unix time of the earliest scheduled poll (None when nothing is left)."""
+        return self._queue[0][0] if self._queue else None
+
+    def _fetch(
+        self, game: Dict[str, Any], phase: str
+    ) -> Tuple[Dict[str, Any], str, Optional[str], Optional[List[Dict]]]:
+        """Fetch one game's new points (before the window, only resolve its market).
+
+        Returns:
+            Tuple of (game, phase, token ID, new points); the points are None
+            when the market could not be resolved or the request failed
+        """
+        slug = game['slug']
+        try:
+            token_id = self.client.get_token_id_from_slug(slug)
+            if phase == PHASE_PREWINDOW:
+                return game, phase, token_id, []
+            if not token_id:
+                return game, phase, None, None
+            last_ts = self._last_timestamps.get(slug)
+            history = self.client.get_price_history(
+                token_id, game['start_iso'], since_ts=last_ts, fidelity=self.plan.fidelity
+            )
+        except Exception:
+            logger.exception("Scheduled fetch raised", extra={"slug": slug, "phase": phase})
+            return game, phase, None, None
+        if history is None:
+            return game, phase, token_id, None
+        if last_ts is not None:
+            history = [entry for entry in history if entry['t'] > last_ts]
+        return game, phase, token_id, history
+
+    def _retry(self, slug: str, phase: str, now: float):
+        """Reschedule a game whose poll failed, backing off on repeated failures."""
+        failures = self._failures.get(slug, 0) + 1
+        self._failures[slug] = failures
+        retry = self.plan.retry_due(self.games[slug], now, failures)
+        logger.warning(
+            "Scheduled fetch failed",
+            extra={"slug": slug, "phase": phase, "failures": failures, "retry_in": retry - now}
+        )
+        self._push(retry, slug)
+
+    def run_due(self, now: Optional[float] = None) -> int:
+        """Poll every game that is due and reschedule it.
+
+        Args:
+            now: Current Unix time (defaults to the clock)
+
+        Returns:
+            Number of new points written
+        """
+        if self._writer is None:
+            self._open()
+        now = self.clock() if now is None else now
+        due = []
+        while self._queue and self._queue[0][0] <= now:
+            _, _, slug = heapq.heappop(self._queue)
+            due.append((self.plan.phase(self.games[slug], now), slug))
+        if not due:
+            return 0
+        # Hot games first, so they get the rate budget when it is short
+        due.sort(key=lambda item: PHASE_PRIORITY[item[0]])
+
+        # Every popped game is pushed back (or settled) even if this round fails
+        rescheduled = set()
+        settled = []
+        fetched: Dict[str, List[Dict[str, Any]]] = {}
+        try:
+            self.client.resolve_markets([slug for _, slug in due])
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                results = executor.map(lambda item: self._fetch(self.games[item[1]], item[0]), due)
+                for game, phase, token_id, history in results:
+                    slug = game['slug']
+                    self.polls[phase] += 1
+                    if history is None:
+                        self._retry(slug, phase, now)
+                        rescheduled.add(slug)
+                        continue
+                    self._failures.pop(slug, None)
+                    complete = phase == PHASE_SETTLED
+                    if token_id and (history or complete):
+                        self._writer.write_game(
+                            slug=slug,
+                            game_date=game['start_iso'][:10],
+                            game_start_iso=game['start_iso'],
+                            token_id=token_id,
+                            history=history,
+                            complete=complete
+                        )
+                    if history:
+                        fetched[slug] = history
+                    next_due = self.plan.next_due(game, now)
+                    if next_due is None:
+                        # Only dropped once the completing write is committed
+                        settled.append(slug)
+                        continue
+                    self._push(next_due, slug)
+                    rescheduled.add(slug)
+
+            changed = self._writer.flush()
+            rescheduled.update(settled)
+        finally:
+            for phase, slug in due:
+                if slug not in rescheduled:
+                    self._retry(slug, phase, now)
+
+        # Stored points are the new high-water marks; unstored ones are fetched again
+        for slug, history in fetched.items():
+            self._last_timestamps[slug] = max(entry['t'] for entry in history)
+        points = sum(len(fetched[slug]) for slug in changed)
+        if self.broker is not None:
+            for slug, game_id in changed.items():
+                self.broker.publish("prices", price_event(slug, game_id, fetched[slug]))
+        self.points_written += points
+        logger.info(
+            "Scheduled polls finished",
+            extra={"due": len(due), "games_updated": len(changed), "points": points, "queued": len(self._queue)}
+        )
+        return points
+
+    def run(self):
+        """Poll games as they come due until stop() is called or every game is settled."""
+        if self._writer is None:
+            self._open()
+        while not self._stop.is_set() and self._queue:
+            try:
+                self.run_due()
+            except Exception:
+                logger.exception("Scheduled poll failed")
+            next_due = self.next_due()
+            if next_due is not None:
+                self._stop.wait(max(0.0, next_due - self.clock()))
+        logger.info("Poll scheduler finished", extra={"polls": self.polls, "points": self.points_written})
+        self.close()
+
+    def close(self):
+        """Flush and close the database writer."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        database.close_connections()
+
+    def start(self) -> "PollScheduler":
+        """Run the scheduler on a daemon thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="poll-scheduler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the scheduler and wait for the current round of polls."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Poll games on a game-window-aware schedule.")
+    parser.add_argument("--schedule", metavar="PATH", help="League schedule JSON to poll")
+    parser.add_argument("--league", action="store_true", help="Poll the league schedule instead of SIXERS_GAMES")
+    parser.add_argument("--team", help="Only poll this team's games (implies --league)")
+    parser.add_argument("--rate", type=float, default=RATE_LIMIT_REQUESTS_PER_SECOND,
+                        help="Requests per second shared by all games")
+    parser.add_argument("--burst", type=int, default=RATE_LIMIT_BURST, help="Token-bucket burst size")
+    parser.add_argument("--workers", type=int, default=SCHEDULER_WORKERS, help="Concurrent fetches")
+    parser.add_argument("--hot-interval", type=float, default=SCHEDULER_HOT_INTERVAL_SECONDS,
+                        help="Seconds between polls of hot games")
+    parser.add_argument("--window-interval", type=float, default=SCHEDULER_WINDOW_INTERVAL_SECONDS,
+                        help="Seconds between polls of other in-window games")
+    parser.add_argument("--gamma-base", default=GAMMA_API_BASE, help="Gamma API base URL")
+    parser.add_argument("--clob-base", default=CLOB_API_BASE, help="CLOB API base URL")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=LOG_LEVEL, format=LOG_FORMAT)
+    if args.schedule:
+        games = load_league_schedule(args.schedule)
+    elif args.league or args.team:
+        games = load_league_schedule(teams=NBA_TEAMS)
+    else:
+        games = list(SIXERS_GAMES)
+    if args.team:
+        games = games_for_team(games, args.team)
+
+    client = PolymarketClient(
+        rate_limiter=TokenBucket(args.rate, args.burst),
+        gamma_base=args.gamma_base,
+        clob_base=args.clob_base
+    )
+    scheduler = PollScheduler(
+        games,
+        client=client,
+        plan=PollPlan(hot_interval=args.hot_interval, window_interval=args.window_interval),
+        workers=args.workers
+    )
+    try:
+        scheduler.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.close()
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
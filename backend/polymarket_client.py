@@ -2,11 +2,16 @@
 Polymarket API client for fetching market data and price history.
 """
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import ast
 import logging
-from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, List, Dict, Any, Tuple
 
 from config import (
     GAMMA_API_BASE,
@@ -14,50 +19,425 @@ from config import (
     PRICE_WINDOW_HOURS_BEFORE,
     PRICE_WINDOW_HOURS_AFTER,
     PRICE_FIDELITY,
+    HTTP_POOL_SIZE,
+    HTTP_MAX_RETRIES,
+    HTTP_BACKOFF_BASE_SECONDS,
+    HTTP_BACKOFF_MAX_SECONDS,
+    HTTP_RETRY_STATUS_CODES,
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    CIRCUIT_BREAKER_RESET_SECONDS,
+    GAMMA_BULK_BATCH_SIZE,
+    GAMMA_CACHE_TTL_SECONDS,
+    CLOB_OPEN_WINDOW_CACHE_TTL_SECONDS,
 )
+from http_cache import ResponseCache
+from market_cache import MarketCache
+from rate_limiter import TokenBucket
+import metrics
 
 logger = logging.getLogger(__name__)
 
 
+def price_window(game_time_iso: str) -> Tuple[int, int]:
+    """Get the price history window for a game.
+    
+    Args:
+        game_time_iso: Game start time in ISO format
+        
+    Returns:
+        Tuple of (start, end) Unix timestamps
+    """
+    game_dt = datetime.fromisoformat(game_time_iso.replace('Z', '+00:00'))
+    end_ts = int((game_dt + timedelta(hours=PRICE_WINDOW_HOURS_AFTER)).timestamp())
+    start_ts = int((game_dt - timedelta(hours=PRICE_WINDOW_HOURS_BEFORE)).timestamp())
+    return start_ts, end_ts
+
+
+class CircuitBreaker:
+    """Fail fast once an upstream has failed repeatedly.
+
+    The breaker opens after ``failure_threshold`` consecutive failed
+    requests and rejects requests for ``reset_seconds``. A request counts
+    once, after its retries are used up, so a single flaky call cannot
+    open the breaker for everyone else. After that a single probe
+    request is let through (half-open); its outcome closes or re-opens
+    the breaker.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+        reset_seconds: float = CIRCUIT_BREAKER_RESET_SECONDS
+    ):
+        """Initialize the circuit breaker.
+        
+        Args:
+            failure_threshold: Consecutive failures before opening
+            reset_seconds: Seconds to stay open before allowing a probe
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Return True if a request may be sent to the upstream."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_seconds:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        """Record a successful request and close the breaker."""
+        with self._lock:
+            self._failures = 0
+            self._probe_in_flight = False
+            self.state = self.CLOSED
+
+    def record_failure(self):
+        """Record a failed request, opening the breaker if needed."""
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning("Circuit breaker opened", extra={"failures": self._failures})
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class EndpointStats:
+    """Latency and retry counters for one API endpoint."""
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.rejected = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, retried: bool, error: bool):
+        """Record one HTTP attempt."""
+        with self._lock:
+            self.requests += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            if retried:
+                self.retries += 1
+            if error:
+                self.errors += 1
+
+    def record_cache(self, hit: bool):
+        """Record a response cache lookup."""
+        with self._lock:
+            if hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+
+    def record_rejected(self):
+        """Record a request rejected by the circuit breaker."""
+        with self._lock:
+            self.rejected += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the counters as a plain dictionary."""
+        with self._lock:
+            avg = self.total_latency / self.requests if self.requests else 0.0
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "errors": self.errors,
+                "rejected": self.rejected,
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+                "avg_latency_ms": round(avg * 1000, 2),
+                "max_latency_ms": round(self.max_latency * 1000, 2),
+            }
+
+
 class PolymarketClient:
     """Client for interacting with Polymarket APIs."""
 
-    def __init__(self, timeout: int = 10):
+    def __init__(
+        self,
+        timeout: int = 10,
+        rate_limiter: Optional[TokenBucket] = None,
+        gamma_base: str = GAMMA_API_BASE,
+        clob_base: str = CLOB_API_BASE,
+        max_retries: int = HTTP_MAX_RETRIES,
+        backoff_base: float = HTTP_BACKOFF_BASE_SECONDS,
+        backoff_max: float = HTTP_BACKOFF_MAX_SECONDS,
+        pool_size: int = HTTP_POOL_SIZE,
+        market_cache: Optional[MarketCache] = None,
+        bulk_batch_size: int = GAMMA_BULK_BATCH_SIZE,
+        response_cache: Optional[ResponseCache] = None
+    ):
         """Initialize the Polymarket client.
         
         Args:
             timeout: Request timeout in seconds
+            rate_limiter: Optional token bucket shared with other clients;
+                one token is taken before every HTTP request
+            gamma_base: Gamma API base URL
+            clob_base: CLOB API base URL
+            max_retries: Retries for transient failures of a single request
+            backoff_base: Base delay for exponential backoff in seconds
+            backoff_max: Maximum delay between retries in seconds
+            pool_size: Keep-alive connections kept per host
+            market_cache: Optional persistent slug -> market cache
+            bulk_batch_size: Slugs requested per bulk Gamma call
+            response_cache: Optional record/replay HTTP response cache
         """
         self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.gamma_base = gamma_base.rstrip('/')
+        self.clob_base = clob_base.rstrip('/')
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.market_cache = market_cache
+        self.bulk_batch_size = max(1, bulk_batch_size)
+        self.response_cache = response_cache
+        self._markets: Dict[str, Dict[str, Any]] = {}
+        self._markets_lock = threading.Lock()
+        self.request_count = 0
+        self._count_lock = threading.Lock()
+        
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
+        self.breakers = {"gamma": CircuitBreaker(), "clob": CircuitBreaker()}
+        self.stats: Dict[str, EndpointStats] = {}
+        self._stats_lock = threading.Lock()
 
-    def get_token_id_from_slug(self, slug: str) -> Optional[str]:
-        """Get market CLOB token ID from Gamma slug endpoint.
+    def close(self):
+        """Close pooled connections."""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _before_request(self):
+        """Apply rate limiting and count an outgoing request."""
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        with self._count_lock:
+            self.request_count += 1
+
+    def _endpoint_stats(self, endpoint: str) -> EndpointStats:
+        with self._stats_lock:
+            if endpoint not in self.stats:
+                self.stats[endpoint] = EndpointStats()
+            return self.stats[endpoint]
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get per-endpoint latency and retry counters.
+        
+        Returns:
+            Mapping of endpoint name to counter snapshot
+        """
+        with self._stats_lock:
+            endpoints = dict(self.stats)
+        return {name: stats.snapshot() for name, stats in sorted(endpoints.items())}
+
+    def _retry_delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        """Compute the delay before the next attempt.
+        
+        Honors a Retry-After header (seconds or HTTP date) when present,
+        otherwise uses exponential backoff with full jitter.
+        """
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    retry_at = parsedate_to_datetime(retry_after)
+                    delay = (retry_at - datetime.now(timezone.utc)).total_seconds()
+                except (TypeError, ValueError):
+                    delay = None
+            if delay is not None:
+                return min(max(delay, 0.0), self.backoff_max)
+                
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def _get(
+        self,
+        upstream: str,
+        endpoint: str,
+        url: str,
+        params: Optional[Any] = None,
+        cache_ttl: Optional[float] = None
+    ) -> Optional[requests.Response]:
+        """Issue a GET with retries, backoff and circuit breaking.
+        
+        When a response cache is configured it is consulted first; in
+        replay mode a cache miss fails without touching the network.
         
         Args:
-            slug: Market slug identifier
+            upstream: Breaker key ('gamma' or 'clob')
+            endpoint: Name used for per-endpoint stats
+            url: Request URL
+            params: Query parameters (dict or sequence of pairs)
+            cache_ttl: Seconds a recorded response stays fresh, or None
+                to keep it forever
             
         Returns:
-            Token ID string if found, None otherwise
+            The final response (which may be a non-retryable error), or None
+            if the request failed or was rejected by the circuit breaker
         """
-        url = f"{GAMMA_API_BASE}/markets/slug/{slug}"
+        breaker = self.breakers[upstream]
+        stats = self._endpoint_stats(endpoint)
+        
+        if self.response_cache is not None:
+            cached = self.response_cache.get(url, params)
+            if cached is not None:
+                stats.record_cache(hit=True)
+                metrics.UPSTREAM_RESPONSES.labels(upstream, endpoint, "cache_hit").inc()
+                return cached
+            stats.record_cache(hit=False)
+            if self.response_cache.replay:
+                logger.error("Replay cache miss", extra={"url": url, "params": params})
+                return None
+        
+        # The breaker counts logical requests: one outcome per call, after retries
+        if not breaker.allow_request():
+            stats.record_rejected()
+            metrics.UPSTREAM_RESPONSES.labels(upstream, endpoint, "rejected").inc()
+            logger.error("Circuit open, skipping request", extra={"upstream": upstream, "url": url})
+            return None
+            
+        # Exactly one outcome per request, even if an attempt raises
+        record_outcome = breaker.record_failure
+        response = None
+        try:
+            for attempt in range(self.max_retries + 1):
+                if attempt > 0 and breaker.state == CircuitBreaker.OPEN:
+                    # Other requests tripped the breaker while this one was backing off
+                    record_outcome = None
+                    stats.record_rejected()
+                    metrics.UPSTREAM_RESPONSES.labels(upstream, endpoint, "rejected").inc()
+                    logger.error("Circuit opened, abandoning retries", extra={"upstream": upstream, "url": url})
+                    return None
+                    
+                self._before_request()
+                response = None
+                started = time.monotonic()
+                try:
+                    response = self.session.get(url, params=params, timeout=self.timeout)
+                except requests.RequestException as e:
+                    logger.warning("Request failed", extra={"url": url, "error": str(e), "attempt": attempt})
+                latency = time.monotonic() - started
+                
+                transient = response is None or response.status_code in HTTP_RETRY_STATUS_CODES
+                stats.record(latency, retried=attempt > 0, error=transient)
+                metrics.UPSTREAM_REQUEST_SECONDS.labels(upstream, endpoint).observe(latency)
+                metrics.UPSTREAM_RESPONSES.labels(
+                    upstream, endpoint, response.status_code if response is not None else "error"
+                ).inc()
+                
+                if not transient:
+                    record_outcome = breaker.record_success
+                    if self.response_cache is not None:
+                        self.response_cache.put(url, params, response, cache_ttl)
+                    return response
+                    
+                if attempt == self.max_retries:
+                    break
+                    
+                delay = self._retry_delay(attempt, response)
+                logger.info(
+                    "Retrying request",
+                    extra={
+                        "url": url,
+                        "status": response.status_code if response is not None else None,
+                        "attempt": attempt + 1,
+                        "delay": delay
+                    }
+                )
+                time.sleep(delay)
+        finally:
+            if record_outcome is not None:
+                record_outcome()
+        return response
+
+    def parse_market(self, data: Dict[str, Any], slug: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Parse a Gamma market payload into a cacheable market dictionary.
+        
+        Token IDs and outcomes are normalized here, once, when the cache is
+        filled rather than every time a token ID is needed.
+        
+        Args:
+            data: Gamma market payload
+            slug: Slug the market was requested by (defaults to the payload slug)
+            
+        Returns:
+            Market dictionary, or None if the payload has no token IDs
+        """
+        logger.debug("Gamma payload keys", extra={"keys": list(data.keys())})
+        
+        # clobTokenIds is typically a list; index 0 is usually 'Yes'
+        token_ids = self._normalize_token_ids(data.get('clobTokenIds', []))
+        if not isinstance(token_ids, list) or not token_ids:
+            return None
+        
+        outcomes = data.get('outcomes', [])
+        if isinstance(outcomes, str):
+            try:
+                outcomes = json.loads(outcomes)
+            except ValueError:
+                outcomes = []
+        
+        return {
+            "slug": slug or data.get('slug'),
+            "market_id": str(data['id']) if data.get('id') is not None else None,
+            "condition_id": data.get('conditionId'),
+            "question": data.get('question'),
+            "token_ids": [str(t) for t in token_ids],
+            "outcomes": outcomes if isinstance(outcomes, list) else [],
+            "end_date": data.get('endDate'),
+            "closed": bool(data.get('closed', False)),
+        }
+
+    def _fetch_market_by_slug(self, slug: str) -> Optional[Dict[str, Any]]:
+        """Fetch and parse a single market from the Gamma slug endpoint."""
+        url = f"{self.gamma_base}/markets/slug/{slug}"
         
         try:
             logger.info("Requesting Gamma market by slug", extra={"slug": slug, "url": url})
-            response = requests.get(url, timeout=self.timeout)
+            response = self._get("gamma", "gamma_market_by_slug", url, cache_ttl=GAMMA_CACHE_TTL_SECONDS)
+            if response is None:
+                return None
             logger.debug("Gamma response", extra={"status": response.status_code})
             
             if response.status_code == 200:
-                data = response.json()
-                logger.debug("Gamma payload keys", extra={"keys": list(data.keys())})
-                
-                # clobTokenIds is typically a list; index 0 is usually 'Yes'
-                token_ids = data.get('clobTokenIds', [])
-                token_ids = self._normalize_token_ids(token_ids)
-                
-                if isinstance(token_ids, list) and token_ids:
-                    token_id = token_ids[0]
-                    logger.info("Resolved token id", extra={"token_id": token_id})
-                    return token_id
+                return self.parse_market(response.json(), slug=slug)
             else:
                 logger.error(
                     "Gamma API error",
@@ -69,9 +449,119 @@ class PolymarketClient:
                 )
         except Exception as e:
             logger.exception("Error fetching slug", extra={"slug": slug})
-        
+            
         return None
 
+    def _fetch_markets_bulk(self, slugs: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch many markets with one Gamma /markets request per batch."""
+        url = f"{self.gamma_base}/markets"
+        markets = {}
+        
+        for i in range(0, len(slugs), self.bulk_batch_size):
+            batch = slugs[i:i + self.bulk_batch_size]
+            params = [("slug", slug) for slug in batch] + [("limit", len(batch))]
+            try:
+                logger.info("Requesting Gamma markets in bulk", extra={"count": len(batch)})
+                response = self._get(
+                    "gamma", "gamma_markets_bulk", url, params, cache_ttl=GAMMA_CACHE_TTL_SECONDS
+                )
+                if response is None:
+                    continue
+                if response.status_code != 200:
+                    logger.error(
+                        "Gamma API error",
+                        extra={"status": response.status_code, "body": response.text[:500]}
+                    )
+                    continue
+                
+                wanted = set(batch)
+                for data in response.json():
+                    if data.get('slug') not in wanted:
+                        continue
+                    market = self.parse_market(data)
+                    if market:
+                        markets[market['slug']] = market
+            except Exception as e:
+                logger.exception("Error fetching markets in bulk", extra={"count": len(batch)})
+        
+        return markets
+
+    def resolve_markets(self, slugs: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Resolve many slugs to market metadata.
+        
+        Markets already resolved by this client, then markets in the
+        persistent market cache, are served without a request. The rest are
+        fetched in bulk from Gamma; any slug the bulk endpoint does not
+        return falls back to the single-slug endpoint. Newly resolved
+        markets are written to the cache.
+        
+        Args:
+            slugs: Market slug identifiers
+            
+        Returns:
+            Mapping of slug to market dictionary for every resolved slug
+        """
+        slugs = list(dict.fromkeys(slugs))
+        with self._markets_lock:
+            markets = {slug: self._markets[slug] for slug in slugs if slug in self._markets}
+        missing = [slug for slug in slugs if slug not in markets]
+        if missing and self.market_cache:
+            markets.update(self.market_cache.get_many(missing))
+            missing = [slug for slug in slugs if slug not in markets]
+        logger.info(
+            "Resolving markets",
+            extra={"requested": len(slugs), "cached": len(markets), "missing": len(missing)}
+        )
+        if not missing:
+            self._remember_markets(markets)
+            return markets
+        
+        fetched = self._fetch_markets_bulk(missing) if len(missing) > 1 else {}
+        for slug in missing:
+            if slug not in fetched:
+                market = self._fetch_market_by_slug(slug)
+                if market:
+                    fetched[slug] = market
+        
+        if self.market_cache and fetched:
+            self.market_cache.put_many(fetched.values())
+        markets.update(fetched)
+        self._remember_markets(markets)
+        return markets
+
+    def _remember_markets(self, markets: Dict[str, Dict[str, Any]]):
+        """Keep resolved markets in memory for the lifetime of the client."""
+        with self._markets_lock:
+            self._markets.update(markets)
+
+    def get_market(self, slug: str) -> Optional[Dict[str, Any]]:
+        """Resolve a single slug to market metadata, using the cache if available.
+        
+        Args:
+            slug: Market slug identifier
+            
+        Returns:
+            Market dictionary if found, None otherwise
+        """
+        return self.resolve_markets([slug]).get(slug)
+
+    def get_token_id_from_slug(self, slug: str) -> Optional[str]:
+        """Get market CLOB token ID from Gamma slug endpoint.
+        
+        Args:
+            slug: Market slug identifier
+            
+        Returns:
+            Token ID string if found, None otherwise
+        """
+        market = self.get_market(slug)
+        if not market:
+            return None
+        
+        token_id = market['token_ids'][0]
+        logger.info("Resolved token id", extra={"token_id": token_id})
+        return token_id
+
     def _normalize_token_ids(self, token_ids: Any) -> List[str]:
         """Normalize token IDs which may be a string representation of a list.
         
@@ -91,7 +581,7 @@ class PolymarketClient:
                 except Exception as e:
                     logger.error("Failed to parse clobTokenIds string", extra={"error": str(e)})
                     token_ids = []
-        
+                    
         logger.debug(
             "Parsed clobTokenIds",
             extra={"type": type(token_ids).__name__, "value": token_ids}
@@ -101,40 +591,55 @@ class PolymarketClient:
     def get_price_history(
         self,
         token_id: str,
-        game_time_iso: str
-    ) -> List[Dict[str, Any]]:
+        game_time_iso: str,
+        since_ts: Optional[int] = None,
+        fidelity: int = PRICE_FIDELITY
+    ) -> Optional[List[Dict[str, Any]]]:
         """Get price history for a market token.
         
         Args:
             token_id: Market token identifier
             game_time_iso: Game start time in ISO format
+            since_ts: Optional Unix timestamp to start from instead of the
+                beginning of the game window (for incremental fetches)
+            fidelity: Minutes between returned points
             
         Returns:
-            List of price history entries with 't' (timestamp) and 'p' (price)
+            List of price history entries with 't' (timestamp) and 'p' (price),
+            empty if the market has no new points, or None if the request
+            failed (retries exhausted, error status or open circuit breaker)
         """
-        url = f"{CLOB_API_BASE}/prices-history"
+        url = f"{self.clob_base}/prices-history"
         
         # Calculate time window relative to game time
-        game_dt = datetime.fromisoformat(game_time_iso.replace('Z', '+00:00'))
-        end_ts = int((game_dt + timedelta(hours=PRICE_WINDOW_HOURS_AFTER)).timestamp())
-        start_ts = int((game_dt - timedelta(hours=PRICE_WINDOW_HOURS_BEFORE)).timestamp())
+        start_ts, end_ts = price_window(game_time_iso)
+        if since_ts is not None:
+            start_ts = max(start_ts, int(since_ts))
+            if start_ts >= end_ts:
+                logger.debug("Price window already fetched", extra={"token": token_id})
+                return []
         
         params = {
             "market": token_id,
             "startTs": start_ts,
             "endTs": end_ts,
-            "fidelity": PRICE_FIDELITY
+            "fidelity": fidelity
         }
         
         try:
             logger.info("Requesting price history", extra={"url": url, "params": params})
-            response = requests.get(url, params=params, timeout=self.timeout)
+            # A closed window's history is final; an open one keeps changing
+            cache_ttl = None if time.time() >= end_ts else CLOB_OPEN_WINDOW_CACHE_TTL_SECONDS
+            response = self._get("clob", "clob_prices_history", url, params, cache_ttl=cache_ttl)
+            if response is None:
+                return None
             logger.debug("CLOB response", extra={"status": response.status_code})
             
             if response.status_code == 200:
                 payload = response.json()
                 history = payload.get('history', [])
                 logger.info("Received price history", extra={"points": len(history)})
+                metrics.POINTS_FETCHED.inc(len(history))
                 return history
             else:
                 logger.error(
@@ -147,5 +652,5 @@ class PolymarketClient:
                 )
         except Exception as e:
             logger.exception("Error fetching history", extra={"token": token_id})
-        
-        return []
+            
+        return None
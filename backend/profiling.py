@@ -0,0 +1,273 @@
+"""
+Opt-in profiling of single web server requests.
+
+``ProfilingMiddleware`` wraps the Flask WSGI app. A request is profiled
+only when it carries the configured token, either as an ``X-Profile``
+header or as a ``__profile`` query parameter:
+
+    curl -H 'X-Profile: <token>' 'http://localhost:5000/api/backtest?team=phi'
+    curl -H 'X-Profile: <token>; mode=sample; output=inline' 'http://localhost:5000/api/game-analysis'
+    curl 'http://localhost:5000/api/game-analysis?__profile=<token>&__profile_mode=sample'
+
+Modes:
+
+- ``cprofile`` (default): deterministic cProfile of the request. Saved as
+  a ``.prof`` file (pstats; open with snakeviz, or convert with flameprof
+  or gprof2dot). Inline output is the top functions by cumulative time.
+  Time spent inside sqlite3 calls is summed into ``X-Profile-SQLite-Seconds``.
+- ``sample``: samples the handling thread's stack every
+  ``PROFILE_SAMPLE_INTERVAL_SECONDS`` and writes collapsed stacks
+  (``.folded``) for flamegraph.pl, speedscope or inferno.
+
+Artifacts go to ``PROFILE_DIR`` and are named in ``X-Profile-Artifact``.
+With ``output=inline`` the artifact replaces the response body, and the
+original status moves to ``X-Profile-Status``. Profiled requests bypass
+the response cache, so the view actually runs.
+
+Without ``TEAM_TOKENS_PROFILE_TOKEN`` the middleware is not installed at
+all, so profiling costs nothing when it is off.
+"""
+import cProfile
+import hmac
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from config import PROFILE_DIR, PROFILE_SAMPLE_INTERVAL_SECONDS, PROFILE_TOP_FUNCTIONS
+from response_cache import BYPASS_ENVIRON_KEY
+
+logger = logging.getLogger(__name__)
+
+MODE_CPROFILE = "cprofile"
+MODE_SAMPLE = "sample"
+MODES = (MODE_CPROFILE, MODE_SAMPLE)
+OUTPUT_FILE = "file"
+OUTPUT_INLINE = "inline"
+
+QUERY_PREFIX = "__profile"
+
+
+class StackSampler:
+    """Samples one thread's Python stack on a background thread."""
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_SAMPLE_INTERVAL_SECONDS):
+        """Initialize the sampler.
+
+        Args:
+            thread_id: Ident of the thread to sample
+            interval: Seconds between samples
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _frame_name(frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                names.append(self._frame_name(frame))
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+                self.samples += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def folded(self) -> str:
+        """Collapsed stacks ('root;...;leaf count' per line)."""
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+
+def sqlite_seconds(stats: pstats.Stats) -> float:
+    """Time spent inside sqlite3 C calls (execute, fetch, commit, ...)."""
+    total = 0.0
+    for (filename, _, name), (_, _, tottime, _, _) in stats.stats.items():
+        if filename == "~" and "sqlite3" in name:
+            total += tottime
+    return total
+
+
+def summarize(stats: pstats.Stats, limit: int = PROFILE_TOP_FUNCTIONS) -> str:
+    """Top functions by cumulative time, as pstats prints them."""
+    stream = io.StringIO()
+    stats.stream = stream
+    stats.sort_stats("cumulative").print_stats(limit)
+    return stream.getvalue()
+
+
+class ProfilingMiddleware:
+    """WSGI middleware that profiles requests carrying the profiling token."""
+
+    def __init__(
+        self,
+        wsgi_app: Callable,
+        token: str,
+        output_dir: str = PROFILE_DIR,
+        sample_interval: float = PROFILE_SAMPLE_INTERVAL_SECONDS
+    ):
+        """Initialize the middleware.
+
+        Args:
+            wsgi_app: Wrapped WSGI application (e.g. ``app.wsgi_app``)
+            token: Secret that requests must present to be profiled
+            output_dir: Directory receiving profile artifacts
+            sample_interval: Seconds between stack samples in sample mode
+        """
+        if not token:
+            raise ValueError("A profiling token is required")
+        self.wsgi_app = wsgi_app
+        self.token = token
+        self.output_dir = output_dir
+        self.sample_interval = sample_interval
+
+    def _options(self, environ: Dict) -> Optional[Dict[str, str]]:
+        """Profiling options of a request, or None if it is not (validly) asking."""
+        options: Dict[str, str] = {}
+        header = environ.get("HTTP_X_PROFILE")
+        if header is not None:
+            token, *params = (part.strip() for part in header.split(";"))
+            options["token"] = token
+            for param in params:
+                name, _, value = param.partition("=")
+                options[name.strip()] = value.strip()
+        else:
+            pairs = parse_qsl(environ.get("QUERY_STRING", ""), keep_blank_values=True)
+            for name, value in pairs:
+                if name == QUERY_PREFIX:
+                    options["token"] = value
+                elif name.startswith(QUERY_PREFIX + "_"):
+                    options[name[len(QUERY_PREFIX) + 1:]] = value
+            # Hide the profiling parameters from the view
+            environ["QUERY_STRING"] = urlencode([(n, v) for n, v in pairs if not n.startswith(QUERY_PREFIX)])
+
+        if not hmac.compare_digest(options.get("token", "").encode(), self.token.encode()):
+            logger.warning("Ignoring profiling request with a bad token", extra={"path": environ.get("PATH_INFO")})
+            return None
+        if options.setdefault("mode", MODE_CPROFILE) not in MODES:
+            options["mode"] = MODE_CPROFILE
+        options.setdefault("output", OUTPUT_FILE)
+        return options
+
+    def __call__(self, environ: Dict, start_response: Callable) -> Iterable[bytes]:
+        if "HTTP_X_PROFILE" not in environ and QUERY_PREFIX not in environ.get("QUERY_STRING", ""):
+            return self.wsgi_app(environ, start_response)
+        options = self._options(environ)
+        if options is None:
+            return self.wsgi_app(environ, start_response)
+        return self._profile(environ, start_response, options)
+
+    def _profile(self, environ: Dict, start_response: Callable, options: Dict[str, str]) -> Iterable[bytes]:
+        """Run one request under the profiler and attach the artifact."""
+        environ[BYPASS_ENVIRON_KEY] = True
+        captured: List = []
+
+        def capture(status, headers, exc_info=None):
+            captured[:] = [status, headers, exc_info]
+            return lambda data: None
+
+        profiler = sampler = None
+        if options["mode"] == MODE_SAMPLE:
+            sampler = StackSampler(threading.get_ident(), self.sample_interval)
+            sampler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+        started = time.perf_counter()
+        try:
+            iterable = self.wsgi_app(environ, capture)
+            headers = dict((name.lower(), value) for name, value in captured[1]) if captured else {}
+            streaming = headers.get("content-type", "").startswith("text/event-stream")
+            body = None
+            if not streaming:
+                # Generating the body is part of the request (e.g. streamed JSON)
+                try:
+                    body = b"".join(iterable)
+                finally:
+                    if hasattr(iterable, "close"):
+                        iterable.close()
+            elapsed = time.perf_counter() - started
+        finally:
+            # Never leave the profiler enabled on this thread or the sampler running
+            if sampler is not None:
+                sampler.stop()
+            else:
+                profiler.disable()
+
+        status, response_headers, exc_info = captured
+        name = "{}-{}-{}".format(
+            time.strftime("%Y%m%dT%H%M%S"),
+            environ.get("PATH_INFO", "/").strip("/").replace("/", "_") or "index",
+            uuid.uuid4().hex[:8],
+        )
+        extra_headers = [("X-Profile-Seconds", f"{elapsed:.6f}"), ("X-Profile-Mode", options["mode"])]
+        artifact, inline = self._artifact(name, profiler, sampler, extra_headers)
+        extra_headers.append(("X-Profile-Artifact", os.path.basename(artifact)))
+        logger.info("Profiled request", extra={"path": environ.get("PATH_INFO"), "artifact": artifact,
+                                               "seconds": round(elapsed, 6)})
+
+        if options["output"] == OUTPUT_INLINE:
+            if streaming and hasattr(iterable, "close"):
+                iterable.close()
+            payload = inline.encode("utf-8")
+            start_response("200 OK", [
+                ("Content-Type", "text/plain; charset=utf-8"),
+                ("Content-Length", str(len(payload))),
+                ("X-Profile-Status", status),
+                ("Cache-Control", "no-store"),
+            ] + extra_headers)
+            return [payload]
+
+        start_response(status, list(response_headers) + extra_headers, exc_info)
+        return iterable if streaming else [body]
+
+    def _artifact(
+        self,
+        name: str,
+        profiler: Optional[cProfile.Profile],
+        sampler: Optional[StackSampler],
+        headers: List[Tuple[str, str]]
+    ) -> Tuple[str, str]:
+        """Write the profile to PROFILE_DIR.
+
+        Returns:
+            Tuple of (artifact path, text for inline output)
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        if sampler is not None:
+            path = os.path.join(self.output_dir, f"{name}.folded")
+            folded = sampler.folded()
+            with open(path, "w") as f:
+                f.write(folded)
+            headers.append(("X-Profile-Samples", str(sampler.samples)))
+            return path, folded
+
+        path = os.path.join(self.output_dir, f"{name}.prof")
+        profiler.dump_stats(path)
+        stats = pstats.Stats(profiler)
+        headers.append(("X-Profile-SQLite-Seconds", f"{sqlite_seconds(stats):.6f}"))
+        return path, summarize(stats)
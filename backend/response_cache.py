@@ -0,0 +1,263 @@
+"""
+Server-side cache of web server API responses.
+
+Every API response is derived from the database, which keeps a
+``data_version`` counter that ingest bumps whenever price history
+changes. Responses are cached under (path, query arguments, data
+version), so a repeated request costs one counter lookup and a dictionary
+hit until new data arrives. Cached responses carry a strong ETag (a hash
+of the body) and Last-Modified, answer ``If-None-Match`` /
+``If-Modified-Since`` with 304, and are compressed once per encoding
+(brotli when installed, otherwise gzip).
+"""
+import gzip
+import hashlib
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, Dict, Optional, Tuple
+
+from flask import Response, request
+from werkzeug.http import http_date, parse_date
+
+from config import (
+    RESPONSE_BROTLI_QUALITY,
+    RESPONSE_CACHE_MAX_BYTES,
+    RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_COMPRESS_MIN_BYTES,
+    RESPONSE_GZIP_LEVEL,
+)
+
+try:
+    import brotli
+except ImportError:  # Optional; gzip is always available
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+IDENTITY = "identity"
+# WSGI environ flag that makes cached views run uncached (set by profiling.py)
+BYPASS_ENVIRON_KEY = "teamtokens.cache_bypass"
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a response body.
+
+    Args:
+        body: Uncompressed body
+        encoding: 'br' or 'gzip'
+
+    Returns:
+        Compressed body
+    """
+    if encoding == "br":
+        return brotli.compress(body, quality=RESPONSE_BROTLI_QUALITY)
+    # mtime=0 keeps the output (and so the ETag) deterministic
+    return gzip.compress(body, compresslevel=RESPONSE_GZIP_LEVEL, mtime=0)
+
+
+def choose_encoding(accept_encoding: str, size: int) -> str:
+    """Pick the content encoding for a response.
+
+    Args:
+        accept_encoding: Request Accept-Encoding header
+        size: Uncompressed body size in bytes
+
+    Returns:
+        'br', 'gzip' or 'identity'
+    """
+    if size < RESPONSE_COMPRESS_MIN_BYTES:
+        return IDENTITY
+    accepted = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip().lower())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return IDENTITY
+
+
+class CachedResponse:
+    """One cached response body with its validators and compressed variants."""
+
+    def __init__(self, key: tuple, body: bytes, mimetype: str, last_modified: float):
+        self.key = key
+        self.mimetype = mimetype
+        self.last_modified = last_modified
+        self.digest = hashlib.sha256(body).hexdigest()[:32]
+        self.bodies: Dict[str, bytes] = {IDENTITY: body}
+
+    @property
+    def size(self) -> int:
+        """Bytes held by every stored variant."""
+        return sum(len(body) for body in self.bodies.values())
+
+    def etag(self, encoding: str) -> str:
+        """Strong ETag of one encoded variant (quoted)."""
+        return f'"{self.digest}"' if encoding == IDENTITY else f'"{self.digest}-{encoding}"'
+
+    def matches(self, if_none_match: str) -> bool:
+        """True if an If-None-Match header names any variant of this response."""
+        if if_none_match.strip() == "*":
+            return True
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return any(self.etag(encoding) in tags for encoding in (IDENTITY, "gzip", "br"))
+
+
+class ApiResponseCache:
+    """LRU cache of successful GET responses keyed on the data version."""
+
+    def __init__(
+        self,
+        version_func: Callable[[], int],
+        max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+        max_bytes: int = RESPONSE_CACHE_MAX_BYTES
+    ):
+        """Initialize the cache.
+
+        Args:
+            version_func: Returns the current data version
+            max_entries: Most responses kept
+            max_bytes: Most body bytes kept, compressed variants included
+        """
+        self.version_func = version_func
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple, CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self._version: Optional[int] = None
+        self._version_seen = 0.0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def _observe_version(self, version: int):
+        """Drop entries from older versions when the data version changes (lock held)."""
+        if version != self._version:
+            self._entries.clear()
+            self._bytes = 0
+            self._version = version
+            logger.debug("Response cache reset for new data version", extra={"data_version": version})
+            # Last-Modified has one-second resolution: round up and keep it
+            # strictly increasing so new data never looks unmodified
+            self._version_seen = max(float(math.ceil(time.time())), self._version_seen + 1)
+
+    def _get(self, key: Tuple) -> Optional[CachedResponse]:
+        """Look up an entry and mark it recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return entry
+
+    def _put(self, entry: CachedResponse):
+        """Store an entry unless the data version moved on while it was built."""
+        with self._lock:
+            if entry.key[-1] != self._version or entry.size > self.max_bytes:
+                return
+            old = self._entries.pop(entry.key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[entry.key] = entry
+            self._bytes += entry.size
+            self._evict()
+
+    def _add_variant(self, entry: CachedResponse, encoding: str) -> bytes:
+        """Compress an entry once for an encoding and keep the result."""
+        body = compress(entry.bodies[IDENTITY], encoding)
+        with self._lock:
+            if encoding not in entry.bodies:
+                entry.bodies[encoding] = body
+                if self._entries.get(entry.key) is entry:
+                    self._bytes += len(body)
+                    self._evict()
+        return body
+
+    def _evict(self):
+        """Drop least recently used entries until within limits (lock held)."""
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+
+    def clear(self):
+        """Drop every cached response."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Entry, byte and hit counters."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "data_version": self._version,
+            }
+
+    def cached(self, view: Callable) -> Callable:
+        """Decorator that serves a Flask view from the cache.
+
+        Only 200 responses are cached; errors pass through untouched.
+        """
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.environ.get(BYPASS_ENVIRON_KEY):
+                return view(*args, **kwargs)
+            version = self.version_func()
+            with self._lock:
+                self._observe_version(version)
+                last_modified = self._version_seen
+            key = (request.path, tuple(sorted(request.args.items(multi=True))), version)
+
+            entry = self._get(key)
+            if entry is None:
+                response = view(*args, **kwargs)
+                if not isinstance(response, Response) or response.status_code != 200:
+                    return response
+                entry = CachedResponse(key, response.get_data(), response.mimetype, last_modified)
+                self._put(entry)
+            return self._respond(entry)
+
+        return wrapper
+
+    def _respond(self, entry: CachedResponse) -> Response:
+        """Build a full or 304 response for a cached entry."""
+        encoding = choose_encoding(request.headers.get("Accept-Encoding", ""), len(entry.bodies[IDENTITY]))
+        headers = {
+            "ETag": entry.etag(encoding),
+            "Last-Modified": http_date(entry.last_modified),
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match is not None:
+            fresh = entry.matches(if_none_match)
+        else:
+            since = parse_date(request.headers.get("If-Modified-Since"))
+            fresh = since is not None and int(entry.last_modified) <= since.timestamp()
+        if fresh:
+            with self._lock:
+                self.not_modified += 1
+            return Response(status=304, headers=headers)
+
+        body = entry.bodies.get(encoding)
+        if body is None:
+            body = self._add_variant(entry, encoding)
+        if encoding != IDENTITY:
+            headers["Content-Encoding"] = encoding
+        return Response(body, mimetype=entry.mimetype, headers=headers)
@@ -0,0 +1,333 @@
+"""
+League schedule utilities.
+
+Every game belongs to two teams, so per-team schedules are merged into a
+single league schedule keyed by market slug. Each market is then fetched
+and stored once, and team perspective is applied when reading prices back.
+
+The full 30-team schedule is built from the NBA's public schedule feed and
+saved to ``LEAGUE_SCHEDULE_PATH``:
+    python schedule.py
+    python schedule.py --source scheduleLeagueV2.json   # a downloaded copy
+"""
+import argparse
+import json
+import logging
+import os
+import zlib
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+import requests
+
+from config import (
+    LEAGUE_SCHEDULE_PATH,
+    LOG_FORMAT,
+    LOG_LEVEL,
+    NBA_REGULAR_SEASON_GAMES,
+    NBA_SCHEDULE_URL,
+    NBA_SEASON,
+    NBA_TEAMS,
+    TEAM_SCHEDULES,
+)
+
+logger = logging.getLogger(__name__)
+
+# gameId prefix of regular-season games (preseason, play-in, playoffs and
+# the NBA Cup final use other prefixes)
+REGULAR_SEASON_PREFIX = "002"
+
+
+def parse_slug(slug: str) -> Dict[str, Optional[str]]:
+    """Split a game slug into league, teams and date.
+
+    Slugs look like ``nba-phi-bos-2025-10-22``: the visiting team, the
+    home team, then the US Eastern game date. Teams are named by position
+    because that is what matters for prices: the market quotes the first
+    team's win probability, and the second team's is its inverse.
+
+    Args:
+        slug: Market slug identifier
+
+    Returns:
+        Dictionary with 'league', 'first_team', 'second_team' and 'date'
+    """
+    parts = slug.lower().split('-')
+    date = "-".join(parts[3:6]) if len(parts) >= 6 else None
+    return {
+        "league": parts[0] if parts else None,
+        "first_team": parts[1] if len(parts) >= 2 else None,
+        "second_team": parts[2] if len(parts) >= 3 else None,
+        "date": date,
+    }
+
+
+def is_second_team(slug: str, team: str) -> bool:
+    """Return True if prices for this slug must be inverted for ``team``.
+
+    Args:
+        slug: Market slug identifier
+        team: Team abbreviation (e.g. 'phi')
+    """
+    return parse_slug(slug)["second_team"] == team.lower()
+
+
+def build_league_schedule(
+    team_schedules: Optional[Dict[str, List[Dict[str, str]]]] = None
+) -> List[Dict[str, Any]]:
+    """Merge per-team schedules into one deduplicated league schedule.
+
+    Args:
+        team_schedules: Mapping of team abbreviation to schedule entries
+            with 'slug' and 'start_iso' (defaults to config.TEAM_SCHEDULES)
+
+    Returns:
+        Games sorted by start time, one entry per slug, annotated with
+        league and team fields
+    """
+    team_schedules = TEAM_SCHEDULES if team_schedules is None else team_schedules
+    games: Dict[str, Dict[str, Any]] = {}
+    listed = 0
+
+    for team, schedule in team_schedules.items():
+        for game in schedule:
+            listed += 1
+            slug = game['slug']
+            existing = games.get(slug)
+            if existing:
+                if existing['start_iso'] != game['start_iso']:
+                    logger.warning(
+                        "Conflicting start times for shared game",
+                        extra={"slug": slug, "kept": existing['start_iso'], "ignored": game['start_iso']}
+                    )
+                continue
+            games[slug] = {"slug": slug, "start_iso": game['start_iso'], **parse_slug(slug)}
+
+    schedule = sorted(games.values(), key=lambda g: (g['start_iso'], g['slug']))
+    logger.info(
+        "Built league schedule",
+        extra={"teams": len(team_schedules), "listed": listed, "unique_games": len(schedule)}
+    )
+    return schedule
+
+
+def team_game_counts(games: Iterable[Dict[str, Any]]) -> Counter:
+    """Count the games each team plays in a schedule."""
+    counts: Counter = Counter()
+    for game in games:
+        parsed = parse_slug(game['slug'])
+        counts[parsed['first_team']] += 1
+        counts[parsed['second_team']] += 1
+    return counts
+
+
+def check_league_schedule(
+    games: Iterable[Dict[str, Any]],
+    teams: Iterable[str] = NBA_TEAMS,
+    games_per_team: int = NBA_REGULAR_SEASON_GAMES
+):
+    """Make sure a schedule holds every team's full season.
+
+    A schedule merged from a few teams' lists still mentions most opponents
+    (the Sixers alone play all 29), so counts are checked, not presence.
+
+    Args:
+        games: Schedule entries
+        teams: Teams that must be covered
+        games_per_team: Games each of them must play
+
+    Raises:
+        ValueError: Listing the teams with another number of games
+    """
+    counts = team_game_counts(games)
+    wrong = {team.lower(): counts[team.lower()] for team in teams if counts[team.lower()] != games_per_team}
+    if wrong:
+        listed = ", ".join(f"{team} ({count})" for team, count in sorted(wrong.items()))
+        raise ValueError(f"League schedule does not have {games_per_team} games for: {listed}")
+
+
+def load_league_schedule(
+    path: str = LEAGUE_SCHEDULE_PATH,
+    teams: Optional[Iterable[str]] = None,
+    games_per_team: int = NBA_REGULAR_SEASON_GAMES
+) -> List[Dict[str, Any]]:
+    """Load the league schedule from a JSON file.
+
+    The schedule file may hold either a list of games or a mapping of team
+    abbreviation to that team's games; both are deduplicated by slug.
+
+    Args:
+        path: Path to a JSON schedule file
+        teams: Teams whose full season the schedule must hold (e.g.
+            NBA_TEAMS for a league-wide run)
+        games_per_team: Games each of ``teams`` must play
+
+    Returns:
+        Deduplicated league schedule
+
+    Raises:
+        FileNotFoundError: If the schedule file does not exist
+        ValueError: If any of ``teams`` does not have a full season
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No league schedule at {path}; build it with `python schedule.py`")
+
+    with open(path, 'r') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        games = build_league_schedule(data)
+    else:
+        games = build_league_schedule({"league": data})
+
+    if teams is not None:
+        check_league_schedule(games, teams, games_per_team)
+    return games
+
+
+def parse_nba_schedule(data: Dict[str, Any], season: Optional[str] = NBA_SEASON) -> List[Dict[str, Any]]:
+    """Turn the NBA's ``scheduleLeagueV2`` feed into league schedule entries.
+
+    Only regular-season games are kept. Slugs follow the Polymarket format
+    used by SIXERS_GAMES: visiting team, home team, then the US Eastern
+    game date (``nba-phi-bos-2025-10-22``).
+
+    Args:
+        data: Parsed feed JSON
+        season: Expected season (e.g. '2025-26'), or None to accept any
+
+    Returns:
+        Deduplicated league schedule
+
+    Raises:
+        ValueError: If the feed is for a different season
+    """
+    feed = data.get('leagueSchedule', {})
+    if season and feed.get('seasonYear') not in (None, season):
+        raise ValueError(f"Schedule feed is for season {feed.get('seasonYear')}, expected {season}")
+
+    known = set(NBA_TEAMS)
+    games = []
+    for day in feed.get('gameDates', []):
+        for game in day.get('games', []):
+            if not str(game.get('gameId', '')).startswith(REGULAR_SEASON_PREFIX):
+                continue
+            away = game['awayTeam']['teamTricode'].lower()
+            home = game['homeTeam']['teamTricode'].lower()
+            if away not in known or home not in known:
+                logger.warning("Skipping game with unknown team", extra={"game_id": game.get('gameId')})
+                continue
+            games.append({
+                "slug": f"nba-{away}-{home}-{game['gameDateEst'][:10]}",
+                "start_iso": game['gameDateTimeUTC'],
+            })
+    return build_league_schedule({"league": games})
+
+
+def build_nba_schedule(
+    source: str = NBA_SCHEDULE_URL,
+    path: str = LEAGUE_SCHEDULE_PATH,
+    season: Optional[str] = NBA_SEASON,
+    games_per_team: int = NBA_REGULAR_SEASON_GAMES,
+    timeout: float = 30.0
+) -> List[Dict[str, Any]]:
+    """Build the full league schedule from the NBA feed and save it.
+
+    Args:
+        source: Feed URL, or the path of a downloaded copy
+        path: Destination schedule file
+        season: Expected season, or None to accept any
+        games_per_team: Regular-season games each team must have
+        timeout: Request timeout in seconds
+
+    Returns:
+        The saved league schedule
+
+    Raises:
+        ValueError: If the feed is for another season or a team's season
+            is incomplete
+    """
+    if os.path.exists(source):
+        with open(source, 'r') as f:
+            data = json.load(f)
+    else:
+        response = requests.get(source, timeout=timeout)
+        response.raise_for_status()
+        data = response.json()
+
+    games = parse_nba_schedule(data, season)
+    check_league_schedule(games, NBA_TEAMS, games_per_team)
+    save_league_schedule(games, path)
+    return games
+
+
+def save_league_schedule(games: List[Dict[str, Any]], path: str = LEAGUE_SCHEDULE_PATH) -> str:
+    """Write a league schedule to a JSON file.
+
+    Args:
+        games: Schedule entries with 'slug' and 'start_iso'
+        path: Destination path
+
+    Returns:
+        Path to written file
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump([{"slug": g['slug'], "start_iso": g['start_iso']} for g in games], f, indent=2)
+    logger.info("Saved league schedule", extra={"path": path, "games": len(games)})
+    return path
+
+
+def games_for_team(games: Iterable[Dict[str, Any]], team: str) -> List[Dict[str, Any]]:
+    """Filter a schedule to the games a team plays in.
+
+    Args:
+        games: Schedule entries
+        team: Team abbreviation (e.g. 'phi')
+    """
+    team = team.lower()
+    selected = []
+    for game in games:
+        parsed = parse_slug(game['slug'])
+        if team in (parsed['first_team'], parsed['second_team']):
+            selected.append(game)
+    return selected
+
+
+def shard_games(games: List[Dict[str, Any]], shard_index: int, shard_count: int) -> List[Dict[str, Any]]:
+    """Select the games belonging to one shard.
+
+    Games are assigned by a stable hash of their slug, so every worker or
+    machine computes the same partition independently.
+
+    Args:
+        games: Schedule entries
+        shard_index: Zero-based shard number
+        shard_count: Total number of shards
+
+    Returns:
+        Games in this shard, in schedule order
+    """
+    if shard_count < 1 or not 0 <= shard_index < shard_count:
+        raise ValueError(f"Invalid shard {shard_index}/{shard_count}")
+    return [g for g in games if zlib.crc32(g['slug'].encode('utf-8')) % shard_count == shard_index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the league schedule from the NBA schedule feed")
+    parser.add_argument("--source", default=NBA_SCHEDULE_URL, help="Feed URL or a downloaded copy of it")
+    parser.add_argument("--out", default=LEAGUE_SCHEDULE_PATH, help="Schedule file to write")
+    parser.add_argument("--season", default=NBA_SEASON, help="Expected season ('' accepts any)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=LOG_LEVEL, format=LOG_FORMAT)
+    games = build_nba_schedule(args.source, args.out, args.season or None)
+    logger.info(
+        "League schedule built",
+        extra={"games": len(games), "teams": len(team_game_counts(games)), "path": args.out}
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 let chart = null;
 let backtestChart = null;
 let games = [];
+const priceHistories = new Map();
+const MAX_CHART_POINTS = 1000;  // Longer histories are downsampled server-side
 
 // Initialize on page load
 document.addEventListener('DOMContentLoaded', function() {
@@ -11,6 +13,13 @@ document.addEventListener('DOMContentLoaded', function() {
     if (document.getElementById('backtestChart')) {
         loadBacktest();
     }
+    if (document.getElementById('priceChart')) {
+        subscribeLiveUpdates();
+    }
+    const strategySelect = document.getElementById('strategySelect');
+    if (strategySelect) {
+        strategySelect.addEventListener('change', loadBacktest);
+    }
 });
 
 // Load all games
@@ -51,11 +60,60 @@ async function loadGames() {
         
         select.addEventListener('change', onGameSelected);
         
+        // Fetch every game's history up front in one request
+        loadPriceHistories(games.map(game => game.id))
+            .catch(error => showError('Failed to load price history: ' + error.message));
+        
     } catch (error) {
         showError('Failed to load games: ' + error.message);
     }
 }
 
+// Format epoch seconds the way the API formats timestamp_utc
+function formatEpoch(seconds) {
+    return new Date(seconds * 1000).toISOString().slice(0, 19).replace('T', ' ');
+}
+
+// Load histories for many games in one request (compact arrays) into priceHistories
+async function loadPriceHistories(gameIds) {
+    const missing = gameIds.filter(id => !priceHistories.has(String(id)));
+    if (missing.length === 0) return;
+    
+    const response = await fetch(`/api/price-history?ids=${missing.join(',')}&max_points=${MAX_CHART_POINTS}`);
+    if (!response.ok) throw new Error('Failed to load price history');
+    
+    const data = await response.json();
+    data.games.forEach(game => {
+        priceHistories.set(String(game.game_id), {
+            history: game.t.map((t, i) => ({ timestamp_utc: formatEpoch(t), price: game.p[i] })),
+            avg_48h_price: game.avg_price
+        });
+    });
+}
+
+// Append live price points pushed by the server (no-op unless started with --live)
+function subscribeLiveUpdates() {
+    if (!window.EventSource) return;
+    
+    const source = new EventSource('/api/live');
+    source.addEventListener('prices', event => {
+        const update = JSON.parse(event.data);
+        const key = String(update.game_id);
+        const cached = priceHistories.get(key);
+        if (!cached) return;  // Loaded in full when first selected
+        
+        update.t.forEach((t, i) => {
+            cached.history.push({ timestamp_utc: formatEpoch(t), price: update.p[i] });
+        });
+        const select = document.getElementById('gameSelect');
+        if (select && select.value === key) {
+            updateChart(cached.history, cached.avg_48h_price);
+        }
+    });
+    // Events were missed; reload histories on next selection
+    source.addEventListener('reset', () => priceHistories.clear());
+}
+
 // Handle game selection
 async function onGameSelected(event) {
     const gameId = event.target.value;
@@ -71,10 +129,9 @@ async function onGameSelected(event) {
     }
     
     try {
-        const response = await fetch(`/api/price-history/${gameId}`);
-        if (!response.ok) throw new Error('Failed to load price history');
-        
-        const data = await response.json();
+        await loadPriceHistories([gameId]);
+        const data = priceHistories.get(gameId);
+        if (!data) throw new Error('Game not found');
         const history = data.history;
         const avg48h = data.avg_48h_price;
         
@@ -328,7 +385,10 @@ function displayAnalysisTable(data) {
 // Load backtest simulation data
 async function loadBacktest() {
     try {
-        const response = await fetch('/api/backtest');
+        const strategySelect = document.getElementById('strategySelect');
+        const strategy = strategySelect ? strategySelect.value : '';
+        const url = strategy ? `/api/backtest?strategy=${encodeURIComponent(strategy)}` : '/api/backtest';
+        const response = await fetch(url);
         if (!response.ok) throw new Error('Failed to load backtest data');
         
         const backtestData = await response.json();
@@ -358,16 +418,12 @@ function displayBacktestResults(data) {
     if (totalReturnEl) totalReturnEl.textContent = (totalReturn >= 0 ? '+' : '') + '$' + totalReturn.toFixed(2);
     if (returnPercentEl) returnPercentEl.textContent = (returnPercent >= 0 ? '+' : '') + returnPercent.toFixed(2) + '%';
     
-    // Color code based on profit/loss
-    if (totalReturn >= 0) {
-        if (returnPercentEl) returnPercentEl.classList.add('positive');
-        if (totalReturnEl) totalReturnEl.classList.add('positive');
-        if (finalBankrollEl) finalBankrollEl.classList.add('positive');
-    } else {
-        if (returnPercentEl) returnPercentEl.classList.add('negative');
-        if (totalReturnEl) totalReturnEl.classList.add('negative');
-        if (finalBankrollEl) finalBankrollEl.classList.add('negative');
-    }
+    // Color code based on profit/loss (results reload when the strategy changes)
+    [returnPercentEl, totalReturnEl, finalBankrollEl].forEach(el => {
+        if (!el) return;
+        el.classList.toggle('positive', totalReturn >= 0);
+        el.classList.toggle('negative', totalReturn < 0);
+    });
     
     // Create chart
     const dates = data.map(d => {
@@ -0,0 +1,317 @@
+"""
+Entry strategies for backtests.
+
+A strategy decides when, and at what price, each game's bet is placed.
+Bets may be split into several weighted entries (e.g. the 48/36/24/12h
+DCA plan in SPEC.md). Prices come from an AsOfPriceIndex, which keeps
+every game's points sorted by time, so "price at T-k hours" is a binary
+search and window averages are prefix-sum differences.
+"""
+import bisect
+import logging
+from abc import ABC, abstractmethod
+from itertools import accumulate
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from config import BACKTEST_BET_PERCENTAGE, BACKTEST_INITIAL_CAPITAL, DEFAULT_TEAM
+import database
+
+logger = logging.getLogger(__name__)
+
+Entry = Tuple[float, Optional[float]]  # (share of the game's bet, entry price)
+
+
+class AsOfPriceIndex:
+    """Per-game sorted price series with O(log n) point-in-time lookups."""
+
+    def __init__(self, points: Sequence[tuple]):
+        """Build the index.
+
+        Args:
+            points: Rows of (game_id, game_date, slug, game_start_ts,
+                timestamp, price) ordered by game and timestamp, as returned
+                by database.get_team_price_points
+        """
+        self.games: List[Dict[str, Any]] = []
+        self._timestamps: Dict[int, List[int]] = {}
+        self._prices: Dict[int, List[float]] = {}
+
+        for game_id, game_date, slug, game_start_ts, timestamp, price in points:
+            if game_id not in self._timestamps:
+                self.games.append({
+                    'game_id': game_id,
+                    'game_date': game_date,
+                    'slug': slug,
+                    'game_start_ts': game_start_ts,
+                })
+                self._timestamps[game_id] = []
+                self._prices[game_id] = []
+            if timestamp is not None:
+                self._timestamps[game_id].append(timestamp)
+                self._prices[game_id].append(price)
+
+        # Prefix sums of prices, and of price x time held, for O(1) window math
+        self._price_sums: Dict[int, List[float]] = {}
+        self._areas: Dict[int, List[float]] = {}
+        for game_id, timestamps in self._timestamps.items():
+            prices = self._prices[game_id]
+            self._price_sums[game_id] = [0.0, *accumulate(prices)]
+            spans = (prices[i] * (timestamps[i + 1] - timestamps[i]) for i in range(len(prices) - 1))
+            self._areas[game_id] = [0.0, *accumulate(spans)]
+
+    @classmethod
+    def for_team(cls, team: str = DEFAULT_TEAM) -> "AsOfPriceIndex":
+        """Load every price point of a team's games from the database."""
+        return cls(database.get_team_price_points(team))
+
+    def price_at(self, game_id: int, timestamp: int) -> Optional[float]:
+        """Latest price at or before ``timestamp``, or None if there is none."""
+        timestamps = self._timestamps.get(game_id, [])
+        i = bisect.bisect_right(timestamps, timestamp)
+        return self._prices[game_id][i - 1] if i else None
+
+    def last_price(self, game_id: int) -> Optional[float]:
+        """Last price in the series, or None for games without prices."""
+        prices = self._prices.get(game_id)
+        return prices[-1] if prices else None
+
+    def window_average(self, game_id: int, start: int, end: int) -> Optional[float]:
+        """Arithmetic mean of the points with ``start <= timestamp <= end``."""
+        timestamps = self._timestamps.get(game_id, [])
+        lo = bisect.bisect_left(timestamps, start)
+        hi = bisect.bisect_right(timestamps, end)
+        if hi <= lo:
+            return None
+        sums = self._price_sums[game_id]
+        return (sums[hi] - sums[lo]) / (hi - lo)
+
+    def _area_until(self, game_id: int, timestamp: int) -> float:
+        """Integral of the step price curve from the first point to ``timestamp``."""
+        timestamps = self._timestamps[game_id]
+        i = bisect.bisect_right(timestamps, timestamp) - 1
+        return self._areas[game_id][i] + self._prices[game_id][i] * (timestamp - timestamps[i])
+
+    def time_weighted_average(self, game_id: int, start: int, end: int) -> Optional[float]:
+        """Average price over ``[start, end]``, weighting each point by how long it held.
+
+        The window is clipped to begin at the first known price.
+        """
+        timestamps = self._timestamps.get(game_id, [])
+        if not timestamps or end < timestamps[0]:
+            return None
+        start = max(start, timestamps[0])
+        if end <= start:
+            return self.price_at(game_id, end)
+        return (self._area_until(game_id, end) - self._area_until(game_id, start)) / (end - start)
+
+    def points_between(self, game_id: int, start: int, end: int) -> Tuple[List[int], List[float]]:
+        """Timestamps and prices of the points with ``start <= timestamp <= end``."""
+        timestamps = self._timestamps.get(game_id, [])
+        lo = bisect.bisect_left(timestamps, start)
+        hi = bisect.bisect_right(timestamps, end)
+        return timestamps[lo:hi], self._prices[game_id][lo:hi]
+
+
+class EntryStrategy(ABC):
+    """Base class for entry strategies."""
+
+    name = ""
+    description = ""
+
+    @abstractmethod
+    def entries(self, index: AsOfPriceIndex, game: Dict[str, Any]) -> List[Entry]:
+        """Split one game's bet into weighted entries.
+
+        Args:
+            index: Price index for the team being backtested
+            game: Game metadata from the index (includes 'game_start_ts')
+
+        Returns:
+            List of (weight, price) pairs; weights are shares of the game's
+            bet, and entries with no price are not placed
+        """
+
+    def describe(self) -> Dict[str, Any]:
+        """Describe the strategy and its parameters."""
+        return {"name": self.name, "description": self.description, "params": dict(vars(self))}
+
+
+class WindowAverageStrategy(EntryStrategy):
+    """Buy everything at the average sampled price over the window (legacy model)."""
+
+    name = "average"
+    description = "Whole bet at the average price over the last N hours"
+
+    def __init__(self, hours: float = 48):
+        self.hours = hours
+
+    def entries(self, index, game):
+        start = game['game_start_ts']
+        return [(1.0, index.window_average(game['game_id'], start - int(self.hours * 3600), start))]
+
+
+class LumpSumStrategy(EntryStrategy):
+    """Buy everything at the price in effect N hours before tip-off."""
+
+    name = "lump_sum"
+    description = "Whole bet at the price N hours before tip-off"
+
+    def __init__(self, hours: float = 48):
+        self.hours = hours
+
+    def entries(self, index, game):
+        return [(1.0, index.price_at(game['game_id'], game['game_start_ts'] - int(self.hours * 3600)))]
+
+
+class DCAStrategy(EntryStrategy):
+    """Split the bet into equal chunks placed at several offsets before tip-off."""
+
+    name = "dca"
+    description = "Equal chunks at each of the given hours before tip-off"
+
+    def __init__(self, hours: Sequence[float] = (48, 36, 24, 12)):
+        if not hours:
+            raise ValueError("DCA needs at least one entry time")
+        self.hours = list(hours)
+
+    def entries(self, index, game):
+        weight = 1.0 / len(self.hours)
+        start = game['game_start_ts']
+        return [(weight, index.price_at(game['game_id'], start - int(h * 3600))) for h in self.hours]
+
+
+class TimeWeightedStrategy(EntryStrategy):
+    """Buy everything at the time-weighted average price over the window."""
+
+    name = "twap"
+    description = "Whole bet at the time-weighted average price over the last N hours"
+
+    def __init__(self, hours: float = 48):
+        self.hours = hours
+
+    def entries(self, index, game):
+        start = game['game_start_ts']
+        return [(1.0, index.time_weighted_average(game['game_id'], start - int(self.hours * 3600), start))]
+
+
+class ThresholdStrategy(EntryStrategy):
+    """Buy the first time the price drops to a threshold within the window."""
+
+    name = "threshold"
+    description = "Whole bet the first time the price is at or below the threshold in the last N hours"
+
+    def __init__(self, threshold: float = 50, hours: float = 48):
+        self.threshold = threshold
+        self.hours = hours
+
+    def entries(self, index, game):
+        start = game['game_start_ts']
+        _, prices = index.points_between(game['game_id'], start - int(self.hours * 3600), start)
+        for price in prices:
+            if price <= self.threshold:
+                return [(1.0, price)]
+        return []
+
+
+STRATEGIES = {
+    cls.name: cls
+    for cls in (WindowAverageStrategy, LumpSumStrategy, DCAStrategy, TimeWeightedStrategy, ThresholdStrategy)
+}
+
+
+def strategy_from_args(args: Mapping[str, str]) -> EntryStrategy:
+    """Build a strategy from query-string style arguments.
+
+    Args:
+        args: Mapping with 'strategy' (a STRATEGIES name, default 'average'),
+            optional 'hours' (comma-separated; DCA uses every value, other
+            strategies the first) and optional 'threshold'
+
+    Returns:
+        Configured strategy
+
+    Raises:
+        ValueError: For an unknown strategy or unparsable parameters
+    """
+    name = args.get('strategy') or WindowAverageStrategy.name
+    if name not in STRATEGIES:
+        raise ValueError(f"Unknown strategy {name!r}; choose from {sorted(STRATEGIES)}")
+
+    params: Dict[str, Any] = {}
+    if args.get('hours'):
+        hours = [float(h) for h in args['hours'].split(',') if h.strip()]
+        if not hours:
+            raise ValueError("hours must list at least one value")
+        params['hours'] = hours if name == DCAStrategy.name else hours[0]
+    if args.get('threshold') and name == ThresholdStrategy.name:
+        params['threshold'] = float(args['threshold'])
+    return STRATEGIES[name](**params)
+
+
+def describe_strategies() -> List[Dict[str, Any]]:
+    """Describe every available strategy with its default parameters."""
+    return [cls().describe() for cls in STRATEGIES.values()]
+
+
+def run_backtest(
+    strategy: EntryStrategy,
+    team: str = DEFAULT_TEAM,
+    initial_capital: float = BACKTEST_INITIAL_CAPITAL,
+    bet_percentage: float = BACKTEST_BET_PERCENTAGE
+) -> List[Dict[str, Any]]:
+    """Run a backtest where each game's bet is placed by ``strategy``.
+
+    Each game's bet is ``bet_percentage`` of the bankroll before the game,
+    split across the strategy's entries. Settlement follows
+    database.run_backtest: near-resolved final prices pay 100 or 0,
+    otherwise positions are marked at the final price.
+
+    Args:
+        strategy: Entry strategy
+        team: Team abbreviation whose games are bet on
+        initial_capital: Starting capital
+        bet_percentage: Fraction of bankroll bet on each game
+
+    Returns:
+        List of backtest results with game info and running bankroll
+    """
+    index = AsOfPriceIndex.for_team(team)
+    bankroll = initial_capital
+    backtest_results = []
+
+    for game in index.games:
+        last_price = index.last_price(game['game_id'])
+        if last_price is None:
+            continue
+        final_price = database.settle_final_price(last_price)
+
+        entries = [(w, p) for w, p in strategy.entries(index, game) if p is not None and p > 0]
+        if not entries:
+            continue
+
+        game_bet = bankroll * bet_percentage
+        bet_size = game_bet * sum(w for w, _ in entries)
+        profit_loss = sum(game_bet * w * database.calculate_roi(p, final_price) / 100 for w, p in entries)
+        # Average cost per contract across the entries
+        entry_price = sum(w for w, _ in entries) / sum(w / p for w, p in entries)
+        bankroll += profit_loss
+
+        backtest_results.append({
+            'game_id': game['game_id'],
+            'game_date': game['game_date'],
+            'slug': game['slug'],
+            'strategy': strategy.name,
+            'entries': len(entries),
+            'entry_price': entry_price,
+            'final_price': final_price,
+            'roi_percent': profit_loss / bet_size * 100,
+            'bet_size': bet_size,
+            'profit_loss': profit_loss,
+            'bankroll': bankroll
+        })
+
+    logger.info(
+        "Strategy backtest finished",
+        extra={"strategy": strategy.name, "team": team, "games": len(backtest_results), "bankroll": bankroll}
+    )
+    return backtest_results
@@ -0,0 +1,116 @@
+"""
+Shared fixtures: a scripted local HTTP server, an isolated database and a
+small synthetic season.
+"""
+import json
+import os
+import sys
+import threading
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+
+
+class ScriptedHandler(BaseHTTPRequestHandler):
+    """Answers each path from its queue of scripted responses."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        status, headers, payload = self.server.next_response(url.path, query)
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ScriptedServer(ThreadingHTTPServer):
+    """Local HTTP server whose responses are queued per path by the test.
+
+    A queued response is ``(status, headers, payload)``, or a callable
+    taking the query dict and returning one. When a path's queue is empty,
+    its default (if any) answers; otherwise the server returns 404.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), ScriptedHandler)
+        self.queues: Dict[str, deque] = defaultdict(deque)
+        self.defaults: Dict[str, Any] = {}
+        self.requests: List[Tuple[str, Dict[str, str]]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def queue(self, path: str, *responses: Any):
+        """Append responses for ``path``, answered in order."""
+        with self._lock:
+            self.queues[path].extend(responses)
+
+    def default(self, path: str, response: Any):
+        """Response for ``path`` once its queue is empty."""
+        self.defaults[path] = response
+
+    def count(self, path: str) -> int:
+        """Requests received for ``path``."""
+        with self._lock:
+            return sum(1 for requested, _ in self.requests if requested == path)
+
+    def next_response(self, path: str, query: Dict[str, str]) -> Tuple[int, Dict[str, str], Any]:
+        with self._lock:
+            self.requests.append((path, query))
+            queue = self.queues[path]
+            response = queue.popleft() if queue else self.defaults.get(path, (404, {}, {"error": "not found"}))
+        if callable(response):
+            response = response(query)
+        return response
+
+
+@pytest.fixture
+def server():
+    """A running ScriptedServer, shut down after the test."""
+    httpd = ScriptedServer()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """Point database.py at an empty database in a temporary directory."""
+    path = str(tmp_path / "test.db")
+    monkeypatch.setattr(database, "DB_PATH", path)
+    database.close_connections()
+    database.init_database(path)
+    yield path
+    database.close_connections()
+
+
+@pytest.fixture
+def season(db_path):
+    """A small synthetic season (6 teams x 10 games, hourly prices) in the test database."""
+    from benchmarks.synthetic_season import generate_season, write_sqlite
+
+    games = generate_season(teams=6, games_per_team=10, fidelity_minutes=60, seed=3)
+    write_sqlite(games, db_path)
+    database.close_connections()
+    return games
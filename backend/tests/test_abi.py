@@ -0,0 +1,74 @@
+"""
+Keccak-256 and the updatePrices ABI codec against known vectors.
+"""
+import hashlib
+
+from oracle_publisher import _keccak_f, decode_update_call, encode_update_call, function_selector, keccak256
+
+
+def sha3_256(data):
+    """SHA3-256 built on oracle_publisher's permutation (it differs from Keccak-256 only in padding)."""
+    rate = 136
+    padded = bytearray(data) + b"\x06"
+    padded.extend(b"\x00" * (-len(padded) % rate))
+    padded[-1] |= 0x80
+    state = [0] * 25
+    for offset in range(0, len(padded), rate):
+        for i in range(rate // 8):
+            state[i] ^= int.from_bytes(padded[offset + 8 * i:offset + 8 * i + 8], "little")
+        _keccak_f(state)
+    return b"".join(lane.to_bytes(8, "little") for lane in state[:4])
+
+
+def test_keccak256_known_vectors():
+    assert keccak256(b"").hex() == "c5d2460186f7233c927e7db2dcc703c0e500b653ca82273b7bfad8045d85a470"
+    assert keccak256(b"abc").hex() == "4e03657aea45a94fc7d47ba826c8d667c0d1e6e33a64a036ec44f58fa12d6c45"
+    assert keccak256(b"The quick brown fox jumps over the lazy dog").hex() == (
+        "4d741b6f1eb29cb2a9b9911c82f56fa8d73b04959d3d9d222895df6c0b28aa15"
+    )
+
+
+def test_permutation_matches_sha3_across_block_boundaries():
+    for length in (0, 1, 135, 136, 137, 271, 272, 273, 1000):
+        data = bytes(i * 7 % 256 for i in range(length))
+        assert sha3_256(data) == hashlib.sha3_256(data).digest(), length
+
+
+def test_function_selectors():
+    assert function_selector("transfer(address,uint256)").hex() == "a9059cbb"
+    assert function_selector("balanceOf(address)").hex() == "70a08231"
+    assert function_selector("approve(address,uint256)").hex() == "095ea7b3"
+
+
+def test_update_call_layout():
+    calldata = encode_update_call(["ab"], [7], signature="updatePrices(string[],uint256[])")
+    words = [calldata[10 + 64 * i:10 + 64 * (i + 1)] for i in range((len(calldata) - 10) // 64)]
+
+    assert calldata[:10] == "0x" + function_selector("updatePrices(string[],uint256[])").hex()
+    assert [int(word, 16) for word in words[:5]] == [
+        64,    # offset of string[]
+        192,   # offset of uint256[]
+        1,     # string[] length
+        32,    # offset of the first string, after the offsets
+        2,     # string length
+    ]
+    assert words[5] == "6162" + "00" * 30
+    assert [int(word, 16) for word in words[6:]] == [1, 7]
+
+
+def test_update_call_round_trip():
+    slugs = [
+        "nba-phi-bos-2025-10-22",
+        "",
+        "x" * 32,  # exactly one word
+        "nba-lal-gsw-2025-10-31-a-slug-long-enough-to-span-three-words-of-data",
+        "nba-ñol-ümt-2025-10-31",  # multi-byte UTF-8
+    ]
+    prices = [0, 1, 5000, 9999, 2 ** 256 - 1]
+
+    selector, decoded_slugs, decoded_prices = decode_update_call(encode_update_call(slugs, prices))
+
+    assert selector == function_selector("updatePrices(string[],uint256[])")
+    assert decoded_slugs == slugs
+    assert decoded_prices == prices
+    assert decode_update_call(encode_update_call([], []))[1:] == ([], [])
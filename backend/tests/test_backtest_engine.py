@@ -0,0 +1,36 @@
+"""
+The vectorized sweep reproduces database.run_backtest and bounds its curves.
+"""
+import pytest
+
+import backtest_engine
+import database
+from config import BACKTEST_SWEEP_MAX_CURVES
+
+
+def test_default_sweep_reproduces_run_backtest(season):
+    sweep = backtest_engine.run_sweep(team="atl", curves=1)
+    legacy = database.run_backtest(team="atl")
+
+    assert sweep['grid_points'] == 1
+    assert sweep['stats']['bets'] == [len(legacy)]
+    assert legacy and sweep['stats']['final_bankroll'][0] == round(legacy[-1]['bankroll'], 2)
+    # Games without a bet leave the bankroll unchanged, so the curve only steps at bets
+    by_game = dict(zip((game['game_id'] for game in sweep['games']), sweep['equity'][0]))
+    assert [by_game[row['game_id']] for row in legacy] == [round(row['bankroll'], 2) for row in legacy]
+
+
+def test_curves_are_omitted_by_default_and_kept_for_the_best_points(season):
+    assert "equity" not in backtest_engine.run_sweep(team="atl", bet_fractions=[0.01, 0.05])
+
+    sweep = backtest_engine.run_sweep(team="atl", bet_fractions=[0.01, 0.02, 0.05, 0.1], curves=2, chunk_size=3)
+
+    finals = sweep['stats']['final_bankroll']
+    best = sorted(range(len(finals)), key=lambda i: -finals[i])[:2]
+    assert sweep['equity_points'] == best
+    assert [curve[-1] for curve in sweep['equity']] == [finals[i] for i in best]
+
+
+def test_curve_count_is_capped(season):
+    with pytest.raises(ValueError):
+        backtest_engine.run_sweep(team="atl", curves=BACKTEST_SWEEP_MAX_CURVES + 1)
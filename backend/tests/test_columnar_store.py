@@ -0,0 +1,108 @@
+"""
+The partitioned .npz columnar store against the consolidated CSV.
+"""
+import csv
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic_season import generate_season
+from columnar_store import PARTITION_BY_TEAM, ColumnarHistoryStore
+from config import CONSOLIDATED_FILENAME
+from data_writer import PriceHistoryWriter
+from schedule import parse_slug
+
+
+@pytest.fixture
+def games():
+    return generate_season(teams=4, games_per_team=4, fidelity_minutes=60, seed=11)
+
+
+def write(writer, games):
+    for game in games:
+        writer.write_consolidated_history(
+            game['slug'], game['start_iso'][:10], game['start_iso'], game['token_id'], game['history']
+        )
+
+
+def as_rows(columns):
+    return sorted(zip(
+        columns['slug'].tolist(), columns['timestamp'].tolist(), columns['price'].tolist(),
+        columns['token_id'].tolist(), columns['game_start_ts'].tolist()
+    ))
+
+
+def test_round_trip_matches_the_csv(games, tmp_path):
+    write(PriceHistoryWriter(str(tmp_path / "csv")), games)
+    columnar = PriceHistoryWriter(str(tmp_path / "columnar"), consolidated_format="columnar")
+    write(columnar, games)
+
+    expected = []
+    with open(tmp_path / "csv" / CONSOLIDATED_FILENAME, newline='') as f:
+        for row in csv.DictReader(f):
+            timestamp = datetime.strptime(row['timestamp_utc'], '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+            game_start = datetime.fromisoformat(row['game_start_utc'].replace('Z', '+00:00'))
+            expected.append((
+                row['slug'], int(timestamp.timestamp()), pytest.approx(float(row['price']), abs=1e-4),
+                row['token_id'], int(game_start.timestamp())
+            ))
+
+    assert as_rows(columnar.columnar_store.read()) == sorted(expected, key=lambda r: r[:2])
+
+
+def test_upsert_keeps_the_newest_point(tmp_path):
+    store = ColumnarHistoryStore(str(tmp_path))
+    args = ("nba-atl-bos-2025-01-01", "2025-01-01", "2025-01-01T00:00:00Z")
+    store.upsert(*args, "tok-1", [{"t": 100, "p": 0.4}, {"t": 200, "p": 0.5}], 60)
+    store.upsert(*args, "tok-2", [{"t": 200, "p": 0.6}, {"t": 300, "p": 0.7}, {"t": 300, "p": 0.8}], 1)
+
+    data = store.read()
+
+    assert data['timestamp'].tolist() == [100, 200, 300]
+    assert data['price'].tolist() == pytest.approx([40.0, 60.0, 80.0])
+    assert set(data['token_id'].tolist()) == {"tok-2"}
+    assert set(data['fidelity_minutes'].tolist()) == {1}
+
+
+def test_date_partitions_are_pruned_by_name(games, tmp_path, monkeypatch):
+    store = ColumnarHistoryStore(str(tmp_path))
+    for game in games:
+        store.upsert(game['slug'], game['start_iso'][:10], game['start_iso'], game['token_id'], game['history'], 60)
+    dates = sorted({game['start_iso'][:10] for game in games})
+    start, end = dates[1], dates[2]
+
+    loaded = []
+    np_load = np.load
+
+    def recording_load(path, **kwargs):
+        loaded.append(os.path.basename(path))
+        return np_load(path, **kwargs)
+
+    monkeypatch.setattr(np, "load", recording_load)
+    data = store.read(start_date=start, end_date=end)
+
+    assert sorted(loaded) == [f"game_date={start}.npz", f"game_date={end}.npz"]
+    assert {parse_slug(slug)['date'] for slug in data['slug'].tolist()} == {start, end}
+    assert data['timestamp'].size == sum(len(g['history']) for g in games if start <= g['start_iso'][:10] <= end)
+
+
+def test_team_partitions_filter_on_both_teams_and_dates(games, tmp_path):
+    store = ColumnarHistoryStore(str(tmp_path), partition_by=PARTITION_BY_TEAM)
+    for game in games:
+        store.upsert(game['slug'], game['start_iso'][:10], game['start_iso'], game['token_id'], game['history'], 60)
+    team = parse_slug(games[0]['slug'])['first_team']
+    dates = sorted({game['start_iso'][:10] for game in games})
+    end = dates[len(dates) // 2]
+
+    assert store.partitions() == sorted({f"team={parse_slug(g['slug'])['first_team']}" for g in games})
+
+    data = store.read(team=team.upper(), end_date=end)
+    expected = {
+        g['slug'] for g in games
+        if team in (parse_slug(g['slug'])['first_team'], parse_slug(g['slug'])['second_team'])
+        and g['start_iso'][:10] <= end
+    }
+    assert expected and set(data['slug'].tolist()) == expected
+    assert store.read(team=team, start_date="2100-01-01")['timestamp'].size == 0
@@ -0,0 +1,100 @@
+"""
+Schema migrations, the team columns parsed from slugs and the CSV bulk loader.
+"""
+import copy
+import sqlite3
+
+import pytest
+
+import database
+from benchmarks.synthetic_season import generate_season, write_csv
+from schedule import games_for_team, is_second_team, parse_slug
+
+SLUG = "nba-phi-bos-2025-10-22"  # Philadelphia at Boston
+HISTORY = [{"t": 1761100000, "p": 0.4}, {"t": 1761103600, "p": 0.45}]
+
+
+def test_slug_teams_are_named_by_position():
+    assert parse_slug(SLUG) == {"league": "nba", "first_team": "phi", "second_team": "bos", "date": "2025-10-22"}
+    assert not is_second_team(SLUG, "PHI")
+    assert is_second_team(SLUG, "bos")
+    assert games_for_team([{"slug": SLUG}], "bos") == [{"slug": SLUG}]
+
+
+def test_home_away_columns_are_renamed(db_path):
+    database.merge_price_history(SLUG, "2025-10-22", "2025-10-22T23:30:00Z", "tok", HISTORY, 60)
+    # Roll the file back to schema version 2, which named the columns by venue
+    conn = sqlite3.connect(db_path)
+    conn.execute("ALTER TABLE games RENAME COLUMN first_team TO home_team")
+    conn.execute("ALTER TABLE games RENAME COLUMN second_team TO away_team")
+    conn.execute("PRAGMA user_version = 2")
+    conn.commit()
+    conn.close()
+
+    database.init_database(db_path)
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == database.SCHEMA_VERSION
+    assert conn.execute("SELECT first_team, second_team FROM games").fetchall() == [("phi", "bos")]
+    conn.close()
+    assert database.get_price_history(1, "bos")[0]['price'] == 60.0
+
+
+@pytest.fixture
+def games():
+    return generate_season(teams=4, games_per_team=3, fidelity_minutes=60, seed=5)
+
+
+def load(games, tmp_path, db_path):
+    return database.load_csv_to_database(write_csv(games, str(tmp_path / "csv")), db_path)
+
+
+def price_rows(db_path):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("""
+        SELECT g.slug, ph.timestamp, ph.price FROM price_history ph JOIN games g ON g.id = ph.game_id
+        ORDER BY g.slug, ph.timestamp
+    """).fetchall()
+    conn.close()
+    return rows
+
+
+def test_csv_reload_is_idempotent(games, tmp_path, db_path):
+    first = load(games, tmp_path, db_path)
+    rows, version = price_rows(db_path), database.get_data_version()
+
+    second = load(games, tmp_path, db_path)
+
+    assert first["points_upserted"] == len(rows) == sum(len(game["history"]) for game in games)
+    assert second["points_upserted"] == 0
+    assert price_rows(db_path) == rows
+    assert database.get_data_version() == version
+
+
+def test_csv_reload_upserts_changed_prices_and_new_games(games, tmp_path, db_path):
+    load(games[:-1], tmp_path, db_path)
+    version = database.get_data_version()
+    changed = copy.deepcopy(games)
+    changed[0]["history"][0]["p"] = 0.01
+
+    stats = load(changed, tmp_path, db_path)
+
+    assert stats["points_upserted"] == 1 + len(games[-1]["history"])
+    rows = price_rows(db_path)
+    assert len(rows) == sum(len(game["history"]) for game in games)
+    assert (games[0]["slug"], games[0]["history"][0]["t"], 1.0) in rows
+    assert {game["slug"] for game in database.get_all_games()} == {game["slug"] for game in games}
+    assert database.get_data_version() > version
+
+
+def test_csv_metadata_change_bumps_the_data_version(games, tmp_path, db_path):
+    load(games, tmp_path, db_path)
+    version = database.get_data_version()
+    changed = copy.deepcopy(games)
+    changed[0]["token_id"] = "tok-relisted"
+
+    stats = load(changed, tmp_path, db_path)
+
+    assert stats["points_upserted"] == 0
+    assert database.get_data_version() > version
+    assert {game["token_id"] for game in database.get_all_games()} >= {"tok-relisted"}
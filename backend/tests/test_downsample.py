@@ -0,0 +1,84 @@
+"""
+LTTB downsampling, level selection and the per-game level cache.
+"""
+import math
+
+import database
+import downsample
+
+
+def series(n, start=1_000_000, step=60):
+    return [(start + i * step, 50 + 40 * math.sin(i / 7.0)) for i in range(n)]
+
+
+def test_lttb_keeps_endpoints_and_respects_max_points():
+    rows = series(1000)
+
+    for max_points in (3, 10, 257, 999):
+        kept = downsample.lttb(rows, max_points)
+        assert len(kept) == max_points
+        assert kept[0] == rows[0] and kept[-1] == rows[-1]
+        assert [row[0] for row in kept] == sorted({row[0] for row in kept})
+
+
+def test_lttb_keeps_a_spike():
+    rows = [(t, 50.0) for t in range(100)]
+    rows[42] = (42, 95.0)
+
+    assert (42, 95.0) in downsample.lttb(rows, 10)
+
+
+def test_short_series_are_returned_whole():
+    rows = series(5)
+
+    assert downsample.lttb(rows, 10) == rows
+    assert downsample.lttb_indices([0, 1], [5, 6], 1) == [0, 1]
+
+
+def test_select_from_levels_clips_to_the_range():
+    rows = series(4000)
+    levels = downsample.build_levels(rows, factor=4, min_points=100)
+    start, end = rows[1000][0], rows[2999][0]
+
+    selected = downsample.select_from_levels(levels, start, end, 100)
+
+    assert len(selected) == 100
+    assert all(start <= row[0] <= end for row in selected)
+    assert [len(level) for level in levels] == [1000, 250]
+
+
+def test_select_from_levels_falls_back_when_no_level_has_enough_points():
+    rows = series(4000)
+    levels = downsample.build_levels(rows, factor=4, min_points=100)
+
+    assert downsample.select_from_levels(levels, rows[0][0], rows[50][0], 100) is None
+    assert downsample.select_from_levels([], rows[0][0], rows[-1][0], 100) is None
+
+
+def test_levels_survive_ingest_of_other_games(season, monkeypatch):
+    database.price_levels.clear()
+    built = []
+    build_levels = downsample.build_levels
+
+    def counting_build_levels(rows, *args, **kwargs):
+        built.append(len(rows))
+        return build_levels(rows, *args, **kwargs)
+
+    monkeypatch.setattr(downsample, "build_levels", counting_build_levels)
+    slug = season[0]["slug"]
+    team = slug.split("-")[1]
+
+    database.get_price_history(1, team, max_points=10)
+    database.merge_price_history(
+        "nba-zzz-yyy-2026-04-10", "2026-04-10", "2026-04-10T23:00:00Z", "tok-new", [{"t": 1775800000, "p": 0.5}], 60
+    )
+    database.get_price_history(1, team, max_points=10)
+    assert len(built) == 1
+
+    last = season[0]["history"][-1]
+    database.merge_price_history(
+        slug, slug[-10:], season[0]["start_iso"], season[0]["token_id"], [{"t": last["t"] + 3600, "p": 0.5}], 60
+    )
+    database.get_price_history(1, team, max_points=10)
+    assert len(built) == 2
+    database.price_levels.clear()
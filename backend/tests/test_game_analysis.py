@@ -0,0 +1,108 @@
+"""
+The set-based and materialized analysis datasets match the original
+per-game Python computation exactly.
+"""
+import random
+import sqlite3
+from datetime import datetime, timezone
+
+import database
+from database import DatabaseWriter
+
+HOUR = 3600
+
+# (slug, start, hours of price points relative to start, final price in %)
+GAMES = [
+    ("nba-phi-bos-2025-10-22", "2025-10-22T23:30:00Z", range(-60, 4), 97.3),  # home, settles at 100
+    ("nba-bos-phi-2025-10-24", "2025-10-24T23:00:00Z", range(-50, 3), 99.6),  # away, settles at 0
+    ("nba-phi-nyk-2025-10-26", "2025-10-26T00:00:00Z", range(-48, 1), 55.55),  # exactly the window
+    ("nba-mia-phi-2025-10-28", "2025-10-28T23:30:00Z", range(-47, -10), 42.17),  # away, unresolved
+    ("nba-phi-cha-2025-10-30", "2025-10-30T23:00:00Z", range(-80, -49), 60.0),  # nothing in the window
+    ("nba-lal-gsw-2025-10-31", "2025-11-01T02:30:00Z", range(-60, 4), 50.0),  # other teams
+]
+
+
+def load_fixture(path):
+    rng = random.Random(12)
+    writer = DatabaseWriter(path, fidelity_minutes=60)
+    for game_id, (slug, start_iso, hours, final) in enumerate(GAMES):
+        start = int(datetime.fromisoformat(start_iso.replace('Z', '+00:00')).timestamp())
+        history = [{"t": start + h * HOUR, "p": round(rng.uniform(0.02, 0.98), 4)} for h in hours]
+        if hours[0] <= -48 < hours[-1]:
+            # Off-hour points just outside and inside the window's opening edge
+            history += [{"t": start - 48 * HOUR - 1, "p": 0.99}, {"t": start - 48 * HOUR + 7, "p": 0.3333}]
+        history.sort(key=lambda entry: entry['t'])
+        history[-1]['p'] = final / 100
+        writer.write_game(slug, start_iso[:10], start_iso, f"tok-{game_id}", history)
+    writer.close()
+
+
+def original_analysis(path, team):
+    """The analysis as first written: parse every timestamp and average in Python."""
+    conn = sqlite3.connect(path)
+    games = conn.execute("""
+        SELECT id, game_date, slug, game_start_utc FROM games
+        WHERE first_team = ? OR second_team = ?
+        ORDER BY game_date ASC, id ASC
+    """, (team, team)).fetchall()
+    rows = []
+    for game_id, game_date, slug, game_start_utc in games:
+        game_start_dt = datetime.fromisoformat(game_start_utc.replace('Z', '+00:00'))
+        is_away = slug.split('-')[2] == team
+        prices = conn.execute(
+            "SELECT timestamp_utc, price FROM price_history WHERE game_id = ? ORDER BY timestamp_utc ASC",
+            (game_id,)
+        ).fetchall()
+
+        in_window = []
+        for timestamp_utc, price in prices:
+            if 'T' in timestamp_utc:
+                timestamp_dt = datetime.fromisoformat(timestamp_utc.replace('Z', '+00:00'))
+            else:
+                timestamp_dt = datetime.strptime(timestamp_utc, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+            hours_before_game = (game_start_dt - timestamp_dt).total_seconds() / 3600
+            if 0 <= hours_before_game <= 48:
+                in_window.append(100.0 - price if is_away else price)
+        avg_48h = sum(in_window) / len(in_window) if in_window else None
+
+        final_price = None
+        if prices:
+            final_price = 100.0 - prices[-1][1] if is_away else prices[-1][1]
+            if final_price > 95:
+                final_price = 100.0
+            elif final_price < 1:
+                final_price = 0.0
+
+        roi = None
+        if avg_48h is not None and final_price is not None:
+            if final_price >= 99:
+                roi = ((100 - avg_48h) / avg_48h) * 100
+            elif final_price <= 1:
+                roi = -100.0
+            else:
+                roi = ((final_price - avg_48h) / avg_48h) * 100
+
+        rows.append({
+            'game_id': game_id,
+            'game_date': game_date,
+            'slug': slug,
+            'game_start_utc': game_start_utc,
+            'avg_48h_price': avg_48h,
+            'final_price': final_price,
+            'roi_percent': roi
+        })
+    conn.close()
+    return rows
+
+
+def test_analysis_matches_the_original_computation(db_path):
+    load_fixture(db_path)
+    expected = original_analysis(db_path, "phi")
+
+    # The fixture covers every branch of the original computation
+    assert len(expected) == 5
+    assert [row['final_price'] for row in expected] == [100.0, 0.0, 55.55, 57.83, 60.0]
+    assert expected[-1]['avg_48h_price'] is None
+
+    assert database.compute_game_analysis_dataset("phi") == expected
+    assert database.generate_game_analysis_dataset("phi") == expected
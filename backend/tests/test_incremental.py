@@ -0,0 +1,74 @@
+"""
+Incremental extraction only marks a game complete after a successful fetch,
+and merges new points into every output.
+"""
+import csv
+import json
+
+from data_writer import PriceHistoryWriter
+from polymarket_client import CircuitBreaker, PolymarketClient
+import database
+import main
+
+SLUG = "nba-phi-bos-2025-10-22"
+START = "2025-10-22T23:30:00Z"  # Window closed long ago
+MARKET = (200, {}, {"id": "1", "slug": SLUG, "clobTokenIds": json.dumps(["tok-yes", "tok-no"])})
+
+
+def make_client(server):
+    client = PolymarketClient(
+        gamma_base=server.base_url, clob_base=server.base_url, max_retries=1, backoff_base=0.001, backoff_max=0.01
+    )
+    client.breakers["clob"] = CircuitBreaker(failure_threshold=100)
+    return client
+
+
+def test_price_history_tells_failure_from_no_points(server):
+    server.queue("/prices-history", (200, {}, {"history": []}), (503, {}, {}), (503, {}, {}), (400, {}, {}))
+    client = make_client(server)
+
+    assert client.get_price_history("tok-yes", START) == []
+    assert client.get_price_history("tok-yes", START) is None
+    assert client.get_price_history("tok-yes", START) is None
+
+
+def test_failed_fetch_after_window_is_not_complete(server):
+    server.queue(f"/markets/slug/{SLUG}", MARKET)
+    server.default("/prices-history", (503, {}, {}))
+    client = make_client(server)
+    sync_state = {"tok-yes": {"slug": SLUG, "last_timestamp": 1761100000, "complete": False}}
+
+    result = main.fetch_game(client, {"slug": SLUG, "start_iso": START}, sync_state)
+
+    assert result["history"] == []
+    assert result["complete"] is False
+
+
+def test_successful_fetch_after_window_is_complete(server):
+    server.queue(f"/markets/slug/{SLUG}", MARKET)
+    server.queue("/prices-history", (200, {}, {"history": [{"t": 1761100000, "p": 0.5}, {"t": 1761103600, "p": 0.6}]}))
+    client = make_client(server)
+    sync_state = {"tok-yes": {"slug": SLUG, "last_timestamp": 1761100000, "complete": False}}
+
+    result = main.fetch_game(client, {"slug": SLUG, "start_iso": START}, sync_state)
+
+    assert result["history"] == [{"t": 1761103600, "p": 0.6}]
+    assert result["complete"] is True
+
+
+def test_incremental_result_is_merged_into_every_writer(db_path, tmp_path):
+    csv_writer = PriceHistoryWriter(str(tmp_path))
+    writers = [csv_writer, database.DatabaseWriter(db_path)]
+    game = {"slug": SLUG, "start_iso": START}
+
+    main.write_game(writers, {"game": game, "token_id": "tok-yes", "history": [{"t": 1761100000, "p": 0.5}]})
+    main.write_game(writers, {
+        "game": game, "token_id": "tok-yes", "history": [{"t": 1761103600, "p": 0.6}],
+        "incremental": True, "complete": True
+    })
+    main.close_writers(writers)
+
+    with open(tmp_path / csv_writer.build_filename(SLUG, START[:10]), newline='') as f:
+        assert [row['price'] for row in csv.DictReader(f)] == ["50.0", "60.0"]
+    assert [point['price'] for point in database.get_price_history(1, "phi")] == [50.0, 60.0]
+    assert database.get_sync_state()["tok-yes"]["complete"] is True
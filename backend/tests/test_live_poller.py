@@ -0,0 +1,103 @@
+"""
+LivePoller against a local stub CLOB: live polling, settle polls and failures.
+"""
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import database
+from benchmarks.stub_polymarket import live_schedule, start_stub_server
+from live_poller import EventBroker, LivePoller
+from polymarket_client import CircuitBreaker, PolymarketClient
+
+FINISHED = {
+    "slug": "nba-bos-phi-2025-10-22",
+    "start_iso": (datetime.now(timezone.utc) - timedelta(days=4)).strftime("%Y-%m-%dT%H:00:00Z"),
+}
+
+
+def make_client(base_url):
+    client = PolymarketClient(
+        gamma_base=base_url, clob_base=base_url, max_retries=0, backoff_base=0.001, backoff_max=0.01
+    )
+    client.breakers["clob"] = CircuitBreaker(failure_threshold=100)
+    return client
+
+
+def sync_state():
+    return {state['slug']: state for state in database.get_sync_state().values()}
+
+
+def test_polls_live_games_and_settles_finished_ones(db_path):
+    stub = start_stub_server()
+    live = live_schedule(1)[0]
+    broker = EventBroker()
+    poller = LivePoller([live, FINISHED], client=make_client(stub.base_url), broker=broker, fidelity=60)
+
+    assert poller.poll_once() > 0
+    state = sync_state()
+    assert not state[live['slug']]['complete']
+    assert state[FINISHED['slug']]['complete']
+    assert {event.data['slug'] for event in broker._events} == {live['slug'], FINISHED['slug']}
+
+    # The settled game is never requested again; the live one keeps polling
+    requests = stub.requests["prices-history"]
+    poller.poll_once()
+    poller.close()
+    stub.shutdown()
+    assert stub.requests["prices-history"] == requests + 1
+    assert [game['slug'] for game in poller.active_games()] == [live['slug']]
+
+
+def test_failed_settle_poll_is_retried(db_path, server):
+    server.default(f"/markets/slug/{FINISHED['slug']}", (200, {}, {
+        "id": "1", "slug": FINISHED['slug'], "clobTokenIds": '["tok-yes", "tok-no"]',
+    }))
+    server.queue("/prices-history", (503, {}, {}))
+    server.default("/prices-history", lambda query: (200, {}, {
+        "history": [{"t": int(query["startTs"]) + 3600 * i, "p": 0.5} for i in range(3)],
+    }))
+    poller = LivePoller([FINISHED], client=make_client(server.base_url), fidelity=60)
+
+    assert poller.poll_once() == 0
+    assert poller.active_games() == [FINISHED]
+    assert sync_state() == {}
+
+    assert poller.poll_once() == 3
+    poller.close()
+    assert poller.active_games() == []
+    assert sync_state()[FINISHED['slug']]['complete']
+
+
+def test_failed_flush_refetches_the_same_points(db_path, server):
+    server.default(f"/markets/slug/{FINISHED['slug']}", (200, {}, {
+        "id": "1", "slug": FINISHED['slug'], "clobTokenIds": '["tok-yes", "tok-no"]',
+    }))
+    server.default("/prices-history", lambda query: (200, {}, {
+        "history": [{"t": int(query["startTs"]) + 3600 * i, "p": 0.5} for i in range(3)],
+    }))
+    poller = LivePoller([FINISHED], client=make_client(server.base_url), fidelity=60)
+    poller._open()
+
+    def broken_flush():
+        raise sqlite3.OperationalError("database is locked")
+
+    poller._writer.flush = broken_flush
+    with pytest.raises(sqlite3.OperationalError):
+        poller.poll_once()
+    assert poller._last_timestamps == {}
+    assert poller.active_games() == [FINISHED]
+
+    del poller._writer.flush
+    assert poller.poll_once() == 3
+    poller.close()
+    assert sync_state()[FINISHED['slug']]['complete']
+
+
+def test_games_before_their_window_are_not_polled(db_path):
+    soon = {"slug": "nba-lal-gsw-2030-01-01", "start_iso": "2030-01-01T03:00:00Z"}
+    poller = LivePoller([soon], client=make_client("http://127.0.0.1:9"))
+
+    assert poller.active_games(time.time()) == []
@@ -0,0 +1,63 @@
+"""
+Metric families, their rendering and the timing decorator.
+"""
+import pytest
+
+import metrics
+from metrics import Registry, _Metric
+
+
+def test_metric_base_is_abstract():
+    with pytest.raises(TypeError, match="_new_child"):
+        _Metric(Registry(), "teamtokens_test", "Test metric")
+
+
+def test_counter_and_histogram_render_their_children():
+    registry = Registry()
+    registry.counter("teamtokens_test_total", "Test counter", ("kind",)).labels("a").inc(2)
+    registry.histogram("teamtokens_test_seconds", "Test histogram", buckets=(1.0,)).observe(0.5)
+
+    assert registry.render().splitlines()[2:] == [
+        'teamtokens_test_total{kind="a"} 2',
+        "# HELP teamtokens_test_seconds Test histogram",
+        "# TYPE teamtokens_test_seconds histogram",
+        'teamtokens_test_seconds_bucket{le="1"} 1',
+        'teamtokens_test_seconds_bucket{le="+Inf"} 1',
+        "teamtokens_test_seconds_sum 0.5",
+        "teamtokens_test_seconds_count 1",
+    ]
+
+
+def test_timed_records_after_the_registry_is_cleared(monkeypatch):
+    registry = Registry()
+    histogram = registry.histogram("teamtokens_test_seconds", "Test histogram", ("function",), buckets=(60.0,))
+    monkeypatch.setattr(metrics.REGISTRY, "enabled", True)
+
+    @metrics.timed(histogram)
+    def work():
+        return 42
+
+    assert work() == 42
+    registry.clear()
+    work()
+    work()
+
+    assert histogram.snapshot()[("work",)][0] == [2, 0]
+    assert 'teamtokens_test_seconds_count{function="work"} 2' in registry.render()
+
+
+def test_snapshot_merges_into_another_registry():
+    worker, parent = Registry(), Registry()
+    for registry in (worker, parent):
+        registry.counter("teamtokens_test_total", "Test counter", ("kind",))
+        registry.histogram("teamtokens_test_seconds", "Test histogram", buckets=(1.0,))
+    worker._metrics["teamtokens_test_total"].labels("a").inc(3)
+    worker._metrics["teamtokens_test_seconds"].observe(2.0)
+    parent._metrics["teamtokens_test_total"].labels("a").inc(1)
+
+    parent.merge(worker.snapshot())
+
+    assert parent.snapshot() == {
+        "teamtokens_test_total": {("a",): 4.0},
+        "teamtokens_test_seconds": {(): ([0, 1], 2.0)},
+    }
@@ -0,0 +1,82 @@
+"""
+ClobPriceSource only spends requests on games whose price window is open,
+and the publisher never stalls behind transactions that are never mined.
+"""
+from datetime import datetime, timezone
+
+from benchmarks.stub_chain import start_stub_chain
+from oracle_publisher import ClobPriceSource, DeviationFilter, JsonRpcClient, OraclePublisher
+from polymarket_client import price_window
+
+SENDER = "0x00000000000000000000000000000000000000aa"
+CONTRACT = "0x00000000000000000000000000000000000000bb"
+
+
+class FakeClient:
+    """Duck-typed PolymarketClient recording what it is asked for."""
+
+    def __init__(self):
+        self.resolved = []
+        self.fetched = []
+
+    def resolve_markets(self, slugs):
+        self.resolved.extend(slugs)
+        return {}
+
+    def get_token_id_from_slug(self, slug):
+        return f"tok-{slug}"
+
+    def get_price_history(self, token_id, game_time_iso, since_ts=None, fidelity=1):
+        self.fetched.append(token_id)
+        return [{"t": since_ts, "p": 0.62}]
+
+
+def game(slug, start):
+    return {"slug": slug, "start_iso": start.strftime("%Y-%m-%dT%H:%M:%SZ")}
+
+
+def test_only_open_windows_are_fetched():
+    tip_off = datetime(2026, 1, 10, 0, 0, tzinfo=timezone.utc)
+    live = game("nba-phi-bos-2026-01-09", tip_off)
+    future = game("nba-phi-nyk-2026-01-20", datetime(2026, 1, 20, tzinfo=timezone.utc))
+    past = game("nba-phi-mia-2025-12-01", datetime(2025, 12, 1, tzinfo=timezone.utc))
+    now = tip_off.timestamp()
+    assert price_window(live['start_iso'])[0] <= now
+    client = FakeClient()
+
+    prices = ClobPriceSource(client, workers=2)([future, live, past], now)
+
+    assert prices == {live['slug']: 62.0}
+    assert client.resolved == [live['slug']]
+    assert client.fetched == [f"tok-{live['slug']}"]
+
+
+def test_no_open_windows_costs_no_requests():
+    client = FakeClient()
+    future = game("nba-phi-nyk-2026-01-20", datetime(2026, 1, 20, tzinfo=timezone.utc))
+
+    assert ClobPriceSource(client)([future], datetime(2026, 1, 1, tzinfo=timezone.utc).timestamp()) == {}
+    assert client.resolved == [] and client.fetched == []
+
+
+def test_transactions_without_receipts_time_out():
+    chain = start_stub_chain(block_time=1e9)  # Receipts never appear
+    prices = {"nba-phi-bos-2026-01-09": 40.0, "nba-phi-nyk-2026-01-11": 55.0}
+    publisher = OraclePublisher(
+        JsonRpcClient(chain.base_url), lambda games, now: prices, contract=CONTRACT, sender=SENDER,
+        update_filter=DeviationFilter(heartbeat=1e9), batch_size=1, max_in_flight=2, tx_timeout=60.0
+    )
+
+    assert publisher.run_cycle([], now=1000.0) == 2
+    prices["nba-phi-bos-2026-01-09"] = 45.0
+    assert publisher.run_cycle([], now=1030.0) == 0  # Every slot is taken
+    assert publisher.in_flight == 2
+
+    # Both are given up on; every slug is due again, with fresh nonces from the chain
+    prices["nba-phi-bos-2026-01-09"] = 40.0
+    assert publisher.run_cycle([], now=1060.0) == 2
+    publisher.rpc.close()
+    chain.shutdown()
+    assert publisher.stats["timed_out"] == 2
+    assert publisher.in_flight == 2
+    assert chain.transactions == 4
@@ -0,0 +1,118 @@
+"""
+PollScheduler only settles a game after a successful final fetch.
+"""
+import sqlite3
+
+import pytest
+
+import database
+from poll_scheduler import PHASE_SETTLED, PollPlan, PollScheduler
+from polymarket_client import price_window
+
+SLUG = "nba-phi-bos-2025-10-22"
+GAME = {"slug": SLUG, "start_iso": "2025-10-22T23:30:00Z"}
+
+
+class FakeClient:
+    """Duck-typed PolymarketClient whose price requests fail while ``failing`` is set."""
+
+    def __init__(self):
+        self.failing = False
+        self.raising = set()
+        self.requests = 0
+
+    def resolve_markets(self, slugs):
+        return {}
+
+    def get_token_id_from_slug(self, slug):
+        return f"tok-{slug}"
+
+    def get_price_history(self, token_id, game_time_iso, since_ts=None, fidelity=1):
+        self.requests += 1
+        if token_id in self.raising:
+            raise ValueError("malformed payload")
+        if self.failing:
+            return None
+        start, end = price_window(game_time_iso)
+        return [{"t": t, "p": 0.5} for t in range(start, end + 1, 3600)]
+
+
+def test_failed_settle_fetch_is_retried_with_backoff(db_path):
+    client = FakeClient()
+    plan = PollPlan(retry_base=60.0, retry_max=240.0)
+    _, window_end = price_window(GAME['start_iso'])
+    now = window_end + 86400.0
+    assert plan.phase(GAME, now) == PHASE_SETTLED
+    scheduler = PollScheduler([GAME], client=client, plan=plan, workers=1, clock=lambda: now)
+
+    client.failing = True
+    scheduler.run_due(now)
+    assert scheduler.next_due() == now + 60.0
+    scheduler.run_due(now + 60.0)
+    assert scheduler.next_due() == now + 180.0
+    scheduler.run_due(now + 180.0)
+    scheduler.run_due(now + 420.0)
+    assert scheduler.next_due() == now + 660.0  # capped at retry_max
+    assert database.get_sync_state() == {}
+
+    client.failing = False
+    points = scheduler.run_due(now + 660.0)
+    scheduler.close()
+
+    assert points == 73
+    assert scheduler.next_due() is None
+    state = database.get_sync_state()[f"tok-{SLUG}"]
+    assert state['complete']
+    assert state['last_timestamp'] == window_end
+
+
+def test_failures_in_window_keep_the_regular_cadence(db_path):
+    client = FakeClient()
+    plan = PollPlan(hot_interval=60.0, retry_base=600.0)
+    window_start, _ = price_window(GAME['start_iso'])
+    now = window_start + 3600.0
+    scheduler = PollScheduler([GAME], client=client, plan=plan, workers=1, clock=lambda: now)
+
+    client.failing = True
+    scheduler.run_due(now)
+    scheduler.close()
+
+    assert scheduler.next_due() == min(now + 600.0, plan.next_due(GAME, now))
+
+
+def test_a_raising_fetch_keeps_every_game_queued(db_path):
+    client = FakeClient()
+    games = [{"slug": f"nba-phi-{team}-2025-10-22", "start_iso": GAME['start_iso']} for team in ("bos", "nyk", "mia")]
+    client.raising.add(f"tok-{games[1]['slug']}")
+    window_start, _ = price_window(GAME['start_iso'])
+    now = window_start + 3600.0
+    scheduler = PollScheduler(games, client=client, workers=1, clock=lambda: now)
+
+    assert scheduler.run_due(now) == 2 * 73
+    scheduler.close()
+
+    assert scheduler.queued == 3
+
+
+def test_failed_flush_refetches_and_keeps_settled_games(db_path):
+    client = FakeClient()
+    plan = PollPlan(retry_base=60.0)
+    _, window_end = price_window(GAME['start_iso'])
+    now = window_end + 86400.0
+    scheduler = PollScheduler([GAME], client=client, plan=plan, workers=1, clock=lambda: now)
+    scheduler._open()
+
+    def broken_flush():
+        raise sqlite3.OperationalError("disk I/O error")
+
+    scheduler._writer.flush = broken_flush
+    with pytest.raises(sqlite3.OperationalError):
+        scheduler.run_due(now)
+    assert scheduler.next_due() == now + 60.0
+    assert scheduler._last_timestamps == {}
+
+    del scheduler._writer.flush
+    assert scheduler.run_due(now + 60.0) == 73
+    scheduler.close()
+    assert scheduler.next_due() is None
+    assert database.get_sync_state()[f"tok-{SLUG}"]['complete']
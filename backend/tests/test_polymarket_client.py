@@ -0,0 +1,187 @@
+"""
+Retries, backoff and circuit breaking of PolymarketClient against a local stub.
+"""
+import time
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import requests
+
+import polymarket_client
+from polymarket_client import CircuitBreaker, PolymarketClient
+
+OK = (200, {}, {"history": [{"t": 1, "p": 0.5}]})
+UNAVAILABLE = (503, {}, {"error": "unavailable"})
+
+
+def make_client(server, failure_threshold=5, reset_seconds=60.0, **kwargs):
+    options = {"max_retries": 4, "backoff_base": 0.001, "backoff_max": 0.01}
+    options.update(kwargs)
+    client = PolymarketClient(gamma_base=server.base_url, clob_base=server.base_url, **options)
+    for upstream in client.breakers:
+        client.breakers[upstream] = CircuitBreaker(failure_threshold, reset_seconds)
+    return client
+
+
+def get(client, server, path="/prices-history"):
+    return client._get("clob", "clob_prices_history", server.base_url + path)
+
+
+def test_retries_transient_errors_then_succeeds(server):
+    server.queue("/prices-history", UNAVAILABLE, (429, {}, {}), OK)
+    client = make_client(server)
+
+    response = get(client, server)
+
+    assert response.status_code == 200
+    assert server.count("/prices-history") == 3
+    assert client.breakers["clob"].state == CircuitBreaker.CLOSED
+
+
+def test_non_retryable_status_is_returned_without_retry(server):
+    server.queue("/prices-history", (404, {}, {}))
+    client = make_client(server)
+
+    assert get(client, server).status_code == 404
+    assert server.count("/prices-history") == 1
+
+
+def test_retry_after_seconds_is_honored(server):
+    server.queue("/prices-history", (429, {"Retry-After": "0.3"}, {}), OK)
+    client = make_client(server, backoff_max=5.0)
+
+    started = time.monotonic()
+    response = get(client, server)
+
+    assert response.status_code == 200
+    assert time.monotonic() - started >= 0.3
+
+
+def test_retry_after_http_date_and_cap():
+    client = PolymarketClient(backoff_max=30.0)
+
+    class Response:
+        def __init__(self, retry_after):
+            self.headers = {"Retry-After": retry_after}
+
+    in_ten = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=10), usegmt=True)
+    assert 8.0 <= client._retry_delay(0, Response(in_ten)) <= 10.0
+    assert client._retry_delay(0, Response("3600")) == 30.0
+    assert client._retry_delay(0, Response("-5")) == 0.0
+
+
+def test_backoff_is_exponential_and_capped(monkeypatch):
+    monkeypatch.setattr(polymarket_client.random, "uniform", lambda low, high: high)
+    client = PolymarketClient(backoff_base=0.5, backoff_max=3.0)
+
+    assert [client._retry_delay(attempt, None) for attempt in range(5)] == [0.5, 1.0, 2.0, 3.0, 3.0]
+
+
+def test_one_request_counts_as_one_breaker_failure(server):
+    server.default("/prices-history", UNAVAILABLE)
+    client = make_client(server, failure_threshold=5)
+
+    response = get(client, server)
+
+    assert response.status_code == 503
+    assert server.count("/prices-history") == 5  # 1 try + 4 retries
+    assert client.breakers["clob"].state == CircuitBreaker.CLOSED
+
+
+def test_breaker_opens_rejects_then_half_opens(server):
+    server.default("/prices-history", UNAVAILABLE)
+    client = make_client(server, failure_threshold=2, reset_seconds=0.2, max_retries=1)
+    breaker = client.breakers["clob"]
+
+    get(client, server)
+    assert breaker.state == CircuitBreaker.CLOSED
+    get(client, server)
+    assert breaker.state == CircuitBreaker.OPEN
+    sent = server.count("/prices-history")
+
+    # Open: rejected without touching the upstream
+    assert get(client, server) is None
+    assert server.count("/prices-history") == sent
+
+    # Half-open: one probe; its failure re-opens the breaker
+    time.sleep(0.25)
+    get(client, server)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert server.count("/prices-history") == sent + 2
+
+    # A successful probe closes it
+    time.sleep(0.25)
+    server.queue("/prices-history", OK)
+    assert get(client, server).status_code == 200
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_allows_a_single_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.0)
+    breaker.record_failure()
+
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.allow_request()
+
+
+def test_failed_half_open_probe_always_records_an_outcome(server, monkeypatch):
+    client = make_client(server, failure_threshold=1, reset_seconds=0.0, max_retries=0)
+    breaker = client.breakers["clob"]
+    breaker.record_failure()
+
+    def broken_stream(*args, **kwargs):
+        raise requests.exceptions.ChunkedEncodingError("connection broken")
+
+    monkeypatch.setattr(client.session, "get", broken_stream)
+    assert get(client, server) is None
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # Even an unexpected error ends the probe instead of wedging the breaker half-open
+    def crash(*args, **kwargs):
+        raise RuntimeError("bug")
+
+    monkeypatch.setattr(client.session, "get", crash)
+    with pytest.raises(RuntimeError):
+        get(client, server)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    monkeypatch.undo()
+    server.queue("/prices-history", OK)
+    assert get(client, server).status_code == 200
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_endpoint_counters(server):
+    server.queue("/prices-history", UNAVAILABLE, OK, (404, {}, {}))
+    server.default("/markets", UNAVAILABLE)
+    client = make_client(server, failure_threshold=1, max_retries=1)
+
+    get(client, server)
+    get(client, server)
+    client._get("gamma", "gamma_markets_bulk", server.base_url + "/markets")
+    client._get("gamma", "gamma_markets_bulk", server.base_url + "/markets")
+
+    stats = client.get_stats()
+    assert stats["clob_prices_history"]["requests"] == 3
+    assert stats["clob_prices_history"]["retries"] == 1
+    assert stats["clob_prices_history"]["errors"] == 1
+    assert stats["clob_prices_history"]["rejected"] == 0
+    assert stats["gamma_markets_bulk"]["requests"] == 2
+    assert stats["gamma_markets_bulk"]["errors"] == 2
+    assert stats["gamma_markets_bulk"]["rejected"] == 1
+    assert client.request_count == 5
+
+
+def test_get_price_history_end_to_end(server):
+    server.queue("/prices-history", UNAVAILABLE, (200, {}, {"history": [{"t": 10, "p": 0.4}]}))
+    client = make_client(server)
+
+    history = client.get_price_history("token", "2025-10-22T23:30:00Z")
+
+    assert history == [{"t": 10, "p": 0.4}]
+    _, query = server.requests[-1]
+    assert query["market"] == "token"
@@ -0,0 +1,101 @@
+"""
+Token-gated request profiling middleware.
+"""
+import sys
+import threading
+
+import pytest
+from werkzeug.test import Client
+
+import web_server
+from profiling import ProfilingMiddleware
+
+TOKEN = "secret"
+
+
+class RecordingApp:
+    """WSGI app that answers with a fixed status and records what it saw."""
+
+    def __init__(self, status="200 OK", error=None):
+        self.status = status
+        self.error = error
+        self.environs = []
+
+    def __call__(self, environ, start_response):
+        self.environs.append(dict(environ))
+        if self.error is not None:
+            raise self.error
+        start_response(self.status, [("Content-Type", "application/json")])
+        return [b'{"ok": true}']
+
+
+@pytest.fixture
+def app():
+    return RecordingApp()
+
+
+@pytest.fixture
+def profile_dir(tmp_path):
+    return tmp_path / "profiles"
+
+
+def client_for(wsgi_app, profile_dir):
+    return Client(ProfilingMiddleware(wsgi_app, TOKEN, output_dir=str(profile_dir), sample_interval=0.001))
+
+
+def test_bad_token_is_not_profiled(app, profile_dir):
+    response = client_for(app, profile_dir).get("/api/games", headers={"X-Profile": "guess"})
+
+    assert response.status_code == 200
+    assert "X-Profile-Artifact" not in response.headers
+    assert not profile_dir.exists()
+    assert len(app.environs) == 1
+
+
+def test_profiling_parameters_are_stripped_from_the_query(app, profile_dir):
+    client = client_for(app, profile_dir)
+
+    response = client.get(f"/api/games?team=atl&__profile={TOKEN}&__profile_mode=sample")
+    client.get("/api/games?team=atl&__profile=guess")
+
+    assert [environ["QUERY_STRING"] for environ in app.environs] == ["team=atl", "team=atl"]
+    assert response.headers["X-Profile-Mode"] == "sample"
+    assert (profile_dir / response.headers["X-Profile-Artifact"]).exists()
+    assert response.get_data() == b'{"ok": true}'
+
+
+def test_inline_output_preserves_the_status(profile_dir):
+    response = client_for(RecordingApp("404 NOT FOUND"), profile_dir).get(
+        "/api/missing", headers={"X-Profile": f"{TOKEN}; output=inline"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["X-Profile-Status"] == "404 NOT FOUND"
+    assert response.headers["Content-Type"].startswith("text/plain")
+    assert "cumulative" in response.get_data(as_text=True)
+    assert float(response.headers["X-Profile-SQLite-Seconds"]) >= 0
+
+
+def test_profiled_requests_bypass_the_response_cache(season, profile_dir):
+    web_server.response_cache.clear()
+    client = client_for(web_server.app.wsgi_app, profile_dir)
+    client.get("/api/games?team=atl")
+    hits = web_server.response_cache.stats()["hits"]
+
+    response = client.get("/api/games?team=atl", headers={"X-Profile": TOKEN})
+
+    assert response.status_code == 200 and response.get_json()
+    assert "X-Profile-Artifact" in response.headers
+    assert web_server.response_cache.stats()["hits"] == hits
+    web_server.response_cache.clear()
+
+
+@pytest.mark.parametrize("mode", ["cprofile", "sample"])
+def test_profiler_stops_when_the_app_raises(mode, profile_dir):
+    client = client_for(RecordingApp(error=RuntimeError("boom")), profile_dir)
+
+    with pytest.raises(RuntimeError, match="boom"):
+        client.get("/api/games", headers={"X-Profile": f"{TOKEN}; mode={mode}"})
+
+    assert sys.getprofile() is None
+    assert not [thread for thread in threading.enumerate() if thread.name == "profile-sampler"]
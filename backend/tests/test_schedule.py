@@ -0,0 +1,99 @@
+"""
+Building the league schedule from the NBA feed, and loading it strictly.
+"""
+import json
+
+import pytest
+
+from config import NBA_TEAMS, SIXERS_GAMES
+from schedule import build_nba_schedule, load_league_schedule, parse_nba_schedule, save_league_schedule
+
+
+def feed_game(game_id, away, home, date_est, start_utc):
+    return {
+        "gameId": game_id,
+        "gameDateEst": f"{date_est}T00:00:00Z",
+        "gameDateTimeUTC": start_utc,
+        "awayTeam": {"teamTricode": away},
+        "homeTeam": {"teamTricode": home},
+    }
+
+
+def feed(*games, season="2025-26"):
+    return {"leagueSchedule": {"seasonYear": season, "gameDates": [{"games": list(games)}]}}
+
+
+def league_feed():
+    """One regular-season game per pair of teams (every team plays once)."""
+    games = []
+    for i in range(0, len(NBA_TEAMS), 2):
+        games.append(feed_game(
+            f"00225{i:05d}", NBA_TEAMS[i].upper(), NBA_TEAMS[i + 1].upper(), "2025-11-01", "2025-11-01T23:00:00Z"
+        ))
+    return feed(*games)
+
+
+def test_slugs_match_the_configured_sixers_games():
+    data = feed(
+        feed_game("0022500001", "PHI", "BOS", "2025-10-22", "2025-10-22T23:30:00Z"),
+        # 8 pm Eastern on Mar 30 is already Mar 31 in UTC; the slug keeps the Eastern date
+        feed_game("0022501100", "PHI", "MIA", "2026-03-30", "2026-03-31T00:00:00Z"),
+    )
+
+    games = parse_nba_schedule(data)
+
+    configured = {game['slug']: game['start_iso'] for game in SIXERS_GAMES}
+    assert [game['slug'] for game in games] == ["nba-phi-bos-2025-10-22", "nba-phi-mia-2026-03-30"]
+    assert all(configured[game['slug']] == game['start_iso'] for game in games)
+
+
+def test_only_regular_season_games_are_kept():
+    data = feed(
+        feed_game("0012500001", "PHI", "NYK", "2025-10-05", "2025-10-05T23:00:00Z"),  # preseason
+        feed_game("0022500002", "PHI", "NYK", "2025-11-05", "2025-11-05T23:00:00Z"),
+        feed_game("0022500002", "PHI", "NYK", "2025-11-05", "2025-11-05T23:00:00Z"),  # listed twice
+        feed_game("0042500101", "PHI", "NYK", "2026-04-19", "2026-04-19T17:00:00Z"),  # playoffs
+        feed_game("0022500003", "PHI", "XYZ", "2025-11-07", "2025-11-07T23:00:00Z"),  # unknown team
+    )
+
+    assert [game['slug'] for game in parse_nba_schedule(data)] == ["nba-phi-nyk-2025-11-05"]
+
+
+def test_wrong_season_is_rejected():
+    with pytest.raises(ValueError):
+        parse_nba_schedule(feed(season="2024-25"))
+
+
+def test_build_writes_a_loadable_full_league(tmp_path):
+    source = tmp_path / "scheduleLeagueV2.json"
+    source.write_text(json.dumps(league_feed()))
+    path = str(tmp_path / "schedules" / "nba.json")
+
+    built = build_nba_schedule(str(source), path, games_per_team=1)
+
+    assert len(built) == len(NBA_TEAMS) // 2
+    assert load_league_schedule(path, teams=NBA_TEAMS, games_per_team=1) == built
+
+
+def test_build_fails_when_a_team_is_missing(tmp_path):
+    data = league_feed()
+    data['leagueSchedule']['gameDates'][0]['games'].pop()
+    source = tmp_path / "scheduleLeagueV2.json"
+    source.write_text(json.dumps(data))
+
+    with pytest.raises(ValueError, match="does not have 1 games for: .*\\(0\\)"):
+        build_nba_schedule(str(source), str(tmp_path / "nba.json"), games_per_team=1)
+
+
+def test_missing_schedule_fails_loudly(tmp_path):
+    with pytest.raises(FileNotFoundError, match="python schedule.py"):
+        load_league_schedule(str(tmp_path / "missing.json"), teams=NBA_TEAMS)
+
+
+def test_partial_schedule_is_rejected_for_a_league_run(tmp_path):
+    path = save_league_schedule(SIXERS_GAMES, str(tmp_path / "sixers.json"))
+
+    assert len(load_league_schedule(path)) == len(SIXERS_GAMES)
+    # The Sixers play all 29 opponents, so every team appears at least once
+    with pytest.raises(ValueError, match="does not have 82 games for"):
+        load_league_schedule(path, teams=NBA_TEAMS)
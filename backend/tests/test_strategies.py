@@ -0,0 +1,103 @@
+"""
+Entry strategies, their price index and the strategy backtest.
+"""
+import pytest
+
+import database
+import strategies
+from strategies import (
+    STRATEGIES, AsOfPriceIndex, DCAStrategy, EntryStrategy, LumpSumStrategy, ThresholdStrategy,
+    WindowAverageStrategy, describe_strategies, strategy_from_args
+)
+
+HOUR = 3600
+START = 100 * HOUR
+# Prices 50, 40, 30, 20 and 10 hours before tip-off
+PRICES = [(-50, 40.0), (-40, 50.0), (-30, 60.0), (-20, 70.0), (-10, 30.0)]
+
+
+@pytest.fixture
+def index():
+    return AsOfPriceIndex([
+        (1, "2025-01-01", "nba-atl-bos-2025-01-01", START, START + hours * HOUR, price)
+        for hours, price in PRICES
+    ] + [(2, "2025-01-02", "nba-atl-nyk-2025-01-02", START, None, None)])
+
+
+@pytest.fixture
+def game(index):
+    return index.games[0]
+
+
+def test_base_strategy_is_abstract():
+    with pytest.raises(TypeError, match="entries"):
+        EntryStrategy()
+
+
+def test_every_registered_strategy_is_concrete():
+    assert [info['name'] for info in describe_strategies()] == list(STRATEGIES)
+
+
+def test_price_at(index):
+    assert index.price_at(1, START - 51 * HOUR) is None
+    assert index.price_at(1, START - 40 * HOUR) == 50.0
+    assert index.price_at(1, START - 35 * HOUR) == 50.0
+    assert index.price_at(1, START) == 30.0
+    assert index.price_at(2, START) is None
+    assert index.last_price(2) is None
+
+
+def test_window_average_includes_both_edges(index):
+    assert index.window_average(1, START - 48 * HOUR, START) == pytest.approx(52.5)
+    assert index.window_average(1, START - 40 * HOUR, START - 30 * HOUR) == pytest.approx(55.0)
+    assert index.window_average(1, START - 9 * HOUR, START) is None
+    assert index.window_average(2, START - 48 * HOUR, START) is None
+
+
+def test_time_weighted_average(index):
+    # 40 held 8h, then 50, 60, 70 and 30 for 10h each
+    assert index.time_weighted_average(1, START - 48 * HOUR, START) == pytest.approx(2420 / 48)
+    # Clipped to the first point
+    assert index.time_weighted_average(1, START - 60 * HOUR, START - 30 * HOUR) == pytest.approx(45.0)
+    assert index.time_weighted_average(1, START - 25 * HOUR, START - 25 * HOUR) == 60.0
+    assert index.time_weighted_average(1, START - 60 * HOUR, START - 51 * HOUR) is None
+    assert index.time_weighted_average(2, START - 48 * HOUR, START) is None
+
+
+def test_dca_splits_into_equal_entries(index, game):
+    assert DCAStrategy().entries(index, game) == [(0.25, 40.0), (0.25, 50.0), (0.25, 60.0), (0.25, 70.0)]
+
+
+def test_lump_sum_uses_the_price_in_effect(index, game):
+    assert LumpSumStrategy(hours=45).entries(index, game) == [(1.0, 40.0)]
+
+
+def test_threshold_enters_at_the_first_crossing_in_the_window(index, game):
+    # The 40 at -50h is outside the window
+    assert ThresholdStrategy(threshold=45).entries(index, game) == [(1.0, 30.0)]
+    assert ThresholdStrategy(threshold=55).entries(index, game) == [(1.0, 50.0)]
+    assert ThresholdStrategy(threshold=20).entries(index, game) == []
+
+
+def test_strategy_from_args():
+    dca = strategy_from_args({"strategy": "dca", "hours": "24, 12,"})
+    assert isinstance(dca, DCAStrategy) and dca.hours == [24.0, 12.0]
+    assert strategy_from_args({"strategy": "threshold", "hours": "6", "threshold": "40"}).describe()["params"] == {
+        "threshold": 40.0, "hours": 6.0
+    }
+    assert isinstance(strategy_from_args({}), WindowAverageStrategy)
+    with pytest.raises(ValueError, match="hours"):
+        strategy_from_args({"strategy": "lump_sum", "hours": ","})
+    with pytest.raises(ValueError, match="Unknown strategy"):
+        strategy_from_args({"strategy": "martingale"})
+
+
+def test_window_average_reproduces_the_default_backtest(season):
+    expected = database.run_backtest(team="atl")
+    results = strategies.run_backtest(WindowAverageStrategy(), team="atl")
+
+    assert expected
+    assert [r['game_id'] for r in results] == [r['game_id'] for r in expected]
+    assert [r['entry_price'] for r in results] == pytest.approx([r['avg_48h_price'] for r in expected])
+    assert [r['roi_percent'] for r in results] == pytest.approx([r['roi_percent'] for r in expected])
+    assert [r['bankroll'] for r in results] == pytest.approx([r['bankroll'] for r in expected])
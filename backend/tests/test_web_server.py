@@ -0,0 +1,138 @@
+"""
+Request-controlled resource limits and response caching of the web API.
+"""
+import gzip
+
+import pytest
+from werkzeug.http import parse_date
+
+import database
+import monte_carlo
+import web_server
+from config import BACKTEST_SWEEP_MAX_CURVES, MONTE_CARLO_API_MAX_PATHS, MONTE_CARLO_WORKERS
+
+
+@pytest.fixture
+def client(db_path):
+    web_server.response_cache.clear()
+    yield web_server.app.test_client()
+    web_server.response_cache.clear()
+
+
+@pytest.fixture
+def simulations(monkeypatch):
+    calls = []
+
+    def run_simulation(**kwargs):
+        calls.append(kwargs)
+        return {"paths": kwargs['paths']}
+
+    monkeypatch.setattr(monte_carlo, "run_simulation", run_simulation)
+    return calls
+
+
+def test_monte_carlo_workers_are_capped(client, simulations):
+    response = client.get("/api/monte-carlo?paths=1000&workers=500")
+
+    assert response.status_code == 200
+    assert simulations[0]['workers'] == MONTE_CARLO_WORKERS
+
+
+def test_monte_carlo_workers_may_be_lowered(client, simulations):
+    client.get("/api/monte-carlo?paths=1000&workers=1")
+    client.get("/api/monte-carlo?paths=1000&workers=0&seed=1")
+
+    assert [call['workers'] for call in simulations] == [1, 1]
+
+
+def test_monte_carlo_paths_are_capped_for_the_api(client, simulations):
+    response = client.get(f"/api/monte-carlo?paths={MONTE_CARLO_API_MAX_PATHS + 1}")
+
+    assert response.status_code == 400
+    assert simulations == []
+
+
+def test_sweep_omits_curves_unless_asked(client, season):
+    sweep = client.get("/api/backtest/sweep?team=atl&bet_fractions=0.01:0.05:0.01").get_json()
+    assert sweep['grid_points'] == 5
+    assert "equity" not in sweep
+
+    sweep = client.get("/api/backtest/sweep?team=atl&bet_fractions=0.01:0.05:0.01&curves=2").get_json()
+    assert len(sweep['equity']) == 2
+
+    response = client.get(f"/api/backtest/sweep?team=atl&curves={BACKTEST_SWEEP_MAX_CURVES + 1}")
+    assert response.status_code == 400
+
+
+def test_backtest_rejects_empty_hours(client, season):
+    response = client.get("/api/backtest?strategy=lump_sum&hours=,")
+
+    assert response.status_code == 400
+    assert "hours" in response.get_json()["error"]
+
+
+def test_etag_revalidates_to_304(client, season):
+    counters = ("misses", "hits", "not_modified")
+    before = [web_server.response_cache.stats()[name] for name in counters]
+    first = client.get("/api/games?team=atl")
+    etag = first.headers["ETag"]
+
+    again = client.get("/api/games?team=atl", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+    assert client.get("/api/games?team=atl", headers={"If-None-Match": '"other"'}).status_code == 200
+    after = [web_server.response_cache.stats()[name] for name in counters]
+    assert [a - b for a, b in zip(after, before)] == [1, 2, 1]
+
+
+def test_if_modified_since(client, season):
+    last_modified = client.get("/api/games?team=atl").headers["Last-Modified"]
+
+    assert client.get("/api/games?team=atl", headers={"If-Modified-Since": last_modified}).status_code == 304
+    earlier = "Mon, 01 Jan 2024 00:00:00 GMT"
+    assert client.get("/api/games?team=atl", headers={"If-Modified-Since": earlier}).status_code == 200
+
+
+def test_encoded_variants(client, season):
+    identity = client.get("/api/games?team=atl")
+    compressed = client.get("/api/games?team=atl", headers={"Accept-Encoding": "gzip, br;q=0"})
+
+    assert "Content-Encoding" not in identity.headers
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert compressed.headers["Vary"] == "Accept-Encoding"
+    assert gzip.decompress(compressed.data) == identity.data
+    assert compressed.headers["ETag"] != identity.headers["ETag"]
+    # Either variant's ETag revalidates the other
+    conditional = {"Accept-Encoding": "gzip", "If-None-Match": identity.headers["ETag"]}
+    assert client.get("/api/games?team=atl", headers=conditional).status_code == 304
+
+
+def test_errors_are_not_cached(client, season, monkeypatch):
+    get_all_games = web_server.get_all_games
+    failing = [True]
+
+    def flaky(team):
+        if failing[0]:
+            raise RuntimeError("database is locked")
+        return get_all_games(team)
+
+    monkeypatch.setattr(web_server, "get_all_games", flaky)
+    assert client.get("/api/games?team=atl").status_code == 500
+    failing[0] = False
+
+    assert client.get("/api/games?team=atl").status_code == 200
+    assert web_server.response_cache.stats()["entries"] == 1
+
+
+def test_new_data_version_resets_the_cache(client, season):
+    before = client.get("/api/games?team=atl")
+
+    database.merge_price_history(
+        "nba-atl-bos-2026-04-10", "2026-04-10", "2026-04-10T23:00:00Z", "tok-new", [{"t": 1775800000, "p": 0.5}], 60
+    )
+    after = client.get("/api/games?team=atl", headers={"If-None-Match": before.headers["ETag"]})
+
+    assert after.status_code == 200
+    assert len(after.get_json()) == len(before.get_json()) + 1
+    assert parse_date(after.headers["Last-Modified"]) > parse_date(before.headers["Last-Modified"])
+    assert web_server.response_cache.stats()["data_version"] == database.get_data_version()
@@ -1,9 +1,37 @@
 """
 Web server for viewing price history charts.
 """
-from flask import Flask, render_template, jsonify
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from flask import Flask, Response, g, render_template, jsonify, request
+import argparse
 import logging
-from database import get_all_games, get_price_history, generate_game_analysis_dataset, run_backtest
+import time
+from config import (
+    API_MAX_CHART_POINTS,
+    API_PRICE_HISTORY_MAX_GAMES,
+    BACKTEST_BET_PERCENTAGE,
+    BACKTEST_INITIAL_CAPITAL,
+    DEFAULT_TEAM,
+    MONTE_CARLO_API_MAX_PATHS,
+    MONTE_CARLO_PATHS,
+    MONTE_CARLO_WORKERS,
+    PROFILE_TOKEN,
+)
+from database import (
+    close_connections,
+    init_database,
+    get_all_games,
+    get_price_history,
+    get_price_histories,
+    generate_game_analysis_dataset,
+    get_data_version,
+    run_backtest,
+)
+import live_poller
+import metrics
+import profiling
+from response_cache import ApiResponseCache
 
 app = Flask(__name__)
 
@@ -11,6 +39,75 @@ app = Flask(__name__)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Requests carrying the profiling token are profiled; without a token the
+# middleware is not installed at all
+if PROFILE_TOKEN:
+    app.wsgi_app = profiling.ProfilingMiddleware(app.wsgi_app, PROFILE_TOKEN)
+
+# API responses are reused until ingest bumps the database data version
+response_cache = ApiResponseCache(get_data_version)
+
+# Live price events; every /api/live client streams from this one buffer
+live_events = live_poller.EventBroker()
+# The LivePoller feeding live_events when started with --live
+active_poller = None
+
+
+@app.before_request
+def start_request_timer():
+    """Note when the request started, for the per-route latency metrics."""
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    """Record latency, status and body size per route."""
+    started = g.pop('request_started', None)
+    if started is None or not metrics.REGISTRY.enabled:
+        return response
+    # Route templates (e.g. /api/price-history/<int:game_id>) keep label values few
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    metrics.HTTP_REQUEST_SECONDS.labels(route).observe(time.perf_counter() - started)
+    metrics.HTTP_REQUESTS.labels(route, request.method, response.status_code).inc()
+    if not response.is_streamed:
+        metrics.HTTP_RESPONSE_BYTES.labels(route).observe(response.calculate_content_length() or 0)
+    return response
+
+
+@app.teardown_appcontext
+def close_db_connection(exception):
+    """Close the read-only database connection reused during the request."""
+    close_connections()
+
+
+def get_team() -> str:
+    """Get the team perspective requested via the ?team= query parameter."""
+    return request.args.get('team', DEFAULT_TEAM).lower()
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[int]:
+    """Parse epoch seconds or an ISO timestamp (naive values are UTC)."""
+    if not value:
+        return None
+    if value.lstrip('-').isdigit():
+        return int(value)
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def get_chart_range() -> Dict[str, Any]:
+    """Get the start=, end= and max_points= query parameters for chart data."""
+    max_points = request.args.get('max_points', type=int)
+    if max_points is not None and not 3 <= max_points <= API_MAX_CHART_POINTS:
+        raise ValueError(f"max_points must be between 3 and {API_MAX_CHART_POINTS}")
+    return {
+        "start": parse_timestamp(request.args.get('start')),
+        "end": parse_timestamp(request.args.get('end')),
+        "max_points": max_points,
+    }
+
 
 @app.route('/')
 def index():
@@ -25,10 +122,11 @@ def backtest_page():
 
 
 @app.route('/api/games')
+@response_cache.cached
 def api_games():
     """API endpoint to get all games."""
     try:
-        games = get_all_games()
+        games = get_all_games(get_team())
         return jsonify(games)
     except Exception as e:
         logger.error(f"Error fetching games: {e}")
@@ -36,28 +134,69 @@ def api_games():
 
 
 @app.route('/api/price-history/<int:game_id>')
+@response_cache.cached
 def api_price_history(game_id):
-    """API endpoint to get price history for a specific game."""
+    """API endpoint to get price history for a specific game.
+    
+    Pass start= and end= (epoch seconds or ISO timestamps) to limit the
+    range and max_points= to downsample long series for charting.
+    """
     try:
         from database import calculate_48h_average_price
         
-        history = get_price_history(game_id)
-        avg_48h = calculate_48h_average_price(game_id)
+        team = get_team()
+        history = get_price_history(game_id, team, **get_chart_range())
+        avg_48h = calculate_48h_average_price(game_id, team)
         
         return jsonify({
             "history": history,
             "avg_48h_price": avg_48h
         })
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logger.error(f"Error fetching price history: {e}")
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/api/price-history')
+@response_cache.cached
+def api_price_histories():
+    """API endpoint to get many games' price histories in one response.
+    
+    Pass ?ids=1,2,3 (default: every game of the team), hours= for the
+    window average (default 48) and format=records for get_price_history
+    style dictionaries instead of compact epoch/price arrays. start=, end=
+    and max_points= work as for a single game.
+    """
+    try:
+        ids = request.args.get('ids')
+        game_ids = [int(i) for i in ids.split(',') if i.strip()] if ids else None
+        if game_ids is not None and len(game_ids) > API_PRICE_HISTORY_MAX_GAMES:
+            raise ValueError(f"At most {API_PRICE_HISTORY_MAX_GAMES} games per request")
+        
+        output_format = request.args.get('format', 'compact')
+        if output_format not in ('compact', 'records'):
+            raise ValueError("format must be 'compact' or 'records'")
+        hours = request.args.get('hours', 48, type=float)
+        
+        games = get_price_histories(
+            game_ids, get_team(), hours, compact=output_format == 'compact', **get_chart_range()
+        )
+        return jsonify({"format": output_format, "hours": hours, "games": games})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error fetching price histories: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route('/api/game-analysis')
+@response_cache.cached
 def api_game_analysis():
     """API endpoint to get game analysis data for all games."""
     try:
-        analysis_data = generate_game_analysis_dataset()
+        analysis_data = generate_game_analysis_dataset(get_team())
         return jsonify(analysis_data)
     except Exception as e:
         logger.error(f"Error fetching game analysis: {e}")
@@ -65,15 +204,142 @@ def api_game_analysis():
 
 
 @app.route('/api/backtest')
+@response_cache.cached
 def api_backtest():
-    """API endpoint to get backtest simulation results."""
+    """API endpoint to get backtest simulation results.
+    
+    Pass ?strategy= (see /api/strategies) with optional hours= and
+    threshold= to choose how each game's bet is entered.
+    """
     try:
-        backtest_data = run_backtest(initial_capital=10000.0, bet_percentage=0.02)
+        strategy = None
+        if 'strategy' in request.args:
+            from strategies import strategy_from_args
+            strategy = strategy_from_args(request.args)
+        
+        backtest_data = run_backtest(
+            initial_capital=request.args.get('initial_capital', BACKTEST_INITIAL_CAPITAL, type=float),
+            bet_percentage=request.args.get('bet_percentage', BACKTEST_BET_PERCENTAGE, type=float),
+            team=get_team(),
+            strategy=strategy
+        )
         return jsonify(backtest_data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logger.error(f"Error running backtest: {e}")
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/api/strategies')
+@response_cache.cached
+def api_strategies():
+    """API endpoint to list backtest entry strategies and their defaults."""
+    from strategies import describe_strategies
+    return jsonify(describe_strategies())
+
+
+@app.route('/api/backtest/sweep')
+@response_cache.cached
+def api_backtest_sweep():
+    """API endpoint to run a vectorized backtest over a parameter grid.
+    
+    Each grid parameter (bet_fractions, entry_windows, win_thresholds,
+    loss_thresholds, min_prices, max_prices) takes comma-separated values
+    or start:stop:step ranges. curves=N adds the equity curves of the N
+    best grid points (at most BACKTEST_SWEEP_MAX_CURVES; none by default).
+    """
+    try:
+        import backtest_engine
+        
+        params = {
+            name: backtest_engine.parse_grid_values(request.args[name])
+            for name in backtest_engine.GRID_PARAMETERS
+            if name in request.args
+        }
+        sweep = backtest_engine.run_sweep(
+            team=get_team(),
+            initial_capital=request.args.get('initial_capital', BACKTEST_INITIAL_CAPITAL, type=float),
+            curves=request.args.get('curves', 0, type=int),
+            **params
+        )
+        return jsonify(sweep)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error running backtest sweep: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/monte-carlo')
+@response_cache.cached
+def api_monte_carlo():
+    """API endpoint to simulate the distribution of season outcomes.
+    
+    Query parameters: mode (bootstrap, shuffle or implied), paths (at
+    most MONTE_CARLO_API_MAX_PATHS), bet_fraction, initial_capital, seed
+    and workers (capped at MONTE_CARLO_WORKERS).
+    """
+    try:
+        import monte_carlo
+        
+        paths = request.args.get('paths', MONTE_CARLO_PATHS, type=int)
+        if paths > MONTE_CARLO_API_MAX_PATHS:
+            raise ValueError(f"paths must be at most {MONTE_CARLO_API_MAX_PATHS}")
+        # A request may use fewer worker processes than configured, never more
+        workers = max(1, min(request.args.get('workers', MONTE_CARLO_WORKERS, type=int), MONTE_CARLO_WORKERS))
+        simulation = monte_carlo.run_simulation(
+            team=get_team(),
+            mode=request.args.get('mode', monte_carlo.MODE_BOOTSTRAP),
+            paths=paths,
+            bet_fraction=request.args.get('bet_fraction', BACKTEST_BET_PERCENTAGE, type=float),
+            initial_capital=request.args.get('initial_capital', BACKTEST_INITIAL_CAPITAL, type=float),
+            seed=request.args.get('seed', 0, type=int),
+            workers=workers
+        )
+        return jsonify(simulation)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error running Monte Carlo simulation: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/live')
+def api_live():
+    """Server-Sent Events stream of new price points from the live poller.
+    
+    Each 'prices' event carries one game's new points as parallel 't'
+    (epoch seconds) and 'p' arrays from the ?team= perspective. Returns
+    204 (which stops EventSource reconnects) when live polling is off.
+    """
+    if active_poller is None:
+        return Response(status=204)
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    return Response(
+        live_events.stream(get_team(), last_event_id),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Counters and histograms in the Prometheus text format."""
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    parser = argparse.ArgumentParser(description="Serve the price history dashboard.")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--live", action="store_true",
+                        help="Poll games in their price window and push new prices to /api/live")
+    live_poller.add_arguments(parser)
+    args = parser.parse_args()
+    
+    # Apply schema migrations (e.g. the materialized game_analysis table)
+    init_database()
+    if args.live:
+        active_poller = live_poller.build_poller(args, live_events).start()
+    # The reloader would run a second poller in its child process
+    app.run(host='0.0.0.0', port=args.port, debug=True, use_reloader=not args.live, threaded=True)